@@ -1,2 +1 @@
-python3 src/main.py
-python3 -m http.server 8888 -d docs
+python3 src/main.py --serve --port 8888
@@ -0,0 +1,231 @@
+import argparse
+import json
+import platform
+import random
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+from block import BlockType, block_to_block_type, markdown_to_blocks
+from template import Template
+from utils import markdown_to_html_node, text_to_textnodes
+
+STAGES = (
+    "read",
+    "markdown_to_blocks",
+    "block_to_block_type",
+    "text_to_textnodes",
+    "markdown_to_html_node",
+    "to_html",
+    "template",
+    "write",
+)
+WORDS = "the ring elves hobbit shire mordor wizard river mountain road song".split()
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def paragraph(rng: random.Random, links: int = 1) -> str:
+    parts = [sentence(rng, 8), f"**{sentence(rng, 2)}**", sentence(rng, 6)]
+    parts.append(f"_{sentence(rng, 2)}_ and `{rng.choice(WORDS)}`")
+    for i in range(links):
+        parts.append(f"[{sentence(rng, 2)}](/pages/{i}) {rng.choice(WORDS)}")
+    parts.append(f"![{rng.choice(WORDS)}](/images/{rng.choice(WORDS)}.png)")
+    return " ".join(parts)
+
+
+def page(rng: random.Random, sections: int, links: int = 1, items: int = 5) -> str:
+    blocks = [f"# {sentence(rng, 4)}"]
+    for i in range(sections):
+        blocks.append(paragraph(rng, links))
+        blocks.append("\n".join(f"- {paragraph(rng, 0)}" for _ in range(items)))
+        blocks.append("\n".join(f"{j + 1}. {sentence(rng, 5)}" for j in range(items)))
+        blocks.append("> " + sentence(rng, 10) + "\n> " + sentence(rng, 10))
+        if i % 4 == 0:
+            blocks.append("```\n" + sentence(rng, 12) + "\n```")
+    return "\n\n".join(blocks)
+
+
+def generate_site(root: Path, shape: str, scale: int, seed: int = 0) -> list[Path]:
+    rng = random.Random(seed)
+    pages: list[tuple[Path, str]] = []
+
+    match shape:
+        case "small":
+            for i in range(scale * 20):
+                pages.append((root / f"page{i}.md", page(rng, 2)))
+        case "huge":
+            for i in range(2):
+                pages.append((root / f"huge{i}.md", page(rng, scale * 50)))
+        case "links":
+            for i in range(scale * 2):
+                pages.append((root / f"links{i}.md", page(rng, 5, links=200)))
+        case "lists":
+            for i in range(scale * 2):
+                pages.append((root / f"lists{i}.md", page(rng, 5, items=500)))
+        case "deep":
+            for i in range(scale * 10):
+                parts = [f"d{(i >> level) % 4}" for level in range(8)]
+                pages.append((root.joinpath(*parts) / f"page{i}.md", page(rng, 2)))
+        case _:
+            raise ValueError(f"Unknown corpus shape: {shape}")
+
+    for path, markdown in pages:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(markdown)
+    return [path for path, _ in pages]
+
+
+SHAPES = ("small", "huge", "links", "lists", "deep")
+
+
+def inline_texts(blocks: list[str], types: list[BlockType]) -> list[str]:
+    texts = []
+    for block, block_type in zip(blocks, types):
+        if block_type == BlockType.PARAGRAPH:
+            texts.append(block)
+        elif block_type in (BlockType.UNORDERED_LIST, BlockType.ORDERED_LIST):
+            texts.extend(line.split(" ", 1)[1] for line in block.split("\n"))
+    return texts
+
+
+class StageTimer:
+    def __init__(self) -> None:
+        self.totals = {stage: 0.0 for stage in STAGES}
+
+    def time(self, stage: str, func: Callable[[], object]) -> object:
+        start = time.perf_counter()
+        result = func()
+        self.totals[stage] += time.perf_counter() - start
+        return result
+
+
+def run_pipeline(paths: list[Path], src: Path, dest: Path, template: Template):
+    timer = StageTimer()
+    for path in paths:
+        with open(path, "r") as f:
+            markdown = timer.time("read", f.read)
+        assert isinstance(markdown, str)
+
+        blocks = timer.time("markdown_to_blocks", lambda: markdown_to_blocks(markdown))
+        assert isinstance(blocks, list)
+        types = timer.time(
+            "block_to_block_type", lambda: [block_to_block_type(b) for b in blocks]
+        )
+        assert isinstance(types, list)
+        texts = inline_texts(blocks, types)
+        timer.time("text_to_textnodes", lambda: [text_to_textnodes(t) for t in texts])
+
+        node = timer.time(
+            "markdown_to_html_node", lambda: markdown_to_html_node(markdown)
+        )
+        html = timer.time("to_html", node.to_html)  # type: ignore[attr-defined]
+        assert isinstance(html, str)
+        result = timer.time(
+            "template", lambda: template.render({"Title": path.stem, "Content": html})
+        )
+        assert isinstance(result, str)
+
+        output = dest / path.relative_to(src).with_suffix(".html")
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with open(output, "w") as f:
+            timer.time("write", lambda: f.write(result))
+    return timer.totals
+
+
+def bench_shape(shape: str, scale: int, repeat: int, template: Template) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp) / "content"
+        dest = Path(tmp) / "docs"
+        paths = generate_site(src, shape, scale)
+        size = sum(path.stat().st_size for path in paths)
+
+        best: dict[str, float] = {}
+        for _ in range(repeat):
+            totals = run_pipeline(paths, src, dest, template)
+            for stage, seconds in totals.items():
+                best[stage] = min(best.get(stage, seconds), seconds)
+
+    return {
+        "pages": len(paths),
+        "bytes": size,
+        "stages": {stage: round(seconds, 6) for stage, seconds in best.items()},
+        "total": round(sum(best.values()), 6),
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, noise: float) -> bool:
+    regressed = False
+    for shape, result in results["shapes"].items():
+        base = baseline["shapes"].get(shape)
+        if base is None or base["pages"] != result["pages"]:
+            print(f"{shape}: no comparable baseline")
+            continue
+
+        for stage, seconds in [*result["stages"].items(), ("total", result["total"])]:
+            before = base["total"] if stage == "total" else base["stages"].get(stage)
+            if not before:
+                continue
+            ratio = seconds / before
+            flag = ""
+            if ratio > threshold and seconds - before > noise:
+                flag = "  REGRESSION"
+                regressed = True
+            print(
+                f"{shape:>6} {stage:<22} {before:10.4f}s -> {seconds:10.4f}s {ratio:5.2f}x{flag}"
+            )
+    return regressed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the markdown pipeline")
+    parser.add_argument("--shape", choices=SHAPES, action="append")
+    parser.add_argument("--scale", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--template", type=Path, default=Path("template.html"))
+    parser.add_argument("--output", type=Path, help="write the JSON results here")
+    parser.add_argument("--baseline", type=Path, help="JSON results to compare to")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=1.10,
+        help="slowdown ratio reported as a regression",
+    )
+    parser.add_argument(
+        "--noise",
+        type=float,
+        default=0.002,
+        help="ignore slowdowns smaller than this many seconds",
+    )
+    args = parser.parse_args()
+
+    template = Template.load(args.template)
+    results = {
+        "python": platform.python_version(),
+        "scale": args.scale,
+        "repeat": args.repeat,
+        "shapes": {
+            shape: bench_shape(shape, args.scale, args.repeat, template)
+            for shape in args.shape or SHAPES
+        },
+    }
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    else:
+        print(json.dumps(results, indent=2))
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        if compare(results, baseline, args.threshold, args.noise):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import argparse
+import json
+import math
+import time
+
+from utils import INLINE_PARSERS
+
+LINK = "see [page {i}](/pages/{i}) and ![image {i}](/images/{i}.png)"
+
+
+def link_dense_paragraph(links: int) -> str:
+    return " ".join(LINK.format(i=i) for i in range(links))
+
+
+def time_parser(parser, text: str, repeat: int) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        parser(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(counts: list[int], repeat: int) -> dict:
+    results = {}
+    for name, parser in INLINE_PARSERS.items():
+        rows = []
+        for links in counts:
+            text = link_dense_paragraph(links)
+            seconds = time_parser(parser, text, repeat)
+            rows.append(
+                {
+                    "links": links,
+                    "seconds": round(seconds, 6),
+                    "us_per_link": round(seconds / links * 1e6, 3),
+                }
+            )
+        first, last = rows[0], rows[-1]
+        # Slope of log(time) over log(links): ~1 is linear, ~2 quadratic
+        exponent = math.log(last["seconds"] / first["seconds"]) / math.log(
+            last["links"] / first["links"]
+        )
+        results[name] = {"rows": rows, "exponent": round(exponent, 2)}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Time inline parsing of link-dense paragraphs"
+    )
+    parser.add_argument(
+        "--links",
+        type=int,
+        nargs="+",
+        default=[1000, 2000, 4000, 8000, 16000],
+        help="links and images per paragraph, each measured separately",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--max-exponent",
+        type=float,
+        help="exit with an error if any parser scales worse than this",
+    )
+    args = parser.parse_args()
+
+    results = run(sorted(args.links), args.repeat)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.max_exponent is not None:
+        for name, result in results.items():
+            if result["exponent"] > args.max_exponent:
+                raise SystemExit(
+                    f"{name} scales as links^{result['exponent']}, "
+                    f"above {args.max_exponent}"
+                )
+
+
+if __name__ == "__main__":
+    main()
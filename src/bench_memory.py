@@ -0,0 +1,87 @@
+import argparse
+import gc
+import json
+import tracemalloc
+
+from htmlnode import HTMLNode
+from textnode import TextNode
+from utils import markdown_to_html_node, text_to_textnodes
+
+PARAGRAPH = "Some **bold** text, an _italic_ word, `code` and a [link](/blog/{i})"
+LIST_ITEM = "- item **{i}** with a [link](/items/{i})"
+
+
+def generate_markdown(nodes: int) -> str:
+    # Each section yields 35 HTML nodes: a paragraph with 8 inline children
+    # and a five item list whose items carry four children each
+    blocks = ["# Memory benchmark"]
+    for i in range(max(1, nodes // 35)):
+        blocks.append(PARAGRAPH.format(i=i))
+        blocks.append("\n".join(LIST_ITEM.format(i=i * 5 + j) for j in range(5)))
+    return "\n\n".join(blocks)
+
+
+def count_html_nodes(node: HTMLNode) -> int:
+    count = 1
+    for child in node.children or []:
+        count += count_html_nodes(child)
+    return count
+
+
+def measure(build) -> tuple[object, int]:
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, size
+
+
+def run(nodes: int) -> dict[str, float | int]:
+    markdown = generate_markdown(nodes)
+    lines = [PARAGRAPH.format(i=i) for i in range(nodes // 8)]
+
+    tree, tree_bytes = measure(lambda: markdown_to_html_node(markdown))
+    assert isinstance(tree, HTMLNode)
+    html_nodes = count_html_nodes(tree)
+
+    text_nodes, text_bytes = measure(lambda: [text_to_textnodes(l) for l in lines])
+    assert isinstance(text_nodes, list)
+    text_node_count = sum(len(n) for n in text_nodes)
+
+    return {
+        "html_nodes": html_nodes,
+        "html_bytes": tree_bytes,
+        "html_bytes_per_node": round(tree_bytes / html_nodes, 1),
+        "text_nodes": text_node_count,
+        "text_bytes": text_bytes,
+        "text_bytes_per_node": round(text_bytes / text_node_count, 1),
+        "text_node_slots": int(hasattr(TextNode, "__slots__")),
+        "html_node_slots": int(hasattr(HTMLNode, "__slots__")),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure bytes per AST node")
+    parser.add_argument("--nodes", type=int, default=100_000)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="JSON results of a previous run")
+    args = parser.parse_args()
+
+    results = run(args.nodes)
+    print(json.dumps(results, indent=2))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.compare:
+        with open(args.compare, "r") as f:
+            baseline = json.load(f)
+        for key in ("html_bytes_per_node", "text_bytes_per_node"):
+            ratio = results[key] / baseline[key]
+            print(f"{key}: {baseline[key]} -> {results[key]} ({ratio:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
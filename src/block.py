@@ -1,4 +1,10 @@
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
 from enum import Enum
+from typing import TextIO
+
+READ_CHUNK_SIZE = 1 << 16
+BLOCK_SEPARATOR = "\n\n"
 
 
 class BlockType(Enum):
@@ -10,35 +16,85 @@ class BlockType(Enum):
     PARAGRAPH = "paragraph"
 
 
+def read_chunks(f: TextIO, size: int = READ_CHUNK_SIZE) -> Iterator[str]:
+    return iter(lambda: f.read(size), "")
+
+
+def join_block(parts: list[str]) -> Iterator[str]:
+    block = "".join(parts).strip()
+    if block != "":
+        yield block
+
+
+def iter_blocks(chunks: Iterable[str]) -> Iterator[str]:
+    parts: list[str] = []
+    for chunk in chunks:
+        if chunk == "":
+            continue
+
+        # A separator can straddle two chunks: "...\n" followed by "\n..."
+        if parts and parts[-1].endswith("\n") and chunk.startswith("\n"):
+            parts[-1] = parts[-1][:-1]
+            yield from join_block(parts)
+            parts = []
+            chunk = chunk[1:]
+
+        pieces = chunk.split(BLOCK_SEPARATOR)
+        parts.append(pieces[0])
+        for piece in pieces[1:]:
+            yield from join_block(parts)
+            parts = [piece]
+
+    yield from join_block(parts)
+
+
 def markdown_to_blocks(markdown: str) -> list[str]:
-    blocks = markdown.split("\n\n")
-    blocks = [block.strip() for block in blocks]
-    blocks = [block for block in blocks if block != ""]
-    return blocks
+    return list(iter_blocks((markdown,)))
 
 
-def block_to_block_type(block: str) -> BlockType:
-    if block.startswith("# "):
+@dataclass(slots=True)
+class Block:
+    text: str
+    block_type: BlockType
+    lines: list[str]
+
+
+def classify_lines(lines: list[str]) -> BlockType:
+    first = lines[0]
+    if first.startswith("# "):
         return BlockType.HEADING
 
-    if block.startswith("```") and block.endswith("```"):
+    if first.startswith("```") and lines[-1].endswith("```"):
         return BlockType.CODE
 
-    if (
-        block.startswith(">")
-        or block.startswith("- ")
-        or block.startswith("* ")
-        or block.startswith("1. ")
-    ):
-        lines = block.split("\n")
+    # Track every line-prefixed type at once so the lines are walked only once
+    quote = unordered = ordered = True
+    for i, line in enumerate(lines):
+        quote = quote and line.startswith(">")
+        unordered = unordered and (line.startswith("- ") or line.startswith("* "))
+        ordered = ordered and line.startswith(f"{i+1}. ")
+        if not (quote or unordered or ordered):
+            return BlockType.PARAGRAPH
+
+    if quote:
+        return BlockType.QUOTE
+    if unordered:
+        return BlockType.UNORDERED_LIST
+    return BlockType.ORDERED_LIST
+
 
-        if all(line.startswith(">") for line in lines):
-            return BlockType.QUOTE
+def typed_block(text: str) -> Block:
+    lines = text.split("\n")
+    return Block(text, classify_lines(lines), lines)
 
-        if all(line.startswith("- ") or line.startswith("* ") for line in lines):
-            return BlockType.UNORDERED_LIST
 
-        if all(line.startswith(f"{i+1}. ") for i, line in enumerate(lines)):
-            return BlockType.ORDERED_LIST
+def iter_typed_blocks(chunks: Iterable[str]) -> Iterator[Block]:
+    return map(typed_block, iter_blocks(chunks))
 
-    return BlockType.PARAGRAPH
+
+def markdown_to_typed_blocks(markdown: str) -> list[Block]:
+    return list(iter_typed_blocks((markdown,)))
+
+
+def block_to_block_type(block: str) -> BlockType:
+    return classify_lines(block.split("\n"))
@@ -0,0 +1,116 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+CACHE_VERSION = 4
+DEFAULT_MAX_ENTRIES = 50_000
+
+# Rendered HTML of a block, the link/image targets and the plain text in it
+CachedBlock = tuple[str, list[str], str]
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def merge(self, other: "CacheStats") -> None:
+        self.hits += other.hits
+        self.misses += other.misses
+        self.evictions += other.evictions
+
+
+def block_key(
+    block: str, basepath: str, parse_inline: Callable, images: str = ""
+) -> str:
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{basepath}\0{parse_inline.__name__}\0{images}\0".encode())
+    digest.update(block.encode())
+    return digest.hexdigest()
+
+
+class BlockCache:
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self.entries: OrderedDict[str, CachedBlock] = OrderedDict()
+        self.added: dict[str, CachedBlock] = {}
+        self.stats = CacheStats()
+        # Renderers share one cache between threads, and every lookup
+        # reorders the LRU, so reads take the lock too
+        self.lock = threading.Lock()
+
+    def __getstate__(self) -> dict:
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state: dict) -> None:
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: str) -> CachedBlock | None:
+        with self.lock:
+            block = self.entries.get(key)
+            if block is None:
+                self.stats.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.stats.hits += 1
+            return block
+
+    def put(self, key: str, block: CachedBlock) -> None:
+        with self.lock:
+            self.entries[key] = block
+            self.entries.move_to_end(key)
+            self.added[key] = block
+            while len(self.entries) > self.max_entries:
+                evicted, _ = self.entries.popitem(last=False)
+                self.added.pop(evicted, None)
+                self.stats.evictions += 1
+
+    def update(self, entries: dict[str, CachedBlock]) -> None:
+        for key, block in entries.items():
+            self.put(key, block)
+
+    def take_added(self) -> dict[str, CachedBlock]:
+        with self.lock:
+            added, self.added = self.added, {}
+        return added
+
+    @classmethod
+    def load(cls, path: Path, max_entries: int = DEFAULT_MAX_ENTRIES) -> "BlockCache":
+        cache = cls(max_entries)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cache
+
+        if data.get("version") != CACHE_VERSION:
+            return cache
+        for key, (html, refs, text) in data.get("entries", []):
+            cache.entries[key] = (html, refs, text)
+        while len(cache.entries) > max_entries:
+            cache.entries.popitem(last=False)
+        return cache
+
+    def save(self, path: Path) -> None:
+        data = {"version": CACHE_VERSION, "entries": list(self.entries.items())}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f)
+        tmp_path.replace(path)
@@ -0,0 +1,44 @@
+import argparse
+import sys
+from pathlib import Path
+
+from block import markdown_to_blocks
+from inline import scan_inline
+from utils import text_to_textnodes
+
+
+def compare_file(path: Path) -> list[tuple[str, list, list]]:
+    with open(path, "r") as f:
+        markdown = f.read()
+
+    differences = []
+    for block in markdown_to_blocks(markdown):
+        expected = text_to_textnodes(block)
+        actual = scan_inline(block)
+        if expected != actual:
+            differences.append((block, expected, actual))
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Diff the split and scan inline parsers over a content tree"
+    )
+    parser.add_argument("content_dir", nargs="?", default="content")
+    args = parser.parse_args()
+
+    total = 0
+    for path in sorted(Path(args.content_dir).rglob("*.md")):
+        for block, expected, actual in compare_file(path):
+            total += 1
+            print(f"{path}: {block}")
+            print(f"  split: {expected}")
+            print(f"  scan:  {actual}")
+
+    print(f"{total} differing blocks")
+    if total:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
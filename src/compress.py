@@ -0,0 +1,186 @@
+import gzip
+import hashlib
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from manifest import Manifest
+from static import iter_files
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+TEXT_SUFFIXES = frozenset(
+    (".html", ".css", ".js", ".json", ".svg", ".xml", ".txt", ".map")
+)
+# Elements whose whitespace is significant or which are not HTML
+PRESERVED_HTML = re.compile(
+    r"<(pre|code|textarea|script|style)\b.*?</\1\s*>", re.DOTALL | re.IGNORECASE
+)
+WHITESPACE = re.compile(r"\s+")
+CSS_TOKEN = re.compile(
+    r"""("(?:\\.|[^"\\])*"|'(?:\\.|[^'\\])*')"""
+    r"|/\*.*?\*/"
+    r"|\s*;\s*(?=})"
+    r"|\s*([{};,>])\s*"
+    r"|:\s+"
+    r"|\s+",
+    re.DOTALL,
+)
+
+
+def collapse_whitespace(match: re.Match) -> str:
+    return "\n" if "\n" in match.group() else " "
+
+
+def minify_html(html: str) -> str:
+    # Whitespace runs are collapsed rather than removed, so inline elements
+    # keep the spaces between them and the page renders exactly the same
+    parts = []
+    start = 0
+    for match in PRESERVED_HTML.finditer(html):
+        parts.append(WHITESPACE.sub(collapse_whitespace, html[start : match.start()]))
+        parts.append(match.group())
+        start = match.end()
+    parts.append(WHITESPACE.sub(collapse_whitespace, html[start:]))
+    return "".join(parts).strip()
+
+
+def minify_css_token(match: re.Match) -> str:
+    token = match.group()
+    if match.group(1) is not None:
+        return token
+    if match.group(2) is not None:
+        return match.group(2)
+    if token.startswith("/*") or token.strip() == ";":
+        return ""
+    if token.startswith(":"):
+        return ":"
+    return " "
+
+
+def minify_css(css: str) -> str:
+    return CSS_TOKEN.sub(minify_css_token, css).strip()
+
+
+MINIFIERS = {".html": minify_html, ".css": minify_css}
+COMPRESSORS = {".gz": lambda data: gzip.compress(data, compresslevel=9, mtime=0)}
+if brotli is not None:
+    COMPRESSORS[".br"] = lambda data: brotli.compress(data, quality=11)
+
+
+@dataclass
+class CompressStats:
+    minified: int = 0
+    compressed: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+def write_new(path: Path, data: bytes) -> None:
+    # Outputs may be hardlinks to static sources, so never write through them
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_bytes(data)
+    tmp_path.replace(path)
+
+
+def siblings_exist(path: Path, entry: dict) -> bool:
+    return all(path.with_name(path.name + s).exists() for s in entry["encoded"])
+
+
+def is_fresh(path: Path, entry: dict | None) -> bool:
+    if entry is None:
+        return False
+    stat = path.stat()
+    return (
+        entry["size"] == stat.st_size
+        and entry["mtime_ns"] == stat.st_mtime_ns
+        and siblings_exist(path, entry)
+    )
+
+
+def compress_output(
+    path: Path, minify: bool, old: dict | None
+) -> tuple[dict[str, str | int | list[str]], bool, bool]:
+    data = path.read_bytes()
+    minified = False
+    minifier = MINIFIERS.get(path.suffix) if minify else None
+    if minifier is not None:
+        text = minifier(data.decode("utf-8")).encode("utf-8")
+        if text != data:
+            data = text
+            write_new(path, data)
+            minified = True
+
+    digest = hashlib.sha256(data).hexdigest()
+    # A rewritten or touched output with the same content keeps its siblings
+    compressed = old is None or old["hash"] != digest or not siblings_exist(path, old)
+    if compressed:
+        encoded = []
+        for suffix, compressor in COMPRESSORS.items():
+            sibling = path.with_name(path.name + suffix)
+            output = compressor(data)
+            # Tiny files can grow, and then the sibling is not worth serving
+            if len(output) < len(data):
+                write_new(sibling, output)
+                encoded.append(suffix)
+            else:
+                sibling.unlink(missing_ok=True)
+    else:
+        encoded = old["encoded"]
+
+    stat = path.stat()
+    entry = {
+        "hash": digest,
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "encoded": encoded,
+    }
+    return entry, minified, compressed
+
+
+def compress_outputs(
+    output_dir: Path, manifest: Manifest, minify: bool = False, workers: int = 8
+) -> CompressStats:
+    stats = CompressStats()
+    seen: set[str] = set()
+    stale: list[tuple[str, Path]] = []
+
+    for path in iter_files(output_dir):
+        if path.suffix not in TEXT_SUFFIXES:
+            continue
+
+        rel = path.relative_to(output_dir).as_posix()
+        seen.add(rel)
+        if is_fresh(path, manifest.outputs.get(rel)):
+            stats.skipped += 1
+        else:
+            stale.append((rel, path))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        results = executor.map(
+            lambda t: compress_output(t[1], minify, manifest.outputs.get(t[0])),
+            stale,
+        )
+        for (rel, _), (entry, minified, compressed) in zip(stale, results):
+            manifest.outputs[rel] = entry
+            stats.minified += minified
+            if compressed:
+                stats.compressed += 1
+            else:
+                stats.skipped += 1
+
+    # Only siblings written here are dropped, never static .gz or .br files
+    for rel in list(manifest.outputs):
+        if rel not in seen:
+            path = output_dir / rel
+            for suffix in manifest.outputs.pop(rel)["encoded"]:
+                sibling = path.with_name(path.name + suffix)
+                if sibling.exists():
+                    sibling.unlink()
+                    stats.removed += 1
+
+    return stats
@@ -0,0 +1,190 @@
+import json
+import os
+import posixpath
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from images import IMAGE_SUFFIXES
+from links import site_path
+from manifest import Manifest
+
+DEPS_VERSION = 2
+
+
+def output_targets(rel: str) -> list[str]:
+    # Every site path a reference can use to reach this output
+    targets = [rel]
+    if rel == "index.html":
+        targets.append(".")
+    elif rel.endswith("/index.html"):
+        targets.append(rel[: -len("/index.html")])
+    elif rel.endswith(".html"):
+        targets.append(rel[: -len(".html")])
+    return targets
+
+
+def page_output(source: str, content_dir: str) -> str:
+    # Mirrors discover_pages for sources that were never built
+    rel = Path(os.path.relpath(source, content_dir))
+    return rel.with_name(f"{rel.stem}.html").as_posix()
+
+
+def normalize_path(path: str) -> str:
+    return os.path.normpath(os.path.relpath(os.path.abspath(path)))
+
+
+@dataclass
+class Affected:
+    rebuild: set[str] = field(default_factory=set)
+    # Pages whose output stays the same but whose links must be checked again
+    recheck: set[str] = field(default_factory=set)
+
+
+class DependencyGraph:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.basepath: str | None = None
+        self.template: str | None = None
+        self.pages: dict[str, dict[str, str | list[str]]] = {}
+        self.dependents: dict[str, set[str]] = {}
+        # Pages by the front matter template they render with
+        self.layout_dependents: dict[str, set[str]] = {}
+        self.loaded = False
+
+    @classmethod
+    def load(cls, path: Path) -> "DependencyGraph":
+        graph = cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return graph
+
+        if data.get("version") != DEPS_VERSION:
+            return graph
+
+        graph.basepath = data.get("basepath")
+        graph.template = data.get("template")
+        for source, entry in data.get("pages", {}).items():
+            graph.set_page(source, entry)
+        graph.loaded = True
+        return graph
+
+    def exists(self) -> bool:
+        return self.loaded
+
+    def save(self) -> None:
+        data = {
+            "version": DEPS_VERSION,
+            "basepath": self.basepath,
+            "template": self.template,
+            "pages": self.pages,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        tmp_path.replace(self.path)
+
+    def set_page(self, source: str, entry: dict[str, str | list[str]]) -> None:
+        self.remove_page(source)
+        self.pages[source] = entry
+        for target in entry["refs"]:
+            self.dependents.setdefault(target, set()).add(source)
+        layout = entry.get("layout")
+        if layout is not None:
+            self.layout_dependents.setdefault(layout, set()).add(source)
+
+    def remove_page(self, source: str) -> None:
+        old = self.pages.pop(source, None)
+        if old is None:
+            return
+        for target in old["refs"]:
+            dependents = self.dependents[target]
+            dependents.discard(source)
+            if not dependents:
+                del self.dependents[target]
+        layout = old.get("layout")
+        if layout is not None:
+            dependents = self.layout_dependents[layout]
+            dependents.discard(source)
+            if not dependents:
+                del self.layout_dependents[layout]
+
+    def sync(self, manifest: Manifest, output_dir: Path, template: Path) -> int:
+        # Refs are recorded in the manifest as pages render, so only pages
+        # rendered since the last sync have their edges resolved again
+        basepath = manifest.basepath or "/"
+        if self.basepath != basepath:
+            for source in list(self.pages):
+                self.remove_page(source)
+            self.basepath = basepath
+        self.template = str(template)
+
+        updated = 0
+        for source, entry in manifest.pages.items():
+            old = self.pages.get(source)
+            if old is not None and old["hash"] == entry["hash"]:
+                continue
+            dest = Path(entry["dest"]).relative_to(output_dir).as_posix()
+            page_dir = posixpath.dirname(dest)
+            refs = set()
+            for url in entry.get("refs", []):
+                path = site_path(url, page_dir, basepath)
+                if path is not None:
+                    refs.add(path)
+            page: dict[str, str | list[str]] = {
+                "hash": entry["hash"],
+                "dest": dest,
+                "refs": sorted(refs),
+            }
+            # Pages rendered with their own front matter template
+            if entry.get("layout") is not None:
+                page["layout"] = normalize_path(entry["layout"])
+            self.set_page(source, page)
+            updated += 1
+
+        for source in list(self.pages):
+            if source not in manifest.pages:
+                self.remove_page(source)
+                updated += 1
+        return updated
+
+    def affected(
+        self, changed: Iterable[str], content_dir: str, static_dir: str
+    ) -> Affected:
+        affected = Affected()
+        for path in changed:
+            if path == self.template:
+                affected.rebuild.update(self.pages)
+                continue
+            layout_pages = self.layout_dependents.get(path)
+            if layout_pages:
+                affected.rebuild.update(layout_pages)
+                continue
+
+            if Path(path).is_relative_to(content_dir):
+                affected.rebuild.add(path)
+                entry = self.pages.get(path)
+                rel = (
+                    entry["dest"]
+                    if entry is not None
+                    else page_output(path, content_dir)
+                )
+                dependents = affected.recheck
+            elif Path(path).is_relative_to(static_dir):
+                rel = Path(os.path.relpath(path, static_dir)).as_posix()
+                # Image dimensions and variants are rendered into the page
+                if Path(rel).suffix.lower() in IMAGE_SUFFIXES:
+                    dependents = affected.rebuild
+                else:
+                    dependents = affected.recheck
+            else:
+                continue
+
+            for target in output_targets(rel):
+                dependents.update(self.dependents.get(target, ()))
+
+        affected.recheck -= affected.rebuild
+        return affected
@@ -0,0 +1,98 @@
+import hashlib
+import io
+import os
+import threading
+import time
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass
+from pathlib import Path
+from typing import TypeVar
+
+from manifest import hash_file
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+IO_WORKERS = 8
+PREFETCH_LIMIT = 1 << 20
+
+
+def ordered_map(
+    executor: Executor, fn: Callable[[T], R], items: Iterable[T], depth: int
+) -> Iterator[R]:
+    # Unlike Executor.map this pulls items lazily, so at most `depth` calls
+    # are in flight and chained pipelines stay bounded end to end
+    pending: deque[Future[R]] = deque()
+    for item in items:
+        pending.append(executor.submit(fn, item))
+        if len(pending) >= depth:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+@dataclass(slots=True)
+class Source:
+    path: Path
+    hash: str
+    text: str | None
+    seconds: float
+    mtime: float = 0.0
+    error: str | None = None
+
+
+def read_source(path: Path, limit: int = PREFETCH_LIMIT) -> Source:
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        stat = os.fstat(f.fileno())
+        if stat.st_size > limit:
+            data = None
+        else:
+            data = f.read()
+
+    # Large sources are left on disk and streamed block by block when rendered
+    if data is None:
+        source_hash, text = hash_file(path), None
+    else:
+        source_hash = hashlib.sha256(data).hexdigest()
+        text = io.TextIOWrapper(io.BytesIO(data)).read()
+    seconds = time.perf_counter() - start
+    return Source(path, source_hash, text, seconds, stat.st_mtime)
+
+
+def read_page_source(path: Path, limit: int = PREFETCH_LIMIT) -> Source:
+    # Runs on the I/O threads, where a raised error would end the whole
+    # build, so a page that cannot be read or decoded carries its error
+    try:
+        return read_source(path, limit)
+    except (OSError, UnicodeDecodeError) as e:
+        return Source(path, "", None, 0.0, error=f"{type(e).__name__}: {e}")
+
+
+def write_output(path: Path, text: str) -> None:
+    with open(path, "w") as f:
+        f.write(text)
+
+
+class OutputWriter:
+    def __init__(self, executor: Executor, depth: int = IO_WORKERS * 2) -> None:
+        self.executor = executor
+        self.slots = threading.BoundedSemaphore(depth)
+        self.dirs: set[Path] = set()
+
+    def submit(self, path: Path, text: str) -> Future[float]:
+        # Blocks once `depth` writes are queued so rendered pages cannot pile up
+        self.slots.acquire()
+        future = self.executor.submit(self.write, path, text)
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    def write(self, path: Path, text: str) -> float:
+        start = time.perf_counter()
+        if path.parent not in self.dirs:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self.dirs.add(path.parent)
+        write_output(path, text)
+        return time.perf_counter() - start
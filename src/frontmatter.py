@@ -0,0 +1,150 @@
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from pathlib import Path
+from typing import TextIO
+
+YAML_FENCE = "---"
+TOML_FENCE = "+++"
+# Front matter longer than this is taken for an unclosed fence
+FRONT_MATTER_LIMIT = 1 << 16
+TRUE_VALUES = frozenset(("true", "yes", "on"))
+
+
+@dataclass(frozen=True, slots=True)
+class FrontMatter:
+    title: str | None = None
+    date: str | None = None
+    draft: bool = False
+    template: str | None = None
+    tags: tuple[str, ...] = ()
+
+    @property
+    def timestamp(self) -> float | None:
+        if self.date is None:
+            return None
+        parsed = datetime.fromisoformat(self.date)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+
+def unquote(value: str) -> str:
+    if len(value) >= 2 and value[0] == value[-1] and value[0] in "'\"":
+        return value[1:-1]
+    return value
+
+
+def parse_yaml(text: str) -> dict[str, object]:
+    # A flat subset: "key: value" pairs, with lists either inline as
+    # [a, b] or as "- item" lines below the key
+    values: dict[str, object] = {}
+    key = None
+    for line in text.split("\n"):
+        stripped = line.strip()
+        if not stripped or stripped.startswith("#"):
+            continue
+        if stripped.startswith("- ") and key is not None:
+            items = values.setdefault(key, [])
+            if isinstance(items, list):
+                items.append(unquote(stripped[2:].strip()))
+            continue
+
+        key, sep, value = stripped.partition(":")
+        if not sep:
+            raise ValueError(f"Invalid front matter line: {line!r}")
+        key, value = key.strip(), value.strip()
+        if value.startswith("[") and value.endswith("]"):
+            values[key] = [
+                unquote(v.strip()) for v in value[1:-1].split(",") if v.strip()
+            ]
+        elif value:
+            values[key] = unquote(value)
+    return values
+
+
+def front_matter(values: dict[str, object]) -> FrontMatter:
+    title = values.get("title")
+    template = values.get("template")
+    draft = values.get("draft", False)
+    if isinstance(draft, str):
+        draft = draft.lower() in TRUE_VALUES
+
+    value = values.get("date")
+    if isinstance(value, (date, datetime)):
+        value = value.isoformat()
+    elif value is not None:
+        value = str(value)
+        # Rejected here so a bad date fails the page, not the listings
+        datetime.fromisoformat(value)
+
+    tags = values.get("tags", ())
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(",")]
+
+    return FrontMatter(
+        str(title) if title is not None else None,
+        value,
+        bool(draft),
+        str(template) if template is not None else None,
+        tuple(str(tag) for tag in tags if tag),
+    )
+
+
+def parse_front_matter(fence: str, text: str) -> FrontMatter:
+    if fence == TOML_FENCE:
+        import tomllib
+
+        return front_matter(tomllib.loads(text))
+    return front_matter(parse_yaml(text))
+
+
+def scan_front_matter(markdown: str) -> tuple[FrontMatter, int]:
+    # Returns the front matter with the offset of the body, without copying
+    # the body out of the document
+    fence = markdown[:3]
+    if fence not in (YAML_FENCE, TOML_FENCE) or markdown[3:4] not in ("\n", "\r"):
+        return FrontMatter(), 0
+
+    start = markdown.index("\n") + 1
+    end = markdown.find(f"\n{fence}", start - 1)
+    while end != -1 and markdown[end + 4 : end + 5] not in ("", "\n", "\r"):
+        end = markdown.find(f"\n{fence}", end + 1)
+    if end == -1:
+        raise ValueError("Front matter is not closed")
+
+    body_start = markdown.find("\n", end + 1)
+    body_start = body_start + 1 if body_start != -1 else len(markdown)
+    return parse_front_matter(fence, markdown[start : end + 1]), body_start
+
+
+def split_front_matter(markdown: str) -> tuple[FrontMatter, str]:
+    front, body_start = scan_front_matter(markdown)
+    return front, markdown[body_start:] if body_start else markdown
+
+
+def read_front_matter(f: TextIO) -> FrontMatter:
+    # Consumes the front matter and leaves the file at the first body line,
+    # so the rest can be streamed as markdown
+    position = f.tell()
+    first = f.readline()
+    fence = first.rstrip("\r\n")
+    if fence not in (YAML_FENCE, TOML_FENCE):
+        f.seek(position)
+        return FrontMatter()
+
+    lines: list[str] = []
+    size = 0
+    for line in iter(f.readline, ""):
+        if line.rstrip("\r\n") == fence:
+            return parse_front_matter(fence, "".join(lines))
+        lines.append(line)
+        size += len(line)
+        if size > FRONT_MATTER_LIMIT:
+            break
+    raise ValueError("Front matter is not closed")
+
+
+def load_front_matter(path: Path) -> FrontMatter:
+    # Reads only the head of the file, never the markdown below it
+    with open(path, "r") as f:
+        return read_front_matter(f)
@@ -0,0 +1,34 @@
+import subprocess
+from pathlib import Path
+
+
+def git(root: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "core.quotePath=false", *args],
+        cwd=root,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+
+
+def commit_times(root: Path) -> dict[Path, float]:
+    # Unlike mtimes, which a clone or checkout resets, the last commit time
+    # of a source is the same everywhere; sources with uncommitted edits are
+    # left out so that their mtime is used instead
+    try:
+        log = git(root, "log", "--format=%x00%ct", "--name-only", "--relative")
+        edited = git(root, "diff", "HEAD", "--name-only", "--relative")
+    except (OSError, subprocess.CalledProcessError):
+        return {}
+
+    times: dict[Path, float] = {}
+    # Newest commits come first, so the first time seen for a path is kept
+    for commit in log.split("\0")[1:]:
+        stamp, _, names = commit.partition("\n")
+        for name in names.splitlines():
+            if name:
+                times.setdefault(root / name, float(stamp))
+    for name in edited.splitlines():
+        times.pop(root / name, None)
+    return times
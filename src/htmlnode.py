@@ -1,7 +1,12 @@
+from collections.abc import Callable
 from typing import Sequence
 
+Write = Callable[[str], object]
+
 
 class HTMLNode:
+    __slots__ = ("tag", "value", "children", "props")
+
     def __init__(
         self,
         tag: str | None,
@@ -17,6 +22,9 @@ class HTMLNode:
     def to_html(self) -> str:
         raise NotImplementedError
 
+    def write(self, write: Write) -> None:
+        raise NotImplementedError
+
     def props_to_html(self) -> str:
         if self.props is None:
             return ""
@@ -29,6 +37,8 @@ class HTMLNode:
 
 
 class LeafNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str | None,
@@ -46,12 +56,17 @@ class LeafNode(HTMLNode):
             return self.value
         return f"<{self.tag}{self.props_to_html()}>{self.value}</{self.tag}>"
 
+    def write(self, write: Write) -> None:
+        write(self.to_html())
+
     def __repr__(self) -> str:
         tag = f'"{self.tag}"' if self.tag is not None else "None"
         return f'LeafNode({tag}, "{self.value}", {self.props})'
 
 
 class ParentNode(HTMLNode):
+    __slots__ = ()
+
     def __init__(
         self,
         tag: str,
@@ -64,11 +79,19 @@ class ParentNode(HTMLNode):
         self.children = children
 
     def to_html(self) -> str:
+        parts: list[str] = []
+        self.write(parts.append)
+        return "".join(parts)
+
+    def write(self, write: Write) -> None:
         if self.tag is None:
             raise ValueError("Parent nodes must have a tag")
         if self.children is None:
             raise ValueError("Parent nodes must have children")
-        return f"<{self.tag}{self.props_to_html()}>{''.join([child.to_html() for child in self.children])}</{self.tag}>"
+        write(f"<{self.tag}{self.props_to_html()}>")
+        for child in self.children:
+            child.write(write)
+        write(f"</{self.tag}>")
 
     def __repr__(self) -> str:
         return f'ParentNode("{self.tag}", {self.children}, {self.props})'
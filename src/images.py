@@ -0,0 +1,248 @@
+import hashlib
+import importlib.util
+import struct
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path, PurePosixPath
+from types import ModuleType
+from typing import TYPE_CHECKING
+
+from template import rebase_url
+
+# The renderer only needs ImageTable, so the build helpers are imported where
+# they are used
+if TYPE_CHECKING:
+    from manifest import Manifest
+
+IMAGE_SUFFIXES = frozenset((".png", ".jpg", ".jpeg", ".gif"))
+VARIANT_WIDTHS = (480, 960, 1600)
+WEBP_QUALITY = 80
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+# JPEG start-of-frame markers, which carry the dimensions
+JPEG_SOF = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+@cache
+def pillow() -> ModuleType | None:
+    # Pillow is optional and slow to import, so it is loaded on first use
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    return Image
+
+
+@cache
+def has_pillow() -> bool:
+    # Checked on every build, so this looks for Pillow without importing it
+    return importlib.util.find_spec("PIL") is not None
+
+
+def image_size(path: Path) -> tuple[int, int] | None:
+    # Reads the dimensions from the file header, without decoding the image.
+    # Truncated headers give None, so the file is only copied
+    with open(path, "rb") as f:
+        head = f.read(26)
+        if head.startswith(PNG_SIGNATURE) and head[12:16] == b"IHDR":
+            return struct.unpack(">II", head[16:24]) if len(head) >= 24 else None
+        if head[:6] in (b"GIF87a", b"GIF89a"):
+            return struct.unpack("<HH", head[6:10]) if len(head) >= 10 else None
+        if not head.startswith(b"\xff\xd8"):
+            return None
+
+        f.seek(2)
+        while True:
+            marker = f.read(4)
+            if len(marker) < 4 or marker[0] != 0xFF:
+                return None
+            length = struct.unpack(">H", marker[2:])[0]
+            if length < 2:
+                return None
+            if marker[1] in JPEG_SOF:
+                frame = f.read(5)
+                if len(frame) < 5:
+                    return None
+                height, width = struct.unpack(">xHH", frame)
+                return width, height
+            f.seek(length - 2, 1)
+
+
+@dataclass(frozen=True, slots=True)
+class ImageInfo:
+    width: int
+    height: int
+    # Site paths of the resized variants with their widths
+    variants: tuple[tuple[str, int], ...] = ()
+
+
+class ImageTable:
+    def __init__(self, images: dict[str, ImageInfo] | None = None) -> None:
+        self.images = images or {}
+        # Per image, so a build only re-renders the pages of changed images
+        self.digests = {
+            path: hashlib.blake2b(repr(info).encode(), digest_size=16).hexdigest()
+            for path, info in self.images.items()
+        }
+        digest = hashlib.blake2b(digest_size=16)
+        for path in sorted(self.digests):
+            digest.update(f"{path}\0{self.digests[path]}\0".encode())
+        self.key = digest.hexdigest()
+
+    def props(self, url: str, basepath: str = "/") -> dict[str, str]:
+        # Only rooted references can be resolved without knowing the page
+        info = self.images.get(url[1:]) if url.startswith("/") else None
+        if info is None:
+            return {}
+        props = {"width": str(info.width), "height": str(info.height)}
+        if info.variants:
+            props["srcset"] = ", ".join(
+                f"{rebase_url('/' + path, basepath)} {width}w"
+                for path, width in info.variants
+            )
+        return props
+
+
+@dataclass
+class ImageStats:
+    processed: int = 0
+    encoded: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+def variant_widths(width: int) -> list[int]:
+    return [w for w in VARIANT_WIDTHS if w < width] + [width]
+
+
+def variant_path(rel: str, source_hash: str, width: int) -> str:
+    # Content addressed, so a variant URL can be cached forever
+    path = PurePosixPath(rel)
+    return str(path.with_name(f"{path.stem}-{source_hash[:10]}-{width}w.webp"))
+
+
+def cached_variant(cache_dir: Path, source_hash: str, width: int) -> Path:
+    return cache_dir / f"{source_hash}-{width}w-q{WEBP_QUALITY}.webp"
+
+
+def encode_variant(src: Path, dest: Path, width: int) -> None:
+    Image = pillow()
+    assert Image is not None
+    with Image.open(src) as image:
+        height = max(1, round(image.height * width / image.width))
+        if width != image.width:
+            image = image.resize((width, height), Image.Resampling.LANCZOS)
+        tmp_path = dest.with_name(dest.name + ".tmp")
+        image.save(tmp_path, "WEBP", quality=WEBP_QUALITY, method=6)
+    tmp_path.replace(dest)
+
+
+def remove_variants(entry: dict, dest_dir: Path, keep: set[str]) -> int:
+    from static import remove_output
+
+    removed = 0
+    for path, _ in entry["variants"]:
+        if path not in keep:
+            remove_output(dest_dir / path, dest_dir)
+            removed += 1
+    return removed
+
+
+def remove_images(dest_dir: Path, manifest: "Manifest") -> int:
+    removed = 0
+    for entry in manifest.images.values():
+        removed += remove_variants(entry, dest_dir, set())
+    manifest.images.clear()
+    return removed
+
+
+def process_images(
+    src_dir: Path,
+    dest_dir: Path,
+    manifest: "Manifest",
+    cache_dir: Path,
+    jobs: int = 1,
+    link: str = "copy",
+) -> tuple[ImageTable, ImageStats]:
+    from manifest import hash_file
+    from static import iter_files, transfer
+
+    stats = ImageStats()
+    seen: set[str] = set()
+    encodes: list[tuple[Path, Path, int]] = []
+    transfers: list[tuple[Path, Path]] = []
+
+    for path in iter_files(src_dir):
+        if path.suffix.lower() not in IMAGE_SUFFIXES:
+            continue
+        rel = path.relative_to(src_dir).as_posix()
+        seen.add(rel)
+        stat = path.stat()
+        entry = manifest.images.get(rel)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            # Images seen before Pillow was installed still need variants
+            and entry.get("pillow") == has_pillow()
+            and all((dest_dir / p).exists() for p, _ in entry["variants"])
+        ):
+            stats.skipped += 1
+            continue
+
+        size = image_size(path)
+        if size is None:
+            # Unreadable images are copied as they are, without an entry
+            seen.discard(rel)
+            continue
+        source_hash = hash_file(path)
+        variants = []
+        # Without Pillow pages still get dimensions, just no variants
+        encoder = pillow() is not None
+        if encoder:
+            for width in variant_widths(size[0]):
+                variant = variant_path(rel, source_hash, width)
+                cached = cached_variant(cache_dir, source_hash, width)
+                if not cached.exists():
+                    encodes.append((path, cached, width))
+                transfers.append((cached, dest_dir / variant))
+                variants.append([variant, width])
+
+        if entry is not None:
+            stats.removed += remove_variants(entry, dest_dir, {p for p, _ in variants})
+        manifest.images[rel] = {
+            "hash": source_hash,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "width": size[0],
+            "height": size[1],
+            "variants": variants,
+            "pillow": encoder,
+        }
+        stats.processed += 1
+
+    # Encoding is CPU bound, and a variant in the cache is never encoded again
+    if encodes:
+        from concurrent.futures import ProcessPoolExecutor
+
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        with ProcessPoolExecutor(max_workers=max(1, jobs)) as executor:
+            for _ in executor.map(encode_variant, *zip(*encodes)):
+                stats.encoded += 1
+    for cached, dest in transfers:
+        transfer(cached, dest, link)
+
+    for rel in list(manifest.images):
+        if rel not in seen:
+            stats.removed += remove_variants(manifest.images.pop(rel), dest_dir, set())
+
+    table = ImageTable(
+        {
+            rel: ImageInfo(
+                entry["width"],
+                entry["height"],
+                tuple((path, width) for path, width in entry["variants"]),
+            )
+            for rel, entry in manifest.images.items()
+        }
+    )
+    return table, stats
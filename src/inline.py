@@ -0,0 +1,114 @@
+from textnode import TextNode, TextType
+
+# Nested in the order the split parser applies them: each delimiter splits the
+# spans left by the one before, and images and links are found last
+DELIMITERS = (("**", TextType.BOLD), ("_", TextType.ITALIC), ("`", TextType.CODE))
+
+
+class Occurrences:
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.cache: dict[str, int] = {}
+
+    def find(self, token: str, start: int) -> int:
+        # Lookups for a token only move forward, so a cached hit past `start`
+        # is still the first occurrence and each token is scanned once overall
+        cached = self.cache.get(token)
+        if cached is not None and (cached == -1 or cached >= start):
+            return cached
+        position = self.text.find(token, start)
+        self.cache[token] = position
+        return position
+
+
+class InlineScanner:
+    # Spans are visited left to right, so each level's lookups only move
+    # forward and the whole text is scanned a fixed number of times
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.nodes: list[TextNode] = []
+        self.images = Occurrences(text)
+        self.links = Occurrences(text)
+
+    def scan_delimiters(
+        self, start: int, end: int, level: int, text_type: TextType
+    ) -> None:
+        # Like str.split, fewer than two delimiters leave the span whole
+        while level < len(DELIMITERS):
+            delimiter, inner_type = DELIMITERS[level]
+            close = self.text.find(delimiter, start, end)
+            if close != -1:
+                if self.text.find(delimiter, close + len(delimiter), end) != -1:
+                    break
+            level += 1
+        else:
+            self.scan_matches(start, end, text_type, TextType.IMAGE)
+            return
+
+        inside = False
+        while close != -1:
+            if inside:
+                self.scan_delimiters(start, close, level + 1, inner_type)
+            elif close > start:
+                self.scan_delimiters(start, close, level + 1, text_type)
+            start = close + len(delimiter)
+            inside = not inside
+            close = self.text.find(delimiter, start, end)
+
+        # An unpaired last delimiter is dropped and its text keeps the outer type
+        if inside or end > start:
+            self.scan_delimiters(start, end, level + 1, text_type)
+
+    def scan_matches(
+        self, start: int, end: int, text_type: TextType, match_type: TextType
+    ) -> None:
+        if match_type == TextType.IMAGE:
+            opener, occurrences = "![", self.images
+        else:
+            opener, occurrences = "[", self.links
+
+        matched = False
+        plain_start = position = start
+        while True:
+            open_at = occurrences.find(opener, position)
+            if open_at == -1 or open_at + len(opener) > end:
+                break
+            label_start = open_at + len(opener)
+            label_end = occurrences.find("]", label_start)
+            url_end = -1
+            if label_end != -1 and label_end + 1 < end:
+                if self.text[label_end + 1] == "(":
+                    url_end = occurrences.find(")", label_end + 2)
+            if url_end == -1 or url_end >= end:
+                position = open_at + 1
+                continue
+
+            if open_at > plain_start:
+                self.scan_plain(plain_start, open_at, text_type, match_type)
+            self.nodes.append(
+                TextNode(
+                    self.text[label_start:label_end],
+                    match_type,
+                    self.text[label_end + 2 : url_end],
+                )
+            )
+            matched = True
+            position = plain_start = url_end + 1
+
+        if not matched or end > plain_start:
+            self.scan_plain(plain_start, end, text_type, match_type)
+
+    def scan_plain(
+        self, start: int, end: int, text_type: TextType, match_type: TextType
+    ) -> None:
+        # Text around images is still searched for links
+        if match_type == TextType.IMAGE:
+            self.scan_matches(start, end, text_type, TextType.LINK)
+        else:
+            self.nodes.append(TextNode(self.text[start:end], text_type))
+
+
+def scan_inline(text: str) -> list[TextNode]:
+    scanner = InlineScanner(text)
+    scanner.scan_delimiters(0, len(text), 0, TextType.TEXT)
+    return scanner.nodes
@@ -0,0 +1,89 @@
+import posixpath
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import TYPE_CHECKING
+from urllib.parse import unquote, urlsplit
+
+from htmlnode import HTMLNode, LeafNode
+
+if TYPE_CHECKING:
+    from manifest import Manifest
+
+REF_PROPS = {"a": "href", "img": "src"}
+
+
+def collect_refs(node: HTMLNode, refs: list[str]) -> None:
+    if isinstance(node, LeafNode):
+        prop = REF_PROPS.get(node.tag or "")
+        if prop is not None and node.props and prop in node.props:
+            refs.append(node.props[prop])
+        return
+    for child in node.children or []:
+        collect_refs(child, refs)
+
+
+def site_path(url: str, page_dir: str, basepath: str) -> str | None:
+    # Returns the output path a reference points to, relative to the output
+    # root, or None for references that leave the site or stay on the page
+    if url.startswith(basepath) and not url.startswith("//"):
+        path = url[len(basepath) :]
+    elif url.startswith("#"):
+        return None
+    else:
+        parts = urlsplit(url)
+        if parts.scheme or parts.netloc:
+            return None
+        if url.startswith("/"):
+            # Rooted outside the basepath, so it can never reach a site file
+            return url
+        path = posixpath.join(page_dir, url)
+
+    path = unquote(path.split("#", 1)[0].split("?", 1)[0])
+    return posixpath.normpath(path) if path else "."
+
+
+def target_exists(path: str, index: set[str]) -> bool:
+    if path == ".":
+        return "index.html" in index
+    return path in index or f"{path}/index.html" in index or f"{path}.html" in index
+
+
+@dataclass
+class LinkReport:
+    checked: int = 0
+    dangling: list[tuple[str, str]] = field(default_factory=list)
+
+
+def check_refs(
+    pages: Iterable[tuple[str, str, list[str]]], index: set[str], basepath: str
+) -> LinkReport:
+    report = LinkReport()
+    # Rooted references resolve the same from every page, so resolve them once
+    rooted: dict[str, bool] = {}
+    for source, page_dir, refs in pages:
+        for url in refs:
+            report.checked += 1
+            ok = rooted.get(url)
+            if ok is None:
+                path = site_path(url, page_dir, basepath)
+                ok = path is None or target_exists(path, index)
+                if url.startswith(basepath) or url.startswith("/"):
+                    rooted[url] = ok
+            if not ok:
+                report.dangling.append((source, url))
+    return report
+
+
+def check_links(manifest: "Manifest", output_dir: Path) -> LinkReport:
+    index = set(manifest.static)
+    # Section listings, feeds and sitemaps are written beside the pages
+    for entry in manifest.sections.values():
+        index.update(entry["outputs"])
+    index.update(manifest.sitemap.get("files", {}))
+    pages = []
+    for source, entry in manifest.pages.items():
+        dest = Path(entry["dest"]).relative_to(output_dir).as_posix()
+        index.add(dest)
+        pages.append((source, posixpath.dirname(dest), entry.get("refs", [])))
+    return check_refs(pages, index, manifest.basepath or "/")
@@ -0,0 +1,7 @@
+import logging
+
+LOG_FORMAT = "%(message)s"
+
+
+def configure_logging(level: int = logging.INFO) -> None:
+    logging.basicConfig(level=level, format=LOG_FORMAT, force=True)
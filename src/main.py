@@ -1,44 +1,572 @@
+import argparse
+import cProfile
+import logging
 import os
 import shutil
 import sys
 import urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
-from utils import generate_pages
+from cache import DEFAULT_MAX_ENTRIES, BlockCache
+from compress import COMPRESSORS, compress_outputs
+from deps import DependencyGraph, normalize_path
+from history import commit_times
+from images import ImageTable, process_images, remove_images
+from links import check_links
+from log import configure_logging
+from manifest import Manifest
+from profiling import BuildProfile, StageProfile
+from search import SEARCH_DIR, SearchIndex
+from sections import DEFAULT_PAGE_SIZE, remove_sections, write_sections
+from sitemap import is_absolute, remove_sitemap, write_sitemap
+from server import Reloader, serve
+from static import LINK_MODES, SyncStats, sync_static
+from template import Template
+from utils import (
+    INLINE_PARSERS,
+    OutputTarget,
+    build_pages,
+    discover_pages,
+    skip_stage,
+)
+from watch import Watcher
 
+logger = logging.getLogger(__name__)
 
-def main():
-    args = sys.argv
-    basepath_str = "/"
-    if len(args) > 1:
-        basepath_str = args[1]
-    basepath = urllib.parse.urlparse(basepath_str)
+STATIC_DIR = Path("static")
+CONTENT_DIR = Path("content")
+TEMPLATE_PATH = Path("template.html")
+DOCS_DIR = Path("docs")
+MANIFEST_PATH = Path(".cache") / "manifest.json"
+BLOCK_CACHE_PATH = Path(".cache") / "blocks.json"
+SEARCH_STATE_PATH = Path(".cache") / "search.json"
+IMAGE_CACHE_DIR = Path(".cache") / "images"
+DEPS_PATH = Path(".cache") / "deps.json"
 
-    static_dir = Path("static")
-    content_dir = Path("content")
-    template_path = Path("template.html")
-    docs_dir = Path("docs")
 
-    if os.path.exists(docs_dir):
-        shutil.rmtree(docs_dir)
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Generate the static site")
+    parser.add_argument("basepath", nargs="?", default="/")
+    parser.add_argument(
+        "--target",
+        action="append",
+        type=parse_target,
+        metavar="DIR=BASEPATH",
+        help=f"write the site to DIR for BASEPATH instead of to {DOCS_DIR}; repeat "
+        "to build several targets while parsing and rendering every page once",
+    )
+    parser.add_argument(
+        "--clean",
+        action="store_true",
+        help="delete the output directory and rebuild every page",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of worker processes rendering pages (0 uses every core)",
+    )
+    parser.add_argument(
+        "--inline",
+        choices=sorted(INLINE_PARSERS),
+        default="split",
+        help="inline markdown parser: chained split passes or the single-pass scanner",
+    )
+    parser.add_argument(
+        "--link-static",
+        choices=LINK_MODES,
+        default="auto",
+        help="how static files reach the output: reflink, hardlink or copy "
+        "(auto tries them in that order)",
+    )
+    parser.add_argument(
+        "--block-cache",
+        type=int,
+        default=DEFAULT_MAX_ENTRIES,
+        metavar="ENTRIES",
+        help="reuse the HTML of blocks already rendered, keeping at most this many "
+        "(0 disables the cache)",
+    )
+    parser.add_argument(
+        "--persist-block-cache",
+        action="store_true",
+        help=f"keep the block cache in {BLOCK_CACHE_PATH} between builds",
+    )
+    parser.add_argument(
+        "--no-check-links",
+        dest="check_links",
+        action="store_false",
+        help="skip reporting links and images that point to missing pages or files",
+    )
+    parser.add_argument(
+        "--no-search",
+        dest="search",
+        action="store_false",
+        help=f"do not write the search index to {DOCS_DIR / SEARCH_DIR}",
+    )
+    parser.add_argument(
+        "--no-images",
+        dest="images",
+        action="store_false",
+        help="do not add dimensions and resized variants to images",
+    )
+    parser.add_argument(
+        "--drafts",
+        action="store_true",
+        help="also build pages marked as drafts in their front matter",
+    )
+    parser.add_argument(
+        "--no-sections",
+        dest="sections",
+        action="store_false",
+        help="do not write paginated listings and Atom feeds for content "
+        "directories; the feeds need an absolute basepath",
+    )
+    parser.add_argument(
+        "--page-size",
+        type=int,
+        default=DEFAULT_PAGE_SIZE,
+        help="number of pages per section listing page",
+    )
+    parser.add_argument(
+        "--no-sitemap",
+        dest="sitemap",
+        action="store_false",
+        help="do not write sitemap.xml and robots.txt; the sitemap needs an "
+        "absolute basepath and robots.txt one at the host root",
+    )
+    parser.add_argument(
+        "--minify",
+        action="store_true",
+        help="minify HTML and CSS outputs and write precompressed "
+        f"{'/'.join(COMPRESSORS)} siblings of text files",
+    )
+    parser.add_argument(
+        "--affected",
+        nargs="+",
+        metavar="PATH",
+        help="print the pages to rebuild or recheck when these files change, "
+        "without building",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="log every generated page",
+    )
+    parser.add_argument(
+        "-q",
+        "--quiet",
+        action="store_true",
+        help="only log warnings and errors",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="time each build stage per page and print a report",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=10,
+        help="number of slowest pages listed by --profile",
+    )
+    parser.add_argument(
+        "--cprofile",
+        type=Path,
+        help="dump cProfile stats of the main process to this file",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="keep running and rebuild only what changed",
+    )
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="watch and serve the output with live reload",
+    )
+    parser.add_argument("--port", type=int, default=8888)
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.05,
+        help="seconds between change scans in watch mode",
+    )
+    return parser.parse_args()
 
-    if not os.path.exists(docs_dir):
-        os.makedirs(docs_dir)
 
-    try:
-        shutil.rmtree(docs_dir)
-    except Exception as e:
-        print(f"Failed to delete {docs_dir}")
-        print(e)
+def load_block_cache(args: argparse.Namespace) -> BlockCache | None:
+    if args.block_cache <= 0:
+        return None
+    if args.persist_block_cache and not args.clean:
+        return BlockCache.load(BLOCK_CACHE_PATH, args.block_cache)
+    return BlockCache(args.block_cache)
+
+
+def parse_target(value: str) -> tuple[Path, str]:
+    directory, sep, basepath = value.partition("=")
+    if not sep or not directory or not basepath:
+        raise argparse.ArgumentTypeError(f"expected DIR=BASEPATH, got {value!r}")
+    return Path(directory), basepath
+
+
+def state_dir(docs_dir: Path) -> Path:
+    # The default output keeps its state where single target builds put it
+    if docs_dir == DOCS_DIR:
+        return MANIFEST_PATH.parent
+    return MANIFEST_PATH.parent / "targets" / urllib.parse.quote(str(docs_dir), "")
+
+
+def prepare_target(
+    args: argparse.Namespace, docs_dir: Path, basepath: str
+) -> OutputTarget:
+    state = state_dir(docs_dir)
+    manifest_path = state / MANIFEST_PATH.name
+    search_path = state / SEARCH_STATE_PATH.name
+
+    manifest = Manifest.load(manifest_path)
+    search = None
+    if args.search:
+        search = SearchIndex.load(search_path)
+    else:
+        # Pages built now would be missing from the index state, so drop it
+        search_path.unlink(missing_ok=True)
+        shutil.rmtree(docs_dir / SEARCH_DIR, ignore_errors=True)
+
+    # Without a manifest we cannot know which outputs are stale, without the
+    # index state unchanged pages would drop out of search, and minified
+    # outputs cannot be restored, so start over
+    if (
+        args.clean
+        or not manifest.exists()
+        or (search is not None and not search.exists())
+        or (manifest.outputs and not args.minify)
+    ):
+        manifest = Manifest(manifest_path)
+        if search is not None:
+            search = SearchIndex(search_path)
+        if os.path.exists(docs_dir):
+            try:
+                shutil.rmtree(docs_dir)
+            except Exception as e:
+                logger.error("Failed to delete %s: %s", docs_dir, e)
+
+    os.makedirs(docs_dir, exist_ok=True)
+    return OutputTarget(docs_dir, basepath, manifest, search)
+
+
+@dataclass
+class BuildState:
+    target: OutputTarget
+    cache: BlockCache | None
+    images: ImageTable | None
+
+
+def build(args: argparse.Namespace) -> tuple[bool, BuildState]:
+    jobs = args.jobs if args.jobs > 0 else os.cpu_count() or 1
+
+    static_dir = STATIC_DIR
+    content_dir = CONTENT_DIR
+    template_path = TEMPLATE_PATH
+
+    cache = load_block_cache(args)
+    profile = BuildProfile() if args.profile else None
+    stage = profile.build.stage if profile is not None else skip_stage
+
+    targets = [
+        prepare_target(args, docs_dir, basepath)
+        for docs_dir, basepath in args.target or [(DOCS_DIR, args.basepath)]
+    ]
+    primary = targets[0]
+
+    def label(target: OutputTarget) -> str:
+        return f"{target.dest_root}: " if len(targets) > 1 else ""
+
+    pages = discover_pages(content_dir, primary.dest_root)
+    times = commit_times(content_dir)
+
+    def sync(target: OutputTarget) -> tuple[SyncStats, StageProfile | None]:
+        assert target.manifest is not None
+        page_outputs = {target.dest(dest, primary.dest_root) for _, dest in pages}
+        # Targets sync on threads of their own, and a profile times one
+        # stage at a time, so each sync is timed apart and merged afterwards
+        sync_profile = StageProfile("static") if profile is not None else None
+        sync_stage = sync_profile.stage if sync_profile is not None else skip_stage
+        with sync_stage("static"):
+            sync_stats = sync_static(
+                static_dir,
+                target.dest_root,
+                target.manifest,
+                page_outputs,
+                args.link_static,
+            )
+        return sync_stats, sync_profile
+
+    images = None
+    for target in targets:
+        assert target.manifest is not None
+        if not args.images:
+            remove_images(target.dest_root, target.manifest)
+            continue
+        # Every target gets the same table, and variants are encoded only once
+        with stage("images"):
+            images, image_stats = process_images(
+                static_dir,
+                target.dest_root,
+                target.manifest,
+                IMAGE_CACHE_DIR,
+                jobs,
+                args.link_static,
+            )
+        logger.info(
+            "%sImages: %d processed, %d variants encoded, %d unchanged, %d removed",
+            label(target),
+            image_stats.processed,
+            image_stats.encoded,
+            image_stats.skipped,
+            image_stats.removed,
+        )
+
+    # Static files never overlap page outputs, so they sync while pages render
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        static_futures = [executor.submit(sync, target) for target in targets]
+        stats = build_pages(
+            pages,
+            template_path,
+            primary.dest_root,
+            urllib.parse.urlparse(primary.basepath),
+            primary.manifest,
+            jobs,
+            INLINE_PARSERS[args.inline],
+            profile,
+            cache,
+            search=primary.search,
+            images=images,
+            targets=targets[1:],
+            drafts=args.drafts,
+            times=times,
+        )
+
+    for target, static_future in zip(targets, static_futures):
+        try:
+            static_stats, sync_profile = static_future.result()
+            if profile is not None and sync_profile is not None:
+                profile.build.merge(sync_profile)
+            logger.info(
+                "%sStatic files: %d copied, %d linked, %d unchanged, %d removed",
+                label(target),
+                static_stats.copied,
+                static_stats.linked,
+                static_stats.skipped,
+                static_stats.removed,
+            )
+        except Exception as e:
+            logger.error("Failed to copy %s to %s: %s", static_dir, target.dest_root, e)
+
+    logger.info(
+        "Pages: %d rebuilt, %d skipped, %d removed, %d failed, %d drafts",
+        stats.rebuilt,
+        stats.skipped,
+        stats.removed,
+        len(stats.errors),
+        stats.drafts,
+    )
+
+    for target in targets:
+        assert target.manifest is not None
+        if not args.sections:
+            remove_sections(target.dest_root, target.manifest)
+            continue
+        with stage("sections"):
+            section_stats = write_sections(
+                content_dir,
+                target.dest_root,
+                target.basepath,
+                Template.load(template_path, target.basepath),
+                target.manifest,
+                stats.changed,
+                args.page_size,
+            )
+        logger.info(
+            "%sSections: %d written, %d unchanged, %d removed",
+            label(target),
+            section_stats.written,
+            section_stats.skipped,
+            section_stats.removed,
+        )
+
+    for target in targets:
+        assert target.manifest is not None
+        # Sitemaps must list absolute URLs, which a bare path cannot give
+        if not args.sitemap or not is_absolute(target.basepath):
+            remove_sitemap(target.dest_root, target.manifest)
+            continue
+        with stage("sitemap"):
+            sitemap_stats = write_sitemap(
+                target.dest_root, target.basepath, target.manifest, stats.changed
+            )
+        logger.info(
+            "%sSitemap: %d URLs, %d files written, %d unchanged, %d removed",
+            label(target),
+            sitemap_stats.urls,
+            sitemap_stats.written,
+            sitemap_stats.skipped,
+            sitemap_stats.removed,
+        )
+
+    for target in targets:
+        assert target.manifest is not None
+        target.manifest.save()
+    graph = DependencyGraph.load(DEPS_PATH)
+    graph.sync(primary.manifest, primary.dest_root, template_path)
+    graph.save()
+
+    # Every target links the same pages, so checking one of them is enough
+    if args.check_links:
+        with stage("links"):
+            report = check_links(primary.manifest, primary.dest_root)
+        for source, url in report.dangling:
+            logger.warning("%s: dangling reference %s", source, url)
+        logger.info(
+            "Links: %d checked, %d dangling", report.checked, len(report.dangling)
+        )
+
+    for target in targets:
+        search = target.search
+        if search is None:
+            continue
+        with stage("search"):
+            written = search.write(target.dest_root / SEARCH_DIR)
+            search.save()
+        logger.info(
+            "%sSearch index: %d pages, %d files updated",
+            label(target),
+            len(search.docs),
+            written,
+        )
+
+    if args.minify:
+        for target in targets:
+            assert target.manifest is not None
+            with stage("compress"):
+                compress_stats = compress_outputs(
+                    target.dest_root, target.manifest, minify=True
+                )
+                target.manifest.save()
+            logger.info(
+                "%sCompressed files: %d minified, %d compressed, %d unchanged, "
+                "%d removed",
+                label(target),
+                compress_stats.minified,
+                compress_stats.compressed,
+                compress_stats.skipped,
+                compress_stats.removed,
+            )
+
+    if cache is not None:
+        logger.info(
+            "Block cache: %d hits, %d misses (%.0f%% hit rate), %d entries",
+            cache.stats.hits,
+            cache.stats.misses,
+            cache.stats.hit_rate * 100,
+            len(cache),
+        )
+        if args.persist_block_cache:
+            cache.save(BLOCK_CACHE_PATH)
+
+    for from_path, error in stats.errors:
+        logger.error("Failed to generate %s: %s", from_path, error)
+
+    if profile is not None:
+        logger.info(profile.report(args.profile_top))
+
+    return not stats.errors, BuildState(primary, cache, images)
+
+
+def watch(args: argparse.Namespace, state: BuildState) -> None:
+    reloader = Reloader()
+    watcher = Watcher(
+        CONTENT_DIR,
+        STATIC_DIR,
+        TEMPLATE_PATH,
+        state.target.dest_root,
+        urllib.parse.urlparse(state.target.basepath),
+        state.target.manifest,
+        INLINE_PARSERS[args.inline],
+        args.link_static,
+        reloader.notify,
+        state.cache,
+        state.target.search,
+        state.images,
+        args.page_size if args.sections else None,
+        args.drafts,
+        IMAGE_CACHE_DIR if args.images else None,
+        args.sitemap and is_absolute(state.target.basepath),
+        args.minify,
+        DEPS_PATH,
+    )
+
+    docs_dir = state.target.dest_root
+    if args.serve:
+        server = serve(docs_dir, args.port, reloader)
+        logger.info("Serving %s at http://localhost:%d/", docs_dir, args.port)
 
-    # Copy the source directory to the destination directory
     try:
-        shutil.copytree(static_dir, docs_dir)
-    except Exception as e:
-        print(f"Failed to copy {static_dir} to {docs_dir}")
-        print(e)
+        watcher.run(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if args.serve:
+            server.shutdown()
+
+
+def affected(args: argparse.Namespace) -> bool:
+    graph = DependencyGraph.load(DEPS_PATH)
+    if not graph.exists():
+        manifest = Manifest.load(MANIFEST_PATH)
+        if not manifest.exists():
+            logger.error("No dependency graph in %s, build the site first", DEPS_PATH)
+            return False
+        graph.sync(manifest, DOCS_DIR, TEMPLATE_PATH)
+        graph.save()
+
+    changed = [normalize_path(path) for path in args.affected]
+    result = graph.affected(changed, str(CONTENT_DIR), str(STATIC_DIR))
+    for path in sorted(result.rebuild):
+        print(f"rebuild\t{path}")
+    for path in sorted(result.recheck):
+        print(f"recheck\t{path}")
+    return True
+
+
+def main():
+    args = parse_args()
+    level = logging.INFO
+    if args.verbose:
+        level = logging.DEBUG
+    elif args.quiet:
+        level = logging.WARNING
+    configure_logging(level)
+
+    if args.affected:
+        sys.exit(0 if affected(args) else 1)
+
+    if args.cprofile is None:
+        ok, state = build(args)
+    else:
+        profiler = cProfile.Profile()
+        ok, state = profiler.runcall(build, args)
+        profiler.dump_stats(args.cprofile)
+        logger.info("Wrote cProfile stats to %s", args.cprofile)
 
-    generate_pages(content_dir, template_path, docs_dir, basepath)
+    if args.watch or args.serve:
+        watch(args, state)
+    elif not ok:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
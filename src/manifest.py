@@ -0,0 +1,119 @@
+import hashlib
+import json
+from pathlib import Path
+
+from frontmatter import FrontMatter
+
+MANIFEST_VERSION = 9
+HASH_CHUNK_SIZE = 1 << 16
+
+
+def hash_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class Manifest:
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.basepath: str | None = None
+        self.template: str | None = None
+        # Digests of the image dimensions and variants pages were rendered with
+        self.image_table: dict[str, str] = {}
+        # Hashes of the templates pages pick in their front matter
+        self.layouts: dict[str, str] = {}
+        self.pages: dict[str, dict[str, str | float | list[str]]] = {}
+        self.static: dict[str, dict[str, str | int]] = {}
+        self.outputs: dict[str, dict[str, str | int | list[str]]] = {}
+        self.images: dict[str, dict] = {}
+        self.sections: dict[str, dict] = {}
+        self.sitemap: dict = {}
+        self.loaded = False
+
+    @classmethod
+    def load(cls, path: Path) -> "Manifest":
+        manifest = cls(path)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return manifest
+
+        if data.get("version") != MANIFEST_VERSION:
+            return manifest
+
+        manifest.basepath = data.get("basepath")
+        manifest.template = data.get("template")
+        manifest.image_table = data.get("image_table", {})
+        manifest.layouts = data.get("layouts", {})
+        manifest.pages = data.get("pages", {})
+        manifest.static = data.get("static", {})
+        manifest.outputs = data.get("outputs", {})
+        manifest.images = data.get("images", {})
+        manifest.sections = data.get("sections", {})
+        manifest.sitemap = data.get("sitemap", {})
+        manifest.loaded = True
+        return manifest
+
+    def exists(self) -> bool:
+        return self.loaded
+
+    def save(self) -> None:
+        data = {
+            "version": MANIFEST_VERSION,
+            "basepath": self.basepath,
+            "template": self.template,
+            "image_table": self.image_table,
+            "layouts": self.layouts,
+            "pages": self.pages,
+            "static": self.static,
+            "outputs": self.outputs,
+            "images": self.images,
+            "sections": self.sections,
+            "sitemap": self.sitemap,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=1, sort_keys=True)
+        tmp_path.replace(self.path)
+
+    def page_is_fresh(self, from_path: Path, dest_path: Path, source_hash: str) -> bool:
+        entry = self.pages.get(str(from_path))
+        if entry is None:
+            return False
+        return (
+            entry["hash"] == source_hash
+            and entry["dest"] == str(dest_path)
+            and dest_path.exists()
+        )
+
+    def record_page(
+        self,
+        from_path: Path,
+        dest_path: Path,
+        source_hash: str,
+        refs: list[str] | None = None,
+        title: str = "",
+        summary: str = "",
+        mtime: float = 0.0,
+        front: FrontMatter = FrontMatter(),
+        layout: str | None = None,
+    ) -> None:
+        # Everything but the refs feeds the section listings and the
+        # sitemap, which are regenerated without reading unchanged sources
+        self.pages[str(from_path)] = {
+            "hash": source_hash,
+            "dest": str(dest_path),
+            "refs": refs or [],
+            "title": title,
+            "summary": summary,
+            "mtime": mtime,
+            "date": front.timestamp,
+            "draft": front.draft,
+            "tags": list(front.tags),
+            "layout": layout,
+        }
@@ -0,0 +1,119 @@
+import sys
+import time
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+from typing import TypeVar
+
+from htmlnode import Write
+
+T = TypeVar("T")
+
+STAGES = (
+    "static",
+    "images",
+    "read",
+    "parse",
+    "render",
+    "template",
+    "write",
+    "sections",
+    "sitemap",
+    "links",
+    "search",
+    "compress",
+)
+
+
+class StageProfile:
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self.seconds = dict.fromkeys(STAGES, 0.0)
+        self.blocks = dict.fromkeys(STAGES, 0)
+        self.current: str | None = None
+        self.started = 0.0
+        self.started_blocks = 0
+
+    def switch(self, stage: str | None) -> str | None:
+        # Time and allocated blocks are charged to one stage at a time, so a
+        # write nested inside render is not counted twice
+        now = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        if self.current is not None:
+            self.seconds[self.current] += now - self.started
+            self.blocks[self.current] += blocks - self.started_blocks
+        previous, self.current = self.current, stage
+        self.started, self.started_blocks = now, blocks
+        return previous
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        previous = self.switch(name)
+        try:
+            yield
+        finally:
+            self.switch(previous)
+
+    def wrap_write(self, write: Write) -> Write:
+        def timed_write(text: str) -> object:
+            with self.stage("write"):
+                return write(text)
+
+        return timed_write
+
+    def wrap_iter(self, stage: str, items: Iterable[T]) -> Iterator[T]:
+        iterator = iter(items)
+        while True:
+            with self.stage(stage):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def merge(self, other: "StageProfile") -> None:
+        for stage in STAGES:
+            self.seconds[stage] += other.seconds[stage]
+            self.blocks[stage] += other.blocks[stage]
+
+    @property
+    def total(self) -> float:
+        return sum(self.seconds.values())
+
+
+class BuildProfile:
+    def __init__(self) -> None:
+        self.build = StageProfile("build")
+        self.pages: list[StageProfile] = []
+
+    def add(self, page: StageProfile) -> None:
+        self.pages.append(page)
+
+    def stage_totals(self) -> tuple[dict[str, float], dict[str, int]]:
+        seconds = dict(self.build.seconds)
+        blocks = dict(self.build.blocks)
+        for page in self.pages:
+            for stage in STAGES:
+                seconds[stage] += page.seconds[stage]
+                blocks[stage] += page.blocks[stage]
+        return seconds, blocks
+
+    def report(self, top: int = 10) -> str:
+        seconds, blocks = self.stage_totals()
+        total = sum(seconds.values()) or 1.0
+        lines = ["Stage breakdown:"]
+        for stage in STAGES:
+            lines.append(
+                f"  {stage:<9} {seconds[stage]:9.4f}s {seconds[stage] / total:6.1%}"
+                f" {blocks[stage]:+10d} blocks"
+            )
+
+        slowest = sorted(self.pages, key=lambda page: page.total, reverse=True)
+        lines.append(f"Slowest {min(top, len(slowest))} of {len(slowest)} pages:")
+        for page in slowest[:top]:
+            stages = " ".join(
+                f"{stage}={page.seconds[stage]:.4f}"
+                for stage in STAGES
+                if page.seconds[stage] > 0
+            )
+            lines.append(f"  {page.total:9.4f}s {page.name} ({stages})")
+        return "\n".join(lines)
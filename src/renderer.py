@@ -0,0 +1,41 @@
+from collections.abc import Iterable, Iterator
+
+from cache import DEFAULT_MAX_ENTRIES, BlockCache
+from images import ImageTable
+from template import Template
+from utils import INLINE_PARSERS, render_markdown_page
+
+
+class Renderer:
+    # Renders markdown held in memory, for callers that embed the generator
+    # instead of building a content directory. The template is compiled once
+    # and the block cache is shared by every call, from any thread.
+    def __init__(
+        self,
+        template: str,
+        basepath: str = "/",
+        inline: str = "split",
+        cache_entries: int = DEFAULT_MAX_ENTRIES,
+        images: ImageTable | None = None,
+    ) -> None:
+        if inline not in INLINE_PARSERS:
+            raise ValueError(f"Unknown inline parser: {inline}")
+        self.basepath = basepath
+        self.template = Template(template, basepath)
+        self.parse_inline = INLINE_PARSERS[inline]
+        self.cache = BlockCache(cache_entries) if cache_entries > 0 else None
+        self.images = images
+
+    def render(self, markdown: str) -> str:
+        return render_markdown_page(
+            markdown,
+            self.template,
+            self.basepath,
+            self.parse_inline,
+            cache=self.cache,
+            images=self.images,
+        )
+
+    def render_many(self, markdowns: Iterable[str]) -> Iterator[str]:
+        for markdown in markdowns:
+            yield self.render(markdown)
@@ -0,0 +1,243 @@
+import json
+import re
+import string
+from collections import Counter
+from collections.abc import Iterable
+from pathlib import Path
+
+from htmlnode import HTMLNode, LeafNode
+
+SEARCH_VERSION = 1
+TERM_PATTERN = re.compile(r"\w{2,}")
+SHARD_CHARS = frozenset(string.ascii_lowercase + string.digits)
+SEARCH_DIR = "search"
+DOCS_FILE = "docs.json"
+
+# A posting list is flat and delta coded: [id, tf, id - previous id, tf, ...]
+Postings = list[int]
+
+
+def collect_text(node: HTMLNode, parts: list[str]) -> None:
+    if isinstance(node, LeafNode):
+        if node.tag == "img":
+            if node.props and node.props.get("alt"):
+                parts.append(node.props["alt"])
+        elif node.value and node.value != "<br />":
+            parts.append(node.value)
+        return
+    for child in node.children or []:
+        collect_text(child, parts)
+
+
+def count_terms(parts: Iterable[str]) -> dict[str, int]:
+    return dict(Counter(TERM_PATTERN.findall(" ".join(parts).lower())))
+
+
+def shard_key(term: str, prefix_length: int = 1) -> str:
+    prefix = term[:prefix_length]
+    return prefix if all(c in SHARD_CHARS for c in prefix) else "_"
+
+
+def encode_shard(postings: dict[str, dict[int, int]]) -> list:
+    # Terms are sorted and front coded: each entry stores how many leading
+    # characters it shares with the previous term and only the rest
+    entries = []
+    previous = ""
+    for term in sorted(postings):
+        shared = 0
+        limit = min(len(term), len(previous))
+        while shared < limit and term[shared] == previous[shared]:
+            shared += 1
+
+        flat: Postings = []
+        last = 0
+        for doc_id, count in sorted(postings[term].items()):
+            flat += (doc_id - last, count)
+            last = doc_id
+        entries.append([shared, term[shared:], flat])
+        previous = term
+    return entries
+
+
+def decode_shard(entries: list) -> dict[str, dict[int, int]]:
+    postings = {}
+    term = ""
+    for shared, suffix, flat in entries:
+        term = term[:shared] + suffix
+        docs = {}
+        doc_id = 0
+        for i in range(0, len(flat), 2):
+            doc_id += flat[i]
+            docs[doc_id] = flat[i + 1]
+        postings[term] = docs
+    return postings
+
+
+class SearchIndex:
+    def __init__(self, path: Path, prefix_length: int = 1) -> None:
+        self.path = path
+        self.prefix_length = prefix_length
+        self.docs: dict[str, dict] = {}
+        # Posting changes not yet written, grouped by shard:
+        # (term, doc id, new term frequency or None to remove)
+        self.pending: dict[str, list[tuple[str, int, int | None]]] = {}
+        self.docs_dirty = False
+        self.loaded = False
+        self.used_ids: set[int] = set()
+        self.lowest_free = 0
+
+    @classmethod
+    def load(cls, path: Path, prefix_length: int = 1) -> "SearchIndex":
+        index = cls(path, prefix_length)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index
+
+        if (
+            data.get("version") != SEARCH_VERSION
+            or data.get("prefix_length") != prefix_length
+        ):
+            return index
+        index.docs = data.get("docs", {})
+        index.used_ids = {doc["id"] for doc in index.docs.values()}
+        index.loaded = True
+        return index
+
+    def exists(self) -> bool:
+        return self.loaded
+
+    def save(self) -> None:
+        data = {
+            "version": SEARCH_VERSION,
+            "prefix_length": self.prefix_length,
+            "docs": self.docs,
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, separators=(",", ":"))
+        tmp_path.replace(self.path)
+
+    def next_id(self) -> int:
+        # Reuse the lowest free id so the docs list stays dense
+        while self.lowest_free in self.used_ids:
+            self.lowest_free += 1
+        self.used_ids.add(self.lowest_free)
+        return self.lowest_free
+
+    def change(self, term: str, doc_id: int, count: int | None) -> None:
+        if not self.loaded:
+            # A fresh index is rebuilt from every page on its first write
+            return
+        key = shard_key(term, self.prefix_length)
+        self.pending.setdefault(key, []).append((term, doc_id, count))
+
+    def update_page(
+        self, source: str, url: str, title: str, terms: dict[str, int]
+    ) -> None:
+        old = self.docs.get(source)
+        if old is None:
+            old_terms: dict[str, int] = {}
+            doc_id = self.next_id()
+            self.docs_dirty = True
+        else:
+            old_terms = old["terms"]
+            doc_id = old["id"]
+            self.docs_dirty |= old["url"] != url or old["title"] != title
+
+        for term, count in terms.items():
+            if old_terms.get(term) != count:
+                self.change(term, doc_id, count)
+        for term in old_terms.keys() - terms.keys():
+            self.change(term, doc_id, None)
+        self.docs[source] = {"id": doc_id, "url": url, "title": title, "terms": terms}
+
+    def remove_page(self, source: str) -> None:
+        old = self.docs.pop(source, None)
+        if old is None:
+            return
+        for term in old["terms"]:
+            self.change(term, old["id"], None)
+        self.docs_dirty = True
+        self.used_ids.discard(old["id"])
+        self.lowest_free = min(self.lowest_free, old["id"])
+
+    def all_shards(self) -> dict[str, dict[str, dict[int, int]]]:
+        postings: dict[str, dict[int, int]] = {}
+        for doc in self.docs.values():
+            doc_id = doc["id"]
+            for term, count in doc["terms"].items():
+                docs = postings.get(term)
+                if docs is None:
+                    docs = postings[term] = {}
+                docs[doc_id] = count
+
+        shards: dict[str, dict[str, dict[int, int]]] = {}
+        for term, docs in postings.items():
+            shards.setdefault(shard_key(term, self.prefix_length), {})[term] = docs
+        return shards
+
+    def patched_shards(self, out_dir: Path) -> dict[str, dict[str, dict[int, int]]]:
+        # Only shards with pending changes are read back and patched, so an
+        # edit costs the size of the shards it touches, not of the whole site
+        shards = {}
+        for key, changes in self.pending.items():
+            path = out_dir / f"{key}.json"
+            postings: dict[str, dict[int, int]] = {}
+            if path.exists():
+                with open(path, "r") as f:
+                    postings = decode_shard(json.load(f))
+            for term, doc_id, count in changes:
+                docs = postings.setdefault(term, {})
+                if count is None:
+                    docs.pop(doc_id, None)
+                else:
+                    docs[doc_id] = count
+                if not docs:
+                    del postings[term]
+            shards[key] = postings
+        return shards
+
+    def write(self, out_dir: Path) -> int:
+        if self.loaded and (out_dir / DOCS_FILE).exists():
+            shards = self.patched_shards(out_dir)
+        else:
+            # Pages only need the text helpers, so shutil is loaded here
+            import shutil
+
+            shutil.rmtree(out_dir, ignore_errors=True)
+            shards = self.all_shards()
+            self.docs_dirty = True
+
+        out_dir.mkdir(parents=True, exist_ok=True)
+        written = 0
+        for key, postings in shards.items():
+            path = out_dir / f"{key}.json"
+            if postings:
+                write_json(path, encode_shard(postings))
+                written += 1
+            else:
+                path.unlink(missing_ok=True)
+
+        if self.docs_dirty:
+            docs: list[list[str] | None] = [None] * (
+                max((doc["id"] for doc in self.docs.values()), default=-1) + 1
+            )
+            for doc in self.docs.values():
+                docs[doc["id"]] = [doc["url"], doc["title"]]
+            write_json(out_dir / DOCS_FILE, docs)
+            written += 1
+
+        self.pending.clear()
+        self.docs_dirty = False
+        self.loaded = True
+        return written
+
+
+def write_json(path: Path, data: object) -> None:
+    tmp_path = path.with_suffix(".tmp")
+    # dumps encodes in C, unlike dump which streams through the Python encoder
+    tmp_path.write_text(json.dumps(data, separators=(",", ":"), ensure_ascii=False))
+    tmp_path.replace(path)
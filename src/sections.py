@@ -0,0 +1,307 @@
+import hashlib
+import os
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from urllib.parse import urlparse
+from xml.sax.saxutils import escape, quoteattr
+
+from fileio import write_output
+from htmlnode import LeafNode, ParentNode
+from manifest import Manifest
+from static import remove_output
+from template import Template
+
+DEFAULT_PAGE_SIZE = 10
+FEED_ENTRIES = 20
+FEED_NAME = "atom.xml"
+
+
+@dataclass
+class SectionStats:
+    written: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+@dataclass(frozen=True, slots=True)
+class SectionPage:
+    source: str
+    url: str
+    title: str
+    summary: str
+    # The front matter date, or the source mtime for pages without one
+    date: float
+    tags: tuple[str, ...] = ()
+
+
+def source_parts(source: str, content_dir: str) -> list[str]:
+    # Sources are discovered below the content directory, so stripping the
+    # prefix spares relpath resolving both paths for every page
+    prefix = os.path.join(content_dir, "")
+    if source.startswith(prefix):
+        return source[len(prefix) :].split(os.sep)
+    return os.path.relpath(source, content_dir).split(os.sep)
+
+
+def is_index(parts: list[str]) -> bool:
+    return parts[-1].rpartition(".")[0] == "index"
+
+
+def parts_sections(parts: list[str]) -> list[str]:
+    # A page is listed by every directory above it, except that an index
+    # page is the page of its own directory rather than one of its entries
+    depth = len(parts) - 2 if is_index(parts) else len(parts) - 1
+    return ["/".join(parts[:i]) for i in range(depth, -1, -1)]
+
+
+def page_sections(source: str, content_dir: str) -> list[str]:
+    return parts_sections(source_parts(source, content_dir))
+
+
+def section_outputs(section: str, pages: int, occupied: bool) -> list[str]:
+    # The first listing page is the section index, unless a content page
+    # already renders there
+    prefix = f"{section}/" if section else ""
+    outputs = [f"{prefix}page/{n}/index.html" for n in range(1, pages + 1)]
+    if not occupied:
+        outputs[0] = f"{prefix}index.html"
+    return outputs
+
+
+def exists(root: Path, rel: str) -> bool:
+    return os.path.exists(os.path.join(root, rel))
+
+
+def is_absolute(basepath: str) -> bool:
+    parsed = urlparse(basepath)
+    return bool(parsed.scheme and parsed.netloc)
+
+
+def output_url(rel: str, basepath: str) -> str:
+    if rel == "index.html" or rel.endswith("/index.html"):
+        rel = rel[: -len("index.html")]
+    return basepath + rel
+
+
+def timestamp(seconds: float) -> str:
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat(timespec="seconds")
+
+
+def listing_content(
+    entries: list[SectionPage],
+    feed_url: str | None,
+    newer: str | None,
+    older: str | None,
+) -> str:
+    items: list[LeafNode | ParentNode] = []
+    for entry in entries:
+        updated = timestamp(entry.date)
+        children: list[LeafNode | ParentNode] = [
+            LeafNode("a", entry.title, {"href": entry.url}),
+            LeafNode(None, " "),
+            LeafNode("time", updated[:10], {"datetime": updated}),
+        ]
+        if entry.summary:
+            children.append(LeafNode("p", entry.summary))
+        items.append(ParentNode("li", children))
+
+    links: list[LeafNode | ParentNode] = []
+    if newer is not None:
+        links.append(LeafNode("a", "Newer", {"href": newer, "rel": "prev"}))
+    if older is not None:
+        links.append(LeafNode("a", "Older", {"href": older, "rel": "next"}))
+    if feed_url is not None:
+        links.append(LeafNode("a", "Atom feed", {"href": feed_url}))
+
+    children: list[LeafNode | ParentNode] = [ParentNode("nav", links)]
+    if items:
+        children.insert(0, ParentNode("ul", items))
+    return ParentNode("div", children).to_html()
+
+
+def atom_feed(title: str, url: str, feed_url: str, entries: list[SectionPage]) -> str:
+    updated = timestamp(max((entry.date for entry in entries), default=0))
+    parts = [
+        '<?xml version="1.0" encoding="utf-8"?>\n',
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n',
+        f'<title type="html">{escape(title)}</title>\n',
+        f"<id>{escape(url)}</id>\n",
+        f'<link rel="self" href={quoteattr(feed_url)}/>\n',
+        f"<link href={quoteattr(url)}/>\n",
+        f"<updated>{updated}</updated>\n",
+    ]
+    for entry in entries[:FEED_ENTRIES]:
+        parts.append(
+            "<entry>"
+            f'<title type="html">{escape(entry.title)}</title>'
+            f"<id>{escape(entry.url)}</id>"
+            f"<link href={quoteattr(entry.url)}/>"
+            f"<updated>{timestamp(entry.date)}</updated>"
+            f'<summary type="html">{escape(entry.summary)}</summary>'
+            + "".join(f"<category term={quoteattr(tag)}/>" for tag in entry.tags)
+            + "</entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+def section_hash(
+    manifest: Manifest,
+    basepath: str,
+    page_size: int,
+    title: str,
+    pages: list[SectionPage],
+) -> str:
+    fields = [str(manifest.template), basepath, str(page_size), title]
+    for page in pages:
+        fields.extend((page.source, page.url, page.title, page.summary))
+        fields.append(repr(page.date))
+        fields.append(",".join(page.tags))
+    data = "\0".join(fields).encode()
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+def write_sections(
+    content_dir: Path,
+    dest_root: Path,
+    basepath: str,
+    template: Template,
+    manifest: Manifest,
+    changed: Iterable[str] | None = None,
+    page_size: int = DEFAULT_PAGE_SIZE,
+) -> SectionStats:
+    stats = SectionStats()
+    content = str(content_dir)
+    # Atom ids and links must be absolute IRIs, so feeds need an absolute base
+    feeds = is_absolute(basepath)
+    if not manifest.sections:
+        changed = None
+
+    # Only sections holding a changed page are regenerated, plus any whose
+    # outputs are missing or were laid out for another page size
+    dirty: set[str] = set()
+    if changed is not None:
+        for source in changed:
+            dirty.update(page_sections(source, content))
+    for section, entry in manifest.sections.items():
+        if entry["page_size"] != page_size or not all(
+            exists(dest_root, rel) for rel in entry["outputs"]
+        ):
+            dirty.add(section)
+    if changed is not None and not dirty:
+        stats.skipped = len(manifest.sections)
+        return stats
+
+    # Grouping only touches the manifest, so no source is read again
+    members: dict[str, list[str]] = {}
+    index_pages: dict[str, str] = {}
+    for source in manifest.pages:
+        parts = source_parts(source, content)
+        for section in parts_sections(parts):
+            members.setdefault(section, []).append(source)
+        if is_index(parts):
+            index_pages["/".join(parts[:-1])] = source
+
+    if changed is None:
+        dirty.update(members)
+    dirty.update(section for section in manifest.sections if section not in members)
+
+    occupied = {entry["dest"] for entry in manifest.pages.values()}
+    root = os.path.join(dest_root, "")
+    for section in sorted(dirty):
+        old = manifest.sections.get(section)
+        sources = members.get(section)
+        if not sources:
+            if old is not None:
+                for rel in old["outputs"]:
+                    remove_output(dest_root / rel, dest_root)
+                del manifest.sections[section]
+                stats.removed += 1
+            continue
+
+        pages = []
+        for source in sources:
+            entry = manifest.pages[source]
+            rel = entry["dest"].removeprefix(root).replace(os.sep, "/")
+            url = output_url(rel, basepath)
+            pages.append(
+                SectionPage(
+                    source,
+                    url,
+                    entry["title"],
+                    entry["summary"],
+                    entry["date"] if entry["date"] is not None else entry["mtime"],
+                    tuple(entry["tags"]),
+                )
+            )
+        # Newest first, with the path breaking ties so the order is stable
+        pages.sort(key=lambda page: (-page.date, page.source))
+        index = index_pages.get(section)
+        title = manifest.pages[index]["title"] if index else section or "Index"
+
+        digest = section_hash(manifest, basepath, page_size, title, pages)
+        count = max(1, -(-len(pages) // page_size))
+        first = dest_root / section / "index.html"
+        rels = section_outputs(section, count, str(first) in occupied)
+        if feeds:
+            rels.append(f"{section}/{FEED_NAME}" if section else FEED_NAME)
+        old_outputs = old["outputs"] if old is not None else {}
+        if (
+            old is not None
+            and old["hash"] == digest
+            and list(old_outputs) == rels
+            and all(exists(dest_root, rel) for rel in rels)
+        ):
+            continue
+
+        urls = [output_url(rel, basepath) for rel in rels]
+        section_url = output_url(f"{section}/" if section else "", basepath)
+        feed_url = urls[-1] if feeds else None
+
+        def render(n: int) -> str:
+            if feed_url is not None and n == count:
+                return atom_feed(title, section_url, feed_url, pages)
+            content_html = listing_content(
+                pages[n * page_size : (n + 1) * page_size],
+                feed_url,
+                urls[n - 1] if n > 0 else None,
+                urls[n + 1] if n + 1 < count else None,
+            )
+            return template.render({"Title": title, "Content": content_html})
+
+        outputs: dict[str, str] = {}
+        for n, rel in enumerate(rels):
+            text = render(n)
+            text_hash = hashlib.blake2b(text.encode(), digest_size=16).hexdigest()
+            outputs[rel] = text_hash
+            dest_path = dest_root / rel
+            # Listing pages whose entries did not move keep their file
+            if old_outputs.get(rel) == text_hash and dest_path.exists():
+                continue
+            dest_path.parent.mkdir(parents=True, exist_ok=True)
+            write_output(dest_path, text)
+
+        for rel in old_outputs:
+            if rel not in outputs:
+                remove_output(dest_root / rel, dest_root)
+        manifest.sections[section] = {
+            "hash": digest,
+            "page_size": page_size,
+            "outputs": outputs,
+        }
+        stats.written += 1
+
+    stats.skipped = len(members) - stats.written
+    return stats
+
+
+def remove_sections(dest_root: Path, manifest: Manifest) -> int:
+    removed = 0
+    for entry in manifest.sections.values():
+        for rel in entry["outputs"]:
+            remove_output(dest_root / rel, dest_root)
+        removed += 1
+    manifest.sections.clear()
+    return removed
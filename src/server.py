@@ -0,0 +1,101 @@
+import logging
+import os
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlsplit
+
+logger = logging.getLogger(__name__)
+
+LIVERELOAD_PATH = "/__livereload"
+LIVERELOAD_SCRIPT = (
+    "<script>"
+    f'new EventSource("{LIVERELOAD_PATH}").onmessage = () => location.reload();'
+    "</script>"
+).encode()
+KEEPALIVE_SECONDS = 15.0
+
+
+class Reloader:
+    def __init__(self) -> None:
+        self.generation = 0
+        self.condition = threading.Condition()
+
+    def notify(self) -> None:
+        with self.condition:
+            self.generation += 1
+            self.condition.notify_all()
+
+    def wait(self, generation: int, timeout: float) -> int:
+        with self.condition:
+            self.condition.wait_for(lambda: self.generation != generation, timeout)
+            return self.generation
+
+
+def inject_livereload(html: bytes) -> bytes:
+    index = html.rfind(b"</body>")
+    if index == -1:
+        return html + LIVERELOAD_SCRIPT
+    return html[:index] + LIVERELOAD_SCRIPT + html[index:]
+
+
+def make_handler(directory: Path, reloader: Reloader) -> type[SimpleHTTPRequestHandler]:
+    class LiveReloadHandler(SimpleHTTPRequestHandler):
+        def __init__(self, *args, **kwargs) -> None:
+            super().__init__(*args, directory=str(directory), **kwargs)
+
+        def do_GET(self) -> None:
+            url_path = urlsplit(self.path).path
+            if url_path == LIVERELOAD_PATH:
+                self.send_events()
+                return
+
+            path = self.translate_path(self.path)
+            if os.path.isdir(path) and url_path.endswith("/"):
+                path = os.path.join(path, "index.html")
+            if path.endswith(".html") and os.path.isfile(path):
+                self.send_html(path)
+                return
+
+            super().do_GET()
+
+        def send_html(self, path: str) -> None:
+            with open(path, "rb") as f:
+                body = inject_livereload(f.read())
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def send_events(self) -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-store")
+            self.end_headers()
+
+            generation = reloader.generation
+            try:
+                while True:
+                    latest = reloader.wait(generation, KEEPALIVE_SECONDS)
+                    if latest != generation:
+                        generation = latest
+                        self.wfile.write(b"data: reload\n\n")
+                    else:
+                        self.wfile.write(b": keepalive\n\n")
+                    self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                return
+
+        def log_message(self, format: str, *args) -> None:
+            logger.debug(format, *args)
+
+    return LiveReloadHandler
+
+
+def serve(directory: Path, port: int, reloader: Reloader) -> ThreadingHTTPServer:
+    server = ThreadingHTTPServer(("", port), make_handler(directory, reloader))
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
@@ -0,0 +1,194 @@
+import hashlib
+import os
+from collections.abc import Collection, Iterable, Iterator
+from dataclasses import dataclass
+from pathlib import Path
+from urllib.parse import quote, urlparse
+from xml.sax.saxutils import escape
+
+from manifest import Manifest
+from sections import is_absolute, output_url, timestamp
+from static import remove_output
+
+SITEMAP_NAME = "sitemap.xml"
+ROBOTS_NAME = "robots.txt"
+# The protocol caps a sitemap at 50,000 URLs, past which an index lists them
+SITEMAP_LIMIT = 50_000
+URLSET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+URLSET_CLOSE = "</urlset>\n"
+INDEX_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">\n'
+)
+INDEX_CLOSE = "</sitemapindex>\n"
+
+
+@dataclass
+class SitemapStats:
+    urls: int = 0
+    written: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+@dataclass
+class UrlCount:
+    urls: int = 0
+    lastmod: float = 0.0
+
+
+def is_host_root(basepath: str) -> bool:
+    # Crawlers only fetch /robots.txt, so one below a path prefix is ignored
+    return urlparse(basepath).path in ("", "/")
+
+
+def iter_urls(
+    dest_root: Path, basepath: str, manifest: Manifest
+) -> Iterator[tuple[str, float]]:
+    # Manifest order is stable: rebuilt pages keep their place and new ones
+    # are appended, so URLs keep their file without sorting every entry
+    root = os.path.join(dest_root, "")
+    for entry in manifest.pages.values():
+        if not entry.get("draft"):
+            rel = entry["dest"].removeprefix(root).replace(os.sep, "/")
+            yield output_url(quote(rel), basepath), entry["mtime"]
+
+
+def write_stream(path: Path, parts: Iterable[str], old_hash: str | None) -> str:
+    # Written to a temporary file while hashing, and only moved into place
+    # when the content differs, so unchanged files keep their mtime
+    digest = hashlib.blake2b(digest_size=16)
+    tmp_path = path.with_name(path.name + ".tmp")
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for part in parts:
+            digest.update(part.encode())
+            f.write(part)
+    new_hash = digest.hexdigest()
+    if new_hash == old_hash and path.exists():
+        tmp_path.unlink()
+    else:
+        tmp_path.replace(path)
+    return new_hash
+
+
+def urlset(urls: Iterable[tuple[str, float]], count: UrlCount) -> Iterator[str]:
+    yield URLSET_OPEN
+    for url, mtime in urls:
+        count.urls += 1
+        count.lastmod = max(count.lastmod, mtime)
+        yield (
+            f"<url><loc>{escape(url)}</loc>"
+            f"<lastmod>{timestamp(mtime)}</lastmod></url>\n"
+        )
+    yield URLSET_CLOSE
+
+
+def chunks(
+    urls: Iterator[tuple[str, float]], size: int
+) -> Iterator[Iterator[tuple[str, float]]]:
+    # Yields lazy runs of at most `size` URLs, so no run is held in memory
+    for first in urls:
+
+        def run(first: tuple[str, float] = first) -> Iterator[tuple[str, float]]:
+            yield first
+            for _, url in zip(range(size - 1), urls):
+                yield url
+
+        yield run()
+
+
+def write_sitemap(
+    dest_root: Path,
+    basepath: str,
+    manifest: Manifest,
+    changed: Collection[str] | None = None,
+    limit: int = SITEMAP_LIMIT,
+) -> SitemapStats:
+    stats = SitemapStats()
+    state = manifest.sitemap
+    files: dict[str, str] = state.get("files", {})
+    # Static files win, so a robots.txt of the site's own is left alone
+    robots = is_host_root(basepath) and ROBOTS_NAME not in manifest.static
+    if (
+        changed is not None
+        and not changed
+        and state.get("basepath") == basepath
+        and state.get("limit") == limit
+        and (ROBOTS_NAME in files) == robots
+        and files
+        and all((dest_root / name).exists() for name in files)
+    ):
+        stats.urls = state.get("urls", 0)
+        stats.skipped = len(files)
+        return stats
+
+    outputs: dict[str, str] = {}
+
+    def write(name: str, parts: Iterable[str]) -> None:
+        new_hash = write_stream(dest_root / name, parts, files.get(name))
+        if files.get(name) == new_hash:
+            stats.skipped += 1
+        else:
+            stats.written += 1
+        outputs[name] = new_hash
+
+    urls = iter_urls(dest_root, basepath, manifest)
+    total = sum(not entry.get("draft") for entry in manifest.pages.values())
+    if total <= limit:
+        # Small enough to be the sitemap itself, with no index in front
+        count = UrlCount()
+        write(SITEMAP_NAME, urlset(urls, count))
+        stats.urls = count.urls
+    else:
+        runs: list[tuple[str, float]] = []
+        for n, run in enumerate(chunks(urls, limit), start=1):
+            count = UrlCount()
+            write(f"sitemap-{n}.xml", urlset(run, count))
+            stats.urls += count.urls
+            runs.append((f"sitemap-{n}.xml", count.lastmod))
+        write(
+            SITEMAP_NAME,
+            [
+                INDEX_OPEN,
+                *(
+                    f"<sitemap><loc>{escape(output_url(name, basepath))}</loc>"
+                    f"<lastmod>{timestamp(lastmod)}</lastmod></sitemap>\n"
+                    for name, lastmod in runs
+                ),
+                INDEX_CLOSE,
+            ],
+        )
+
+    if robots:
+        write(
+            ROBOTS_NAME,
+            [
+                "User-agent: *\nAllow: /\n\n"
+                f"Sitemap: {output_url(SITEMAP_NAME, basepath)}\n"
+            ],
+        )
+
+    for name in files:
+        if name not in outputs and name not in manifest.static:
+            remove_output(dest_root / name, dest_root)
+            stats.removed += 1
+    manifest.sitemap = {
+        "basepath": basepath,
+        "limit": limit,
+        "urls": stats.urls,
+        "files": outputs,
+    }
+    return stats
+
+
+def remove_sitemap(dest_root: Path, manifest: Manifest) -> int:
+    removed = 0
+    for name in manifest.sitemap.get("files", {}):
+        if name not in manifest.static:
+            remove_output(dest_root / name, dest_root)
+            removed += 1
+    manifest.sitemap = {}
+    return removed
@@ -0,0 +1,65 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from urllib.parse import urlparse
+
+from cache import BlockCache
+from images import ImageTable
+from manifest import Manifest
+from profiling import BuildProfile
+from search import SearchIndex
+from utils import BuildStats, generate_pages
+
+
+class SiteTestCase(unittest.TestCase):
+    # Content, static and output directories with a template, in a temporary
+    # directory, for the tests that run builds
+    template_text = "<title>{{ Title }}</title>{{ Content }}"
+    basepath = "/"
+    # Runs each test inside the site, with paths relative to it
+    relative = False
+
+    def setUp(self) -> None:
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.root = Path(self.tmp.name)
+        if self.relative:
+            self.addCleanup(os.chdir, os.getcwd())
+            os.chdir(self.root)
+            self.root = Path()
+        self.content = self.root / "content"
+        self.content.mkdir()
+        self.static = self.root / "static"
+        self.static.mkdir()
+        self.docs = self.root / "docs"
+        self.template = self.root / "template.html"
+        self.template.write_text(self.template_text)
+        self.manifest = Manifest(self.root / "manifest.json")
+
+    def generate(
+        self,
+        manifest: Manifest | None = None,
+        basepath: str | None = None,
+        jobs: int = 1,
+        profile: BuildProfile | None = None,
+        cache: BlockCache | None = None,
+        search: SearchIndex | None = None,
+        images: ImageTable | None = None,
+        drafts: bool = False,
+        times: dict[Path, float] | None = None,
+    ) -> BuildStats:
+        return generate_pages(
+            self.content,
+            self.template,
+            self.docs,
+            urlparse(basepath if basepath is not None else self.basepath),
+            manifest if manifest is not None else self.manifest,
+            jobs,
+            profile=profile,
+            cache=cache,
+            search=search,
+            images=images,
+            drafts=drafts,
+            times=times,
+        )
@@ -0,0 +1,147 @@
+import os
+import shutil
+from collections.abc import Iterator, Set
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+
+from manifest import Manifest, hash_file
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+LINK_MODES = ("auto", "reflink", "hardlink", "copy")
+# ioctl request number of FICLONE on Linux (btrfs, xfs, ...)
+FICLONE = 0x40049409
+
+
+@dataclass
+class SyncStats:
+    copied: int = 0
+    linked: int = 0
+    skipped: int = 0
+    removed: int = 0
+
+
+def remove_output(path: Path, root: Path, keep: Set[Path] = frozenset()) -> None:
+    path.unlink(missing_ok=True)
+    parent = path.parent
+    while (
+        parent != root
+        and parent not in keep
+        and parent.is_dir()
+        and not any(parent.iterdir())
+    ):
+        parent.rmdir()
+        parent = parent.parent
+
+
+def iter_files(root: Path) -> Iterator[Path]:
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for filename in sorted(filenames):
+            yield Path(dirpath) / filename
+
+
+def reflink(src: Path, dest: Path) -> None:
+    if fcntl is None:
+        raise OSError("reflinks are not supported on this platform")
+    with open(src, "rb") as s, open(dest, "wb") as d:
+        fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+
+
+def transfer(src: Path, dest: Path, link: str = "copy") -> str:
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    # Never write through an existing file: it may be a hardlink to the source
+    dest.unlink(missing_ok=True)
+
+    if link in ("auto", "reflink"):
+        try:
+            reflink(src, dest)
+            shutil.copystat(src, dest)
+            return "linked"
+        except OSError:
+            dest.unlink(missing_ok=True)
+
+    if link in ("auto", "hardlink"):
+        try:
+            os.link(src, dest)
+            return "linked"
+        except OSError:
+            pass
+
+    shutil.copy2(src, dest)
+    return "copied"
+
+
+def sync_static(
+    src_dir: Path,
+    dest_dir: Path,
+    manifest: Manifest,
+    exclude: Set[Path] = frozenset(),
+    link: str = "copy",
+    workers: int = 8,
+) -> SyncStats:
+    stats = SyncStats()
+    seen: set[str] = set()
+    transfers: list[tuple[Path, Path, str, dict[str, str | int]]] = []
+
+    for path in iter_files(src_dir):
+        rel = str(path.relative_to(src_dir))
+        dest_path = dest_dir / rel
+        if dest_path in exclude:
+            continue
+
+        seen.add(rel)
+        stat = path.stat()
+        entry = manifest.static.get(rel)
+        if (
+            entry is not None
+            and entry["size"] == stat.st_size
+            and entry["mtime_ns"] == stat.st_mtime_ns
+            and dest_path.exists()
+        ):
+            stats.skipped += 1
+            continue
+
+        # The stat changed, but a touched or re-saved file may still be equal
+        new_entry = {
+            "hash": hash_file(path),
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+        }
+        if (
+            entry is not None
+            and entry["hash"] == new_entry["hash"]
+            and dest_path.exists()
+        ):
+            manifest.static[rel] = new_entry
+            stats.skipped += 1
+            continue
+
+        transfers.append((path, dest_path, rel, new_entry))
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        methods = executor.map(lambda t: transfer(t[0], t[1], link), transfers)
+        for (_, _, rel, new_entry), method in zip(transfers, methods):
+            manifest.static[rel] = new_entry
+            if method == "linked":
+                stats.linked += 1
+            else:
+                stats.copied += 1
+
+    # Pages are written while this runs, so directories they go to are kept
+    # even when empty: one may be created for a page not written yet
+    page_dirs = {path.parent for path in exclude}
+    for rel in list(manifest.static):
+        if rel in seen:
+            continue
+        del manifest.static[rel]
+        dest_path = dest_dir / rel
+        if dest_path not in exclude:
+            remove_output(dest_path, dest_dir, page_dirs)
+        stats.removed += 1
+
+    return stats
@@ -0,0 +1,78 @@
+import re
+from collections.abc import Callable, Mapping
+from pathlib import Path
+
+from htmlnode import Write
+
+PLACEHOLDER_PATTERN = re.compile(r"\{\{\s*(\w+)\s*\}\}")
+URL_ATTRIBUTES = ("href", "src")
+# Stands in for the basepath when one render serves several basepaths; a
+# noncharacter, so it never occurs in real content
+BASEPATH_PLACEHOLDER = "\ufdd0/"
+
+
+def rebase_url(url: str, basepath: str) -> str:
+    if basepath == "/" or not url.startswith("/"):
+        return url
+    return basepath + url[1:]
+
+
+def rebase_placeholder(text: str, basepath: str) -> str:
+    return text.replace(BASEPATH_PLACEHOLDER, basepath)
+
+
+def rebase_literal(text: str, basepath: str) -> str:
+    if basepath == "/":
+        return text
+    for attribute in URL_ATTRIBUTES:
+        text = text.replace(f'{attribute}="/', f'{attribute}="{basepath}')
+    return text
+
+
+class Template:
+    def __init__(self, source: str, basepath: str = "/", name: str = "<string>"):
+        self.name = name
+        self.basepath = basepath
+        self.literals: list[str] = []
+        self.slots: list[tuple[str, str]] = []
+
+        position = 0
+        for match in PLACEHOLDER_PATTERN.finditer(source):
+            literal = source[position : match.start()]
+            self.literals.append(rebase_literal(literal, basepath))
+            self.slots.append((match.group(1), match.group(0)))
+            position = match.end()
+        self.literals.append(rebase_literal(source[position:], basepath))
+
+    @classmethod
+    def load(cls, path: Path, basepath: str = "/") -> "Template":
+        with open(path, "r") as f:
+            return cls(f.read(), basepath, str(path))
+
+    @property
+    def placeholders(self) -> set[str]:
+        return {name for name, _ in self.slots}
+
+    def render(self, values: Mapping[str, str]) -> str:
+        parts = [self.literals[0]]
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            parts.append(values.get(name, raw))
+            parts.append(literal)
+        return "".join(parts)
+
+    def write(
+        self,
+        write: Write,
+        values: Mapping[str, str | Callable[[Write], None]],
+    ) -> None:
+        write(self.literals[0])
+        for (name, raw), literal in zip(self.slots, self.literals[1:]):
+            value = values.get(name, raw)
+            if callable(value):
+                value(write)
+            else:
+                write(value)
+            write(literal)
+
+    def __repr__(self) -> str:
+        return f'Template("{self.name}", "{self.basepath}", {self.slots})'
@@ -0,0 +1,52 @@
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+from pathlib import Path
+
+from bench import SHAPES, STAGES, bench_shape, compare, generate_site
+from bench_links import link_dense_paragraph
+from bench_links import run as run_links
+from template import Template
+
+
+class TestBench(unittest.TestCase):
+    def test_generate_site(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            for shape in SHAPES:
+                paths = generate_site(Path(tmp) / shape, shape, 1)
+                self.assertTrue(paths)
+                self.assertTrue(
+                    all(path.read_text().startswith("# ") for path in paths)
+                )
+
+    def test_bench_shape(self) -> None:
+        result = bench_shape("small", 1, 1, Template("{{ Title }}{{ Content }}"))
+        self.assertEqual(result["pages"], 20)
+        self.assertEqual(set(result["stages"]), set(STAGES))
+
+    def test_compare(self) -> None:
+        baseline = {
+            "shapes": {"small": {"pages": 1, "stages": {"read": 1.0}, "total": 1.0}}
+        }
+        faster = {
+            "shapes": {"small": {"pages": 1, "stages": {"read": 0.5}, "total": 0.5}}
+        }
+        slower = {
+            "shapes": {"small": {"pages": 1, "stages": {"read": 2.0}, "total": 2.0}}
+        }
+        with redirect_stdout(StringIO()):
+            self.assertFalse(compare(faster, baseline, 1.1, 0.0))
+            self.assertTrue(compare(slower, baseline, 1.1, 0.0))
+            self.assertFalse(compare(slower, baseline, 1.1, 5.0))
+
+    def test_link_dense_paragraph(self) -> None:
+        text = link_dense_paragraph(3)
+        self.assertEqual(text.count("](/pages/"), 3)
+        results = run_links([10, 20], 1)
+        self.assertEqual(set(results), {"split", "scan"})
+        self.assertEqual([row["links"] for row in results["split"]["rows"]], [10, 20])
+
+
+if __name__ == "__main__":
+    unittest.main()
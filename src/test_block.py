@@ -1,8 +1,15 @@
 import unittest
 from unittest import TestCase
 
-from block import BlockType, block_to_block_type, markdown_to_blocks
-from utils import extract_title, markdown_to_html_node
+from block import (
+    BlockType,
+    block_to_block_type,
+    iter_blocks,
+    iter_typed_blocks,
+    markdown_to_blocks,
+    markdown_to_typed_blocks,
+)
+from utils import extract_title, markdown_to_html_node, write_markdown_html
 
 
 class TestBlock(TestCase):
@@ -18,6 +25,23 @@ class TestBlock(TestCase):
             ],
         )
 
+    def test_iter_blocks_matches_split_for_any_chunking(self) -> None:
+        markdown = "# Title\n\n\nA paragraph\nover lines\n\n\n\n- a\n- b\n \n\nend\n"
+        expected = [
+            block.strip() for block in markdown.split("\n\n") if block.strip() != ""
+        ]
+        for size in range(1, len(markdown) + 1):
+            chunks = [markdown[i : i + size] for i in range(0, len(markdown), size)]
+            self.assertEqual(list(iter_blocks(chunks)), expected, size)
+
+    def test_write_markdown_html(self) -> None:
+        markdown = "# heading\n\nSome **bold** [link](/a)\n\n- one\n- _two_"
+        parts: list[str] = []
+        write_markdown_html(iter_typed_blocks([markdown]), parts.append, "/site/")
+        self.assertEqual(
+            "".join(parts), markdown_to_html_node(markdown, "/site/").to_html()
+        )
+
     def test_block_to_block_type(self) -> None:
         block = "# This is a heading"
         self.assertEqual(block_to_block_type(block), BlockType.HEADING)
@@ -55,6 +79,21 @@ class TestBlock(TestCase):
         block = "This is a paragraph of text. It has some **bold** and *italic* words inside of it."
         self.assertEqual(block_to_block_type(block), BlockType.PARAGRAPH)
 
+    def test_typed_blocks(self) -> None:
+        markdown = "# Title\n\n- a\n- b\n\n1. one\n3. three\n\n> quote"
+        blocks = markdown_to_typed_blocks(markdown)
+        self.assertEqual(
+            [block.block_type for block in blocks],
+            [
+                BlockType.HEADING,
+                BlockType.UNORDERED_LIST,
+                BlockType.PARAGRAPH,
+                BlockType.QUOTE,
+            ],
+        )
+        self.assertEqual(blocks[1].lines, ["- a", "- b"])
+        self.assertEqual([block.text for block in blocks], markdown_to_blocks(markdown))
+
     def test_markdown_to_html_node(self) -> None:
         markdown = "# heading\n\nParagraph with **bold** and *italic*\n\n* A list item\n* Another list item\n\n*Not a list item\n\n1. A first list item\n2. A second list item\n\n3. Not a list item\n\n```A code block```\n\n>A quote line\n>an other quote line\n\n\n\n"
         nodes = markdown_to_html_node(markdown)
@@ -0,0 +1,97 @@
+import tempfile
+import unittest
+from pathlib import Path
+from urllib.parse import urlparse
+
+from cache import BlockCache, block_key
+from inline import scan_inline
+from manifest import Manifest
+from sitetest import SiteTestCase
+from template import Template
+from utils import PageTask, render_page, text_to_textnodes
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestBlockCache(unittest.TestCase):
+    def test_lru_eviction(self) -> None:
+        cache = BlockCache(2)
+        cache.put("a", ("<p>a</p>", [], ""))
+        cache.put("b", ("<p>b</p>", [], ""))
+        self.assertEqual(cache.get("a"), ("<p>a</p>", [], ""))
+        cache.put("c", ("<p>c</p>", [], ""))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("c"), ("<p>c</p>", [], ""))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(
+            (cache.stats.hits, cache.stats.misses, cache.stats.evictions), (2, 1, 1)
+        )
+
+    def test_key_depends_on_basepath_and_parser(self) -> None:
+        key = block_key("[a](/b)", "/", text_to_textnodes)
+        self.assertEqual(key, block_key("[a](/b)", "/", text_to_textnodes))
+        self.assertNotEqual(key, block_key("[a](/b)", "/docs/", text_to_textnodes))
+        self.assertNotEqual(key, block_key("[a](/b)", "/", scan_inline))
+
+    def test_save_and_load(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / ".cache" / "blocks.json"
+            cache = BlockCache()
+            cache.put("a", ("<p>a</p>", [], ""))
+            cache.put("b", ("<p>b</p>", [], ""))
+            cache.save(path)
+
+            loaded = BlockCache.load(path, 1)
+            self.assertEqual(
+                list(loaded.entries.items()), [("b", ("<p>b</p>", [], ""))]
+            )
+            self.assertEqual(len(BlockCache.load(Path(tmp) / "missing.json")), 0)
+
+
+class TestCachedBuild(SiteTestCase):
+    template_text = TEMPLATE
+    basepath = "/prefix/"
+
+    def setUp(self) -> None:
+        super().setUp()
+        shared = "Shared [link](/blog) and **bold**\n\n- one\n- two"
+        for i in range(6):
+            (self.content / f"page{i}.md").write_text(f"# Page {i}\n\n{shared}")
+
+    def build(self, name: str, jobs: int = 1, cache: BlockCache | None = None):
+        self.generate(Manifest(self.root / f"{name}.json"), jobs=jobs, cache=cache)
+        return {p: p.read_bytes() for p in self.docs.rglob("*.html")}
+
+    def test_cached_output_matches_uncached(self) -> None:
+        uncached = self.build("uncached")
+        cache = BlockCache()
+        self.assertEqual(self.build("cached", cache=cache), uncached)
+        # Every page shares all blocks but its heading
+        self.assertEqual((cache.stats.hits, cache.stats.misses), (10, 8))
+
+    def test_parallel_workers_merge_cache(self) -> None:
+        uncached = self.build("uncached")
+        cache = BlockCache()
+        self.assertEqual(self.build("parallel", jobs=3, cache=cache), uncached)
+        self.assertEqual(cache.stats.hits + cache.stats.misses, 18)
+        self.assertEqual(len(cache), 8)
+
+    def test_streamed_pages_are_not_cached(self) -> None:
+        path = self.content / "page0.md"
+        task = PageTask(
+            path,
+            self.template,
+            self.docs / "page0.html",
+            urlparse("/prefix/"),
+            Template(TEMPLATE, "/prefix/"),
+            text_to_textnodes,
+            "hash",
+        )
+        cache = BlockCache()
+        self.assertIsNone(render_page(task, cache).error)
+        self.assertEqual(len(cache), 0)
+        self.assertIn("<b>bold</b>", (self.docs / "page0.html").read_text())
+
+
+if __name__ == "__main__":
+    unittest.main()
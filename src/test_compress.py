@@ -0,0 +1,91 @@
+import gzip
+import os
+import unittest
+
+from compress import compress_outputs, minify_css, minify_html
+from sitetest import SiteTestCase
+from static import sync_static
+
+
+class TestMinify(unittest.TestCase):
+    def test_minify_html_keeps_code(self) -> None:
+        html = (
+            "<html>\n    <body>\n        <p>Hello   <b>big</b>\n"
+            "        world</p>\n<pre><code>a\n    b</code></pre>  "
+            "<code>x  y</code>\n</body>\n</html>\n"
+        )
+        self.assertEqual(
+            minify_html(html),
+            "<html>\n<body>\n<p>Hello <b>big</b>\nworld</p>\n"
+            "<pre><code>a\n    b</code></pre> <code>x  y</code>\n</body>\n</html>",
+        )
+
+    def test_minify_css(self) -> None:
+        css = (
+            '/* theme */\nbody {\n    font-family: "Segoe  UI", sans-serif;\n'
+            "    margin: 0 auto;\n}\n\nul > li,\ndiv :hover {\n    color: red;\n}\n"
+        )
+        self.assertEqual(
+            minify_css(css),
+            'body{font-family:"Segoe  UI",sans-serif;margin:0 auto}'
+            "ul>li,div :hover{color:red}",
+        )
+
+
+class TestCompressOutputs(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.docs.mkdir()
+        self.css = "body {\n    color: red;\n}\n" * 20
+        (self.static / "index.css").write_text(self.css)
+        (self.static / "a.png").write_bytes(b"png")
+        self.page = self.docs / "index.html"
+        self.page.write_text("<p>\n    Hello\n</p>\n" * 20)
+
+    def test_compress_and_skip_unchanged(self) -> None:
+        sync_static(self.static, self.docs, self.manifest, link="hardlink")
+        stats = compress_outputs(self.docs, self.manifest, minify=True)
+        self.assertEqual((stats.minified, stats.compressed), (2, 2))
+        self.assertFalse((self.docs / "a.png.gz").exists())
+        gz = self.docs / "index.css.gz"
+        self.assertEqual(gzip.decompress(gz.read_bytes()), b"body{color:red}" * 20)
+        # The hardlinked static source is replaced, never written through
+        self.assertEqual((self.static / "index.css").read_text(), self.css)
+
+        stats = compress_outputs(self.docs, self.manifest, minify=True)
+        self.assertEqual((stats.compressed, stats.skipped), (0, 2))
+
+        # Rewritten with the same content: hashed again but not compressed
+        before = gz.stat().st_mtime_ns
+        self.page.write_text("<p>\n    Hello\n</p>\n" * 20)
+        stats = compress_outputs(self.docs, self.manifest, minify=True)
+        self.assertEqual((stats.minified, stats.compressed), (1, 0))
+        self.assertEqual(gz.stat().st_mtime_ns, before)
+
+        self.page.write_text("<p>Changed</p>" * 20)
+        stats = compress_outputs(self.docs, self.manifest)
+        self.assertEqual((stats.minified, stats.compressed), (0, 1))
+        self.assertEqual(
+            gzip.decompress((self.docs / "index.html.gz").read_bytes()),
+            b"<p>Changed</p>" * 20,
+        )
+
+        os.unlink(self.page)
+        stats = compress_outputs(self.docs, self.manifest)
+        self.assertGreaterEqual(stats.removed, 1)
+        self.assertFalse((self.docs / "index.html.gz").exists())
+        self.assertNotIn("index.html", self.manifest.outputs)
+
+    def test_static_archives_are_kept(self) -> None:
+        (self.static / "downloads").mkdir()
+        archive = self.static / "downloads" / "data.tar.gz"
+        archive.write_bytes(gzip.compress(b"data"))
+        for _ in range(2):
+            sync_static(self.static, self.docs, self.manifest)
+            stats = compress_outputs(self.docs, self.manifest, minify=True)
+            self.assertEqual(stats.removed, 0)
+            self.assertTrue((self.docs / "downloads" / "data.tar.gz").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from pathlib import Path
+
+from deps import DependencyGraph, output_targets, page_output
+from sitetest import SiteTestCase
+
+
+class TestDeps(SiteTestCase):
+    template_text = "{{ Content }}"
+    basepath = "https://x.org/"
+    relative = True
+
+    def test_output_targets(self) -> None:
+        self.assertEqual(output_targets("index.html"), ["index.html", "."])
+        self.assertEqual(output_targets("blog/index.html"), ["blog/index.html", "blog"])
+        self.assertEqual(output_targets("about.html"), ["about.html", "about"])
+        self.assertEqual(output_targets("a.png"), ["a.png"])
+        self.assertEqual(
+            page_output("content/blog/post.md", "content"), "blog/post.html"
+        )
+
+    def test_affected_across_builds(self) -> None:
+        content, template, docs = self.content, self.template, self.docs
+        (content / "blog").mkdir()
+        (content / "index.md").write_text("# Home\n\n[post](/blog/post) [new](/new)")
+        (content / "blog" / "post.md").write_text(
+            "# Post\n\n![a](../images/a.png) [css](/site.css) [home](https://x.org/)"
+        )
+        Path("layout.html").write_text("<main>{{ Content }}</main>")
+        (content / "about.md").write_text("---\ntemplate: layout.html\n---\n# About")
+
+        manifest = self.manifest
+        graph = DependencyGraph(Path("deps.json"))
+        self.generate()
+        self.assertEqual(graph.sync(manifest, docs, template), 3)
+        graph.save()
+
+        graph = DependencyGraph.load(Path("deps.json"))
+        self.assertTrue(graph.exists())
+        affected = graph.affected(
+            ["content/blog/post.md", "static/images/a.png", "static/site.css"],
+            "content",
+            "static",
+        )
+        self.assertEqual(affected.rebuild, {"content/blog/post.md"})
+        self.assertEqual(affected.recheck, {"content/index.md"})
+
+        # Links to pages that do not exist yet are tracked too
+        affected = graph.affected(["content/new.md"], "content", "static")
+        self.assertEqual(affected.recheck, {"content/index.md"})
+
+        affected = graph.affected(["template.html"], "content", "static")
+        self.assertEqual(len(affected.rebuild), 3)
+        affected = graph.affected(["layout.html"], "content", "static")
+        self.assertEqual(affected.rebuild, {"content/about.md"})
+
+        (content / "index.md").write_text("# Home\n\nNo links")
+        (content / "about.md").unlink()
+        self.generate()
+        self.assertEqual(graph.sync(manifest, docs, template), 2)
+        affected = graph.affected(["content/blog/post.md"], "content", "static")
+        self.assertEqual(affected.recheck, set())
+        self.assertNotIn("blog/post", graph.dependents)
+        self.assertEqual(graph.layout_dependents, {})
+        affected = graph.affected(["layout.html"], "content", "static")
+        self.assertEqual(affected.rebuild, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
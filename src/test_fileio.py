@@ -0,0 +1,113 @@
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+from fileio import OutputWriter, ordered_map, read_page_source, read_source
+from manifest import hash_file
+from sitetest import SiteTestCase
+from template import Template
+from utils import PageTask, render_page, text_to_textnodes
+
+
+class TestFileIO(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+
+    def test_ordered_map_is_ordered_and_bounded(self) -> None:
+        lock = threading.Lock()
+        running = peak = 0
+
+        def work(i: int) -> int:
+            nonlocal running, peak
+            with lock:
+                running += 1
+                peak = max(peak, running)
+            with lock:
+                running -= 1
+            return i * i
+
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(ordered_map(executor, work, range(50), 3))
+        self.assertEqual(results, [i * i for i in range(50)])
+        self.assertLessEqual(peak, 3)
+
+    def test_read_source(self) -> None:
+        path = self.root / "page.md"
+        path.write_bytes(b"# Title\r\n\r\nText")
+        source = read_source(path)
+        self.assertEqual(source.hash, hash_file(path))
+        self.assertEqual(source.text, "# Title\n\nText")
+
+        large = read_source(path, limit=4)
+        self.assertEqual(large.hash, source.hash)
+        self.assertIsNone(large.text)
+
+        missing = read_page_source(self.root / "missing.md")
+        self.assertIn("FileNotFoundError", missing.error or "")
+
+    def test_output_writer_creates_directories(self) -> None:
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            writer = OutputWriter(executor, 1)
+            futures = [
+                writer.submit(self.root / "a" / "b" / f"{i}.html", str(i))
+                for i in range(5)
+            ]
+            for future in futures:
+                self.assertGreaterEqual(future.result(), 0)
+        self.assertEqual((self.root / "a" / "b" / "4.html").read_text(), "4")
+
+    def test_streamed_and_prefetched_pages_match(self) -> None:
+        source = self.root / "page.md"
+        source.write_text("# Title\n\n- **one**\n- [two](/two)")
+        template = Template("<title>{{ Title }}</title>{{ Content }}", "/site/")
+        args = (source, self.root / "t.html")
+        basepath = urlparse("/site/")
+
+        streamed = PageTask(
+            *args,
+            self.root / "out" / "page.html",
+            basepath,
+            template,
+            text_to_textnodes,
+            "hash",
+        )
+        self.assertIsNone(render_page(streamed).html)
+
+        prefetched = PageTask(
+            *args,
+            self.root / "page.html",
+            basepath,
+            template,
+            text_to_textnodes,
+            "hash",
+            source.read_text(),
+        )
+        result = render_page(prefetched)
+        self.assertEqual(result.html, (self.root / "out" / "page.html").read_text())
+
+    def test_build_logs_pages_in_order(self) -> None:
+        (self.content / "b").mkdir()
+        for name in ("z.md", "a.md", "b/m.md"):
+            (self.content / name).write_text(f"# {name}\n\nText")
+
+        with self.assertLogs("utils", "DEBUG") as logs:
+            self.generate(jobs=3)
+        self.assertEqual(
+            [line.rsplit(" ", 1)[1] for line in logs.output],
+            [str(self.content / name) for name in ("a.md", "b/m.md", "z.md")],
+        )
+
+    def test_unreadable_page_fails_alone(self) -> None:
+        (self.content / "good.md").write_text("# Good")
+        (self.content / "bad.md").write_bytes(b"# Bad \xff\xfe")
+
+        stats = self.generate()
+        self.assertEqual(stats.rebuilt, 1)
+        self.assertEqual([path for path, _ in stats.errors], [self.content / "bad.md"])
+        self.assertIn("UnicodeDecodeError", stats.errors[0][1])
+        self.assertTrue((self.docs / "good.html").exists())
+        self.assertFalse((self.docs / "bad.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
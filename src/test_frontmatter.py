@@ -0,0 +1,99 @@
+import io
+import unittest
+
+from frontmatter import FrontMatter, read_front_matter, split_front_matter
+from sitetest import SiteTestCase
+from utils import BuildStats, extract_title
+
+
+class TestFrontMatter(unittest.TestCase):
+    def test_yaml(self) -> None:
+        front, body = split_front_matter(
+            "---\ntitle: 'Hello: world'\ndate: 2024-03-01\ndraft: yes\n"
+            "# a comment\ntags:\n  - one\n  - two\n---\n# Heading\n"
+        )
+        self.assertEqual(
+            front,
+            FrontMatter("Hello: world", "2024-03-01", True, None, ("one", "two")),
+        )
+        self.assertEqual(body, "# Heading\n")
+        self.assertEqual(front.timestamp, 1709251200.0)
+
+    def test_toml(self) -> None:
+        front, body = split_front_matter(
+            '+++\ntitle = "T"\ndate = 2024-03-01T12:00:00Z\n'
+            'template = "post.html"\ntags = ["a", "b"]\n+++\nBody'
+        )
+        self.assertEqual(front.template, "post.html")
+        self.assertEqual(front.tags, ("a", "b"))
+        self.assertEqual(front.date, "2024-03-01T12:00:00+00:00")
+        self.assertEqual(body, "Body")
+
+    def test_without_front_matter(self) -> None:
+        self.assertEqual(split_front_matter("# Title"), (FrontMatter(), "# Title"))
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ntitle: open\n\n# Title")
+        with self.assertRaises(ValueError):
+            split_front_matter("---\ndate: soon\n---\n")
+
+    def test_read_stops_at_body(self) -> None:
+        f = io.StringIO("---\ntags: [x, y]\n---\n# Title\n\nBody")
+        self.assertEqual(read_front_matter(f).tags, ("x", "y"))
+        self.assertEqual(f.read(), "# Title\n\nBody")
+        f = io.StringIO("# Title")
+        self.assertEqual(read_front_matter(f), FrontMatter())
+        self.assertEqual(f.read(), "# Title")
+
+    def test_extract_title(self) -> None:
+        self.assertEqual(extract_title("---\ntitle: Front\n---\n# Heading"), "Front")
+        # A comment in the front matter is not mistaken for a heading
+        self.assertEqual(extract_title("---\n# note\n---\n\ntext\n\n# Late"), "Late")
+        with self.assertRaises(Exception):
+            extract_title("no heading\n\nat all")
+
+
+class TestFrontMatterBuild(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.layout = self.root / "post.html"
+        self.layout.write_text("<h2>{{ Title }}</h2>{{ Content }}")
+
+    def build(self, drafts: bool = False) -> BuildStats:
+        return self.generate(drafts=drafts)
+
+    def test_drafts_and_layouts(self) -> None:
+        (self.content / "post.md").write_text(
+            "---\ntitle: Post\ntemplate: post.html\ndate: 2024-01-02\n---\nText"
+        )
+        (self.content / "draft.md").write_text("---\ndraft: true\n---\n# Draft")
+        stats = self.build()
+        self.assertEqual((stats.rebuilt, stats.drafts), (1, 1))
+        self.assertEqual(
+            (self.docs / "post.html").read_text(), "<h2>Post</h2><div><p>Text</p></div>"
+        )
+        self.assertFalse((self.docs / "draft.html").exists())
+        entry = self.manifest.pages[str(self.content / "post.md")]
+        self.assertEqual(entry["date"], 1704153600.0)
+
+        stats = self.build(drafts=True)
+        self.assertEqual((stats.rebuilt, stats.skipped), (1, 1))
+        self.assertTrue((self.docs / "draft.html").exists())
+
+        # Dropping --drafts again removes the draft that was built
+        stats = self.build()
+        self.assertEqual((stats.removed, stats.drafts), (1, 1))
+        self.assertFalse((self.docs / "draft.html").exists())
+
+        self.layout.write_text("<h3>{{ Title }}</h3>{{ Content }}")
+        stats = self.build()
+        self.assertEqual(stats.rebuilt, 1)
+        self.assertIn("<h3>Post</h3>", (self.docs / "post.html").read_text())
+
+        self.layout.unlink()
+        stats = self.build()
+        self.assertEqual(len(stats.errors), 1)
+        self.assertFalse((self.docs / "post.html").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
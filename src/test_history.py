@@ -0,0 +1,66 @@
+import os
+import shutil
+import unittest
+from unittest import mock
+
+from history import commit_times, git
+from sitetest import SiteTestCase
+
+COMMIT_TIME = 1_700_000_000
+
+
+@unittest.skipIf(shutil.which("git") is None, "git is not installed")
+class TestHistory(SiteTestCase):
+    def commit(self, *paths: str) -> None:
+        git(self.root, "add", *paths)
+        env = {
+            "GIT_AUTHOR_NAME": "a",
+            "GIT_AUTHOR_EMAIL": "a@example.com",
+            "GIT_COMMITTER_NAME": "a",
+            "GIT_COMMITTER_EMAIL": "a@example.com",
+            "GIT_COMMITTER_DATE": f"{COMMIT_TIME} +0000",
+        }
+        with mock.patch.dict(os.environ, env):
+            git(self.root, "commit", "-q", "-m", "content")
+
+    def test_commit_times(self) -> None:
+        self.assertEqual(commit_times(self.content), {})
+
+        git(self.root, "init", "-q")
+        (self.content / "blog").mkdir()
+        (self.content / "index.md").write_text("# Home")
+        (self.content / "blog" / "post é.md").write_text("# Post")
+        self.commit("content")
+        (self.content / "draft.md").write_text("# Draft")
+        self.assertEqual(
+            commit_times(self.content),
+            {
+                self.content / "index.md": COMMIT_TIME,
+                self.content / "blog" / "post é.md": COMMIT_TIME,
+            },
+        )
+
+        # Edited sources fall back to their mtime until committed
+        (self.content / "index.md").write_text("# Edited")
+        self.assertNotIn(self.content / "index.md", commit_times(self.content))
+
+    def test_committed_pages_take_the_commit_time(self) -> None:
+        (self.content / "index.md").write_text("# Home")
+        os.utime(self.content / "index.md", (1_600_000_000, 1_600_000_000))
+        self.generate()
+        entry = self.manifest.pages[str(self.content / "index.md")]
+        self.assertEqual(entry["mtime"], 1_600_000_000)
+
+        # The output is kept, but the new date reaches listings and sitemap
+        times = {self.content / "index.md": float(COMMIT_TIME)}
+        stats = self.generate(times=times)
+        self.assertEqual((stats.rebuilt, stats.skipped), (0, 1))
+        self.assertEqual(stats.changed, {str(self.content / "index.md")})
+        self.assertEqual(entry["mtime"], COMMIT_TIME)
+
+        stats = self.generate(times=times)
+        self.assertEqual(stats.changed, set())
+
+
+if __name__ == "__main__":
+    unittest.main()
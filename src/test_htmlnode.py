@@ -1,3 +1,4 @@
+import io
 import unittest
 
 from htmlnode import HTMLNode, LeafNode, ParentNode
@@ -76,3 +77,33 @@ class TestHTMLNode(unittest.TestCase):
         with self.assertRaises(ValueError):
             node = ParentNode(tag=None, children=None)
             node.to_html()
+
+    def test_write(self) -> None:
+        node = ParentNode(
+            "ul",
+            [
+                ParentNode("li", [LeafNode("b", "Bold"), LeafNode(None, " text")]),
+                LeafNode("li", "item", {"class": "last"}),
+            ],
+        )
+        expected = '<ul><li><b>Bold</b> text</li><li class="last">item</li></ul>'
+
+        parts: list[str] = []
+        node.write(parts.append)
+        self.assertEqual("".join(parts), expected)
+
+        buffer = io.StringIO()
+        node.write(buffer.write)
+        self.assertEqual(buffer.getvalue(), expected)
+        self.assertEqual(node.to_html(), expected)
+
+        with self.assertRaises(NotImplementedError):
+            HTMLNode("tag", "value").write(parts.append)
+
+    def test_nodes_are_slotted(self) -> None:
+        leaf = LeafNode("b", "Bold")
+        parent = ParentNode("p", [leaf])
+        self.assertFalse(hasattr(leaf, "__dict__"))
+        self.assertFalse(hasattr(parent, "__dict__"))
+        with self.assertRaises(AttributeError):
+            leaf.extra = "value"  # type: ignore[attr-defined]
@@ -0,0 +1,155 @@
+import struct
+import unittest
+import zlib
+
+import images
+from cache import BlockCache
+from images import ImageInfo, ImageTable, image_size, process_images
+from manifest import Manifest
+from sitetest import SiteTestCase
+
+
+def png_bytes(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    rows = b"".join(b"\x00" + b"\x80\x40\x20" * width for _ in range(height))
+
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        crc = zlib.crc32(kind + data)
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", crc)
+
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", ihdr)
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+class TestImages(SiteTestCase):
+    template_text = "{{ Content }}"
+
+    def setUp(self) -> None:
+        super().setUp()
+        (self.static / "images").mkdir()
+        self.docs.mkdir()
+
+    def test_image_size(self) -> None:
+        png = self.root / "a.png"
+        png.write_bytes(png_bytes(3, 2))
+        gif = self.root / "a.gif"
+        gif.write_bytes(b"GIF89a" + struct.pack("<HH", 5, 4) + b"\x00" * 16)
+        jpeg = self.root / "a.jpg"
+        app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + b"\x00" * 9
+        sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, 600, 800, 3)
+        jpeg.write_bytes(b"\xff\xd8" + app0 + sof + b"\x00" * 8)
+        text = self.root / "a.txt"
+        text.write_text("not an image")
+
+        self.assertEqual(image_size(png), (3, 2))
+        self.assertEqual(image_size(gif), (5, 4))
+        self.assertEqual(image_size(jpeg), (800, 600))
+        self.assertIsNone(image_size(text))
+
+        # Truncated headers are left alone rather than failing the build
+        jpeg.write_bytes(b"\xff\xd8" + app0 + sof[:6])
+        self.assertIsNone(image_size(jpeg))
+        png.write_bytes(png_bytes(3, 2)[:18])
+        self.assertIsNone(image_size(png))
+
+    def test_table_props(self) -> None:
+        table = ImageTable(
+            {"images/a.png": ImageInfo(1200, 800, (("images/a-480w.webp", 480),))}
+        )
+        self.assertEqual(
+            table.props("/images/a.png", "/site/"),
+            {
+                "width": "1200",
+                "height": "800",
+                "srcset": "/site/images/a-480w.webp 480w",
+            },
+        )
+        self.assertEqual(table.props("images/a.png"), {})
+        self.assertNotEqual(table.key, ImageTable().key)
+
+    def test_pages_get_dimensions(self) -> None:
+        (self.static / "images" / "a.png").write_bytes(png_bytes(3, 2))
+        (self.content / "index.md").write_text("# Home\n\n![a](/images/a.png)")
+
+        table, stats = process_images(
+            self.static, self.docs, self.manifest, self.root / "cache"
+        )
+        self.assertEqual(stats.processed, 1)
+        for cache in (None, BlockCache()):
+            self.generate(
+                Manifest(self.root / f"{cache is None}.json"), cache=cache, images=table
+            )
+            html = (self.docs / "index.html").read_text()
+            self.assertIn('width="3" height="2"', html)
+
+        table, stats = process_images(
+            self.static, self.docs, self.manifest, self.root / "cache"
+        )
+        self.assertEqual((stats.processed, stats.skipped), (0, 1))
+
+        # Installing or removing Pillow reprocesses images for their variants
+        entry = self.manifest.images["images/a.png"]
+        entry["pillow"] = not entry["pillow"]
+        table, stats = process_images(
+            self.static, self.docs, self.manifest, self.root / "cache"
+        )
+        self.assertEqual(stats.processed, 1)
+
+    def test_changed_images_rebuild_their_pages(self) -> None:
+        (self.static / "images" / "a.png").write_bytes(png_bytes(3, 2))
+        (self.static / "images" / "b.png").write_bytes(png_bytes(3, 2))
+        (self.content / "blog").mkdir()
+        (self.content / "blog" / "a.md").write_text("# A\n\n![a](/images/a.png)")
+        (self.content / "b.md").write_text("# B\n\n![b](/images/b.png)")
+        (self.content / "c.md").write_text("# C\n\nNo images")
+
+        cache_dir = self.root / "cache"
+        table = process_images(self.static, self.docs, self.manifest, cache_dir)[0]
+        stats = self.generate(images=table)
+        self.assertEqual(stats.rebuilt, 3)
+
+        # Only the page showing the resized image is rendered again
+        (self.static / "images" / "a.png").write_bytes(png_bytes(5, 4))
+        table = process_images(self.static, self.docs, self.manifest, cache_dir)[0]
+        stats = self.generate(images=table)
+        self.assertEqual((stats.rebuilt, stats.skipped), (1, 2))
+        html = (self.docs / "blog" / "a.html").read_text()
+        self.assertIn('width="5" height="4"', html)
+
+        (self.static / "images" / "b.png").unlink()
+        table = process_images(self.static, self.docs, self.manifest, cache_dir)[0]
+        stats = self.generate(images=table)
+        self.assertEqual((stats.rebuilt, stats.skipped), (1, 2))
+        self.assertNotIn("width", (self.docs / "b.html").read_text())
+
+    @unittest.skipIf(images.pillow() is None, "Pillow is not installed")
+    def test_variants_are_cached(self) -> None:
+        (self.static / "images" / "a.png").write_bytes(png_bytes(600, 300))
+        cache_dir = self.root / "cache"
+        table, stats = process_images(self.static, self.docs, self.manifest, cache_dir)
+        self.assertEqual(stats.encoded, 2)
+        info = table.images["images/a.png"]
+        self.assertEqual([width for _, width in info.variants], [480, 600])
+        for path, _ in info.variants:
+            self.assertTrue((self.docs / path).exists())
+
+        # A fresh build reuses the encoded variants from the cache
+        (self.docs / info.variants[0][0]).unlink()
+        table, stats = process_images(
+            self.static, self.docs, Manifest(self.root / "other.json"), cache_dir
+        )
+        self.assertEqual((stats.processed, stats.encoded), (1, 0))
+        self.assertTrue((self.docs / info.variants[0][0]).exists())
+
+        (self.static / "images" / "a.png").unlink()
+        table, stats = process_images(self.static, self.docs, self.manifest, cache_dir)
+        self.assertEqual(stats.removed, 2)
+        self.assertEqual(list(self.docs.rglob("*.webp")), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import unittest
+
+from inline import scan_inline
+from textnode import TextNode, TextType
+from utils import text_to_textnodes
+
+
+class TestInline(unittest.TestCase):
+    def test_matches_split_parser(self) -> None:
+        texts = [
+            "",
+            "plain text",
+            "**bold**",
+            "This is **text** with an _italic_ word and a `code block` and an ![obi wan image](https://i.imgur.com/fJRm4Vk.jpeg) and a [link](https://boot.dev)",
+            "snake_case and a single ` backtick",
+            "![a](b)![c](d)[e](f)",
+            "[not a link] and [a link](/blog/tom)",
+            "![broken](image and a [link](/contact)",
+            "empty `` code",
+            "Disney _didn't ruin it_ (okay, but Amazon might have)",
+            "**a _b_ c**",
+            "_a **b** c_ and **`x` _y_**",
+            "**bold with [a link](/x) inside** and _[b](/y)_",
+            "a**b**c**d and a_b_c_d",
+            "**unclosed _italic** and `code_with_underscores`",
+            "**![img](/a.png)** ![b_c](/d_e.png)",
+            "[a_b](/x_y_z) and `**not bold**`",
+            "*** ____ ``` **",
+            "[a](b) ![](c)[](d)! [e] (f)",
+        ]
+        for text in texts:
+            self.assertEqual(scan_inline(text), text_to_textnodes(text), text)
+
+    def test_scan_inline(self) -> None:
+        self.assertEqual(
+            scan_inline("a [b](c) ![d](e) **f**"),
+            [
+                TextNode("a ", TextType.TEXT),
+                TextNode("b", TextType.LINK, "c"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("d", TextType.IMAGE, "e"),
+                TextNode(" ", TextType.TEXT),
+                TextNode("f", TextType.BOLD),
+            ],
+        )
+
+    def test_nested_delimiters(self) -> None:
+        # Inner spans take the inner type, as the split parser nests them
+        self.assertEqual(
+            scan_inline("**a _b_ c**"),
+            [
+                TextNode("a ", TextType.BOLD),
+                TextNode("b", TextType.ITALIC),
+                TextNode(" c", TextType.BOLD),
+            ],
+        )
+
+    def test_unmatched_tokens_stay_literal(self) -> None:
+        text = "[" * 20000 + "_" * 3 + "`"
+        nodes = scan_inline(text)
+        self.assertEqual(
+            nodes,
+            [
+                TextNode("[" * 20000, TextType.TEXT),
+                TextNode("", TextType.ITALIC),
+                TextNode("`", TextType.TEXT),
+            ],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+
+from cache import BlockCache
+from htmlnode import LeafNode, ParentNode
+from links import check_links, check_refs, collect_refs, site_path
+from manifest import Manifest
+from sections import write_sections
+from sitemap import write_sitemap
+from sitetest import SiteTestCase
+from static import sync_static
+from template import Template
+
+
+class TestLinks(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+    basepath = "https://example.com/site/"
+
+    def test_collect_refs(self) -> None:
+        node = ParentNode(
+            "p",
+            [
+                LeafNode("a", "home", {"href": "/"}),
+                LeafNode("img", "", {"src": "/a.png", "alt": "a"}),
+                LeafNode("b", "bold"),
+                LeafNode("a", "no target"),
+            ],
+        )
+        refs: list[str] = []
+        collect_refs(node, refs)
+        self.assertEqual(refs, ["/", "/a.png"])
+
+    def test_site_path(self) -> None:
+        self.assertEqual(site_path("/blog/tom", "", "/"), "blog/tom")
+        self.assertEqual(site_path("/", "blog", "/"), ".")
+        self.assertEqual(site_path("../a.png?x=1#top", "blog/tom", "/"), "blog/a.png")
+        self.assertEqual(
+            site_path("https://x.org/site/a%20b", "", "https://x.org/site/"), "a b"
+        )
+        self.assertIsNone(site_path("https://example.com/", "", "/"))
+        self.assertIsNone(site_path("//example.com/", "", "/"))
+        self.assertIsNone(site_path("mailto:a@example.com", "", "/"))
+        self.assertIsNone(site_path("#top", "blog", "/"))
+        self.assertEqual(site_path("/elsewhere", "", "/site/"), "/elsewhere")
+
+    def test_check_refs(self) -> None:
+        index = {"index.html", "blog/tom/index.html", "about.html", "images/a.png"}
+        pages = [
+            ("index.md", "", ["/", "/blog/tom/", "/about", "/images/a.png"]),
+            ("blog/tom.md", "blog/tom", ["../../images/a.png", "missing.png"]),
+            ("other.md", "", ["/nope", "/nope"]),
+        ]
+        report = check_refs(pages, index, "/")
+        self.assertEqual(report.checked, 8)
+        self.assertEqual(
+            report.dangling,
+            [
+                ("blog/tom.md", "missing.png"),
+                ("other.md", "/nope"),
+                ("other.md", "/nope"),
+            ],
+        )
+
+    def test_check_links_across_incremental_builds(self) -> None:
+        (self.content / "blog").mkdir()
+        (self.static / "images").mkdir()
+        (self.static / "images" / "a.png").write_bytes(b"png")
+        (self.content / "index.md").write_text(
+            "# Home\n\n[post](/blog/post) ![a](/images/a.png) [gone](/gone)"
+        )
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[home](/)")
+
+        for cache in (None, BlockCache()):
+            manifest = Manifest(self.root / "manifest.json")
+            self.generate(manifest, cache=cache)
+            sync_static(self.static, self.docs, manifest)
+            report = check_links(manifest, self.docs)
+            self.assertEqual(report.checked, 4)
+            self.assertEqual(
+                report.dangling,
+                [(str(self.content / "index.md"), "https://example.com/site/gone")],
+            )
+
+        # Unchanged pages keep the references recorded when last rendered
+        (self.content / "blog" / "post.md").unlink()
+        self.generate(manifest)
+        report = check_links(manifest, self.docs)
+        self.assertEqual(len(report.dangling), 2)
+
+    def test_generated_listings_are_link_targets(self) -> None:
+        (self.content / "blog").mkdir()
+        (self.content / "index.md").write_text(
+            "# Home\n\n[blog](/blog/) [feed](/blog/atom.xml) [map](/sitemap.xml)"
+        )
+        (self.content / "blog" / "post.md").write_text("# Post")
+
+        stats = self.generate()
+        write_sections(
+            self.content,
+            self.docs,
+            self.basepath,
+            Template.load(self.template, self.basepath),
+            self.manifest,
+            stats.changed,
+        )
+        write_sitemap(self.docs, self.basepath, self.manifest, stats.changed)
+        report = check_links(self.manifest, self.docs)
+        self.assertEqual((report.checked, report.dangling), (3, []))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,172 @@
+import unittest
+from urllib.parse import urlparse
+
+from manifest import Manifest, hash_file
+from sitetest import SiteTestCase
+from static import sync_static
+from utils import OutputTarget, build_pages, discover_pages
+
+TEMPLATE = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+
+class TestManifest(SiteTestCase):
+    template_text = TEMPLATE
+
+    def setUp(self) -> None:
+        super().setUp()
+        self.docs.mkdir()
+        (self.content / "index.md").write_text("# Home\n\nHello")
+        (self.content / "blog").mkdir()
+        (self.content / "blog" / "post.md").write_text("# Post\n\nWorld")
+
+    def build(self, manifest: Manifest, basepath: str = "/"):
+        return self.generate(manifest, basepath)
+
+    def test_save_and_load(self) -> None:
+        path = self.root / ".cache" / "manifest.json"
+        manifest = Manifest(path)
+        self.assertFalse(manifest.exists())
+        manifest.basepath = "/"
+        manifest.template = "abc"
+        manifest.static["images/a.png"] = {"hash": "def", "size": 3, "mtime_ns": 1}
+        manifest.save()
+
+        loaded = Manifest.load(path)
+        self.assertTrue(loaded.exists())
+        self.assertEqual(loaded.basepath, "/")
+        self.assertEqual(loaded.template, "abc")
+        self.assertEqual(
+            loaded.static, {"images/a.png": {"hash": "def", "size": 3, "mtime_ns": 1}}
+        )
+
+    def test_hash_file(self) -> None:
+        path = self.content / "index.md"
+        before = hash_file(path)
+        self.assertEqual(before, hash_file(path))
+        path.write_text("# Home\n\nChanged")
+        self.assertNotEqual(before, hash_file(path))
+
+    def test_incremental_build(self) -> None:
+        manifest = Manifest(self.root / "manifest.json")
+        stats = self.build(manifest)
+        self.assertEqual((stats.rebuilt, stats.skipped, stats.removed), (2, 0, 0))
+        self.assertTrue((self.docs / "blog" / "post.html").exists())
+
+        stats = self.build(manifest)
+        self.assertEqual((stats.rebuilt, stats.skipped, stats.removed), (0, 2, 0))
+
+        (self.content / "index.md").write_text("# Home\n\nChanged")
+        stats = self.build(manifest)
+        self.assertEqual((stats.rebuilt, stats.skipped, stats.removed), (1, 1, 0))
+        self.assertIn("Changed", (self.docs / "index.html").read_text())
+
+    def test_template_and_basepath_changes_rebuild_everything(self) -> None:
+        manifest = Manifest(self.root / "manifest.json")
+        self.build(manifest)
+
+        self.template.write_text(TEMPLATE + "\n")
+        stats = self.build(manifest)
+        self.assertEqual(stats.rebuilt, 2)
+
+        stats = self.build(manifest, "/prefix/")
+        self.assertEqual(stats.rebuilt, 2)
+
+    def test_removed_source_deletes_output(self) -> None:
+        manifest = Manifest(self.root / "manifest.json")
+        self.build(manifest)
+
+        (self.content / "blog" / "post.md").unlink()
+        stats = self.build(manifest)
+        self.assertEqual((stats.rebuilt, stats.skipped, stats.removed), (0, 1, 1))
+        self.assertFalse((self.docs / "blog").exists())
+
+    def test_parallel_build_matches_serial(self) -> None:
+        for i in range(8):
+            (self.content / f"page{i}.md").write_text(f"# Page {i}\n\n**bold** {i}")
+
+        self.build(Manifest(self.root / "serial.json"))
+        serial = {p: p.read_bytes() for p in self.docs.rglob("*.html")}
+
+        stats = self.generate(Manifest(self.root / "parallel.json"), jobs=4)
+        self.assertEqual(stats.rebuilt, 10)
+        parallel = {p: p.read_bytes() for p in self.docs.rglob("*.html")}
+        self.assertEqual(serial, parallel)
+
+    def test_targets_share_one_render(self) -> None:
+        (self.content / "index.md").write_text(
+            "# Home\n\n[post](/blog/post) ![a](/a.png)"
+        )
+        self.template.write_text('<link href="/a.css">' + TEMPLATE)
+        expected = {}
+        for basepath in ("/", "https://example.com/site/"):
+            self.build(Manifest(self.root / "single.json"), basepath)
+            expected[basepath] = {
+                p.relative_to(self.docs): p.read_bytes()
+                for p in self.docs.rglob("*.html")
+            }
+
+        other = OutputTarget(
+            self.root / "other", "https://example.com/site/", Manifest(self.root / "o")
+        )
+        manifest = Manifest(self.root / "manifest.json")
+
+        def build() -> tuple[int, int]:
+            stats = build_pages(
+                discover_pages(self.content, self.docs),
+                self.template,
+                self.docs,
+                urlparse("/"),
+                manifest,
+                targets=[other],
+            )
+            return stats.rebuilt, stats.skipped
+
+        self.assertEqual(build(), (2, 0))
+        for root, basepath in ((self.docs, "/"), (other.dest_root, other.basepath)):
+            outputs = {
+                p.relative_to(root): p.read_bytes() for p in root.rglob("*.html")
+            }
+            self.assertEqual(outputs, expected[basepath])
+        self.assertEqual(
+            other.manifest.pages[str(self.content / "index.md")]["refs"],
+            ["https://example.com/site/blog/post", "https://example.com/site/a.png"],
+        )
+
+        self.assertEqual(build(), (0, 2))
+        # A page missing from any target is rendered again for all of them
+        (other.dest_root / "blog" / "post.html").unlink()
+        self.assertEqual(build(), (1, 1))
+        self.assertTrue((other.dest_root / "blog" / "post.html").exists())
+
+    def test_errors_are_collected_per_page(self) -> None:
+        (self.content / "broken.md").write_text("No title here")
+        manifest = Manifest(self.root / "manifest.json")
+        stats = self.build(manifest)
+        self.assertEqual(stats.rebuilt, 2)
+        self.assertEqual(len(stats.errors), 1)
+        self.assertEqual(stats.errors[0][0], self.content / "broken.md")
+        self.assertFalse((self.docs / "broken.html").exists())
+        self.assertNotIn(str(self.content / "broken.md"), manifest.pages)
+
+    def test_sync_static(self) -> None:
+        (self.static / "images").mkdir(parents=True)
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "index.html").write_text("<html></html>")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+        manifest = Manifest(self.root / "manifest.json")
+
+        excluded = {self.docs / "index.html"}
+        stats = sync_static(self.static, self.docs, manifest, excluded)
+        self.assertEqual((stats.copied, stats.skipped, stats.removed), (2, 0, 0))
+        self.assertFalse((self.docs / "index.html").exists())
+
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        (self.static / "images" / "a.png").unlink()
+        stats = sync_static(self.static, self.docs, manifest, excluded)
+        self.assertEqual((stats.copied, stats.skipped, stats.removed), (1, 0, 1))
+        self.assertEqual((self.docs / "index.css").read_text(), "body { margin: 0 }")
+        self.assertFalse((self.docs / "images").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
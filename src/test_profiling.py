@@ -0,0 +1,60 @@
+import time
+import unittest
+
+from profiling import STAGES, BuildProfile, StageProfile
+from sitetest import SiteTestCase
+
+
+class TestProfiling(SiteTestCase):
+    def test_nested_stages_are_not_double_counted(self) -> None:
+        profile = StageProfile("page")
+        with profile.stage("render"):
+            time.sleep(0.01)
+            with profile.stage("write"):
+                time.sleep(0.02)
+
+        self.assertGreaterEqual(profile.seconds["write"], 0.02)
+        self.assertGreaterEqual(profile.seconds["render"], 0.01)
+        self.assertLess(profile.seconds["render"], 0.02)
+        self.assertIsNone(profile.current)
+
+    def test_wrappers(self) -> None:
+        profile = StageProfile("page")
+        parts: list[str] = []
+        profile.wrap_write(parts.append)("text")
+        self.assertEqual(parts, ["text"])
+        self.assertEqual(list(profile.wrap_iter("read", ["a", "b"])), ["a", "b"])
+        self.assertGreater(profile.seconds["write"], 0)
+        self.assertGreater(profile.seconds["read"], 0)
+
+    def test_merge(self) -> None:
+        profile = StageProfile("build")
+        for _ in range(2):
+            other = StageProfile("static")
+            with other.stage("static"):
+                time.sleep(0.01)
+            profile.merge(other)
+        self.assertGreaterEqual(profile.seconds["static"], 0.02)
+        self.assertIsNone(profile.current)
+
+    def test_build_profile(self) -> None:
+        (self.content / "fast.md").write_text("# Fast\n\nHi")
+        (self.content / "slow.md").write_text("# Slow\n\n" + "- **item**\n" * 2000)
+        profile = BuildProfile()
+        self.generate(profile=profile)
+
+        self.assertEqual(len(profile.pages), 2)
+        seconds, _ = profile.stage_totals()
+        self.assertEqual(set(seconds), set(STAGES))
+        self.assertGreater(seconds["parse"], 0)
+        self.assertGreater(seconds["render"], 0)
+
+        report = profile.report(top=1)
+        self.assertIn("Stage breakdown:", report)
+        self.assertIn("Slowest 1 of 2 pages:", report)
+        self.assertIn("slow.md", report)
+        self.assertNotIn("fast.md", report)
+
+
+if __name__ == "__main__":
+    unittest.main()
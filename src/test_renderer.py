@@ -0,0 +1,45 @@
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from renderer import Renderer
+from template import Template
+from utils import render_markdown_page
+
+TEMPLATE = '<title>{{ Title }}</title><a href="/">home</a>{{ Content }}'
+
+
+def page(i: int) -> str:
+    return f"# Page {i}\n\nSome *text* for [page](/p/{i}).\n\n- shared\n- list\n"
+
+
+class TestRenderer(unittest.TestCase):
+    def test_render_matches_page(self) -> None:
+        renderer = Renderer(TEMPLATE, "/site/")
+        expected = render_markdown_page(page(1), Template(TEMPLATE, "/site/"), "/site/")
+        self.assertEqual(renderer.render(page(1)), expected)
+        self.assertIn('href="/site/p/1"', expected)
+        self.assertEqual(list(renderer.render_many([page(1), page(1)])), [expected] * 2)
+
+    def test_cache_is_reused(self) -> None:
+        renderer = Renderer(TEMPLATE, inline="scan")
+        assert renderer.cache is not None
+        renderer.render(page(1))
+        misses = renderer.cache.stats.misses
+        renderer.render(page(2))
+        # Only the heading and paragraph differ, the list comes from the cache
+        self.assertEqual(renderer.cache.stats.misses - misses, 2)
+        self.assertIsNone(Renderer(TEMPLATE, cache_entries=0).cache)
+        with self.assertRaises(ValueError):
+            Renderer(TEMPLATE, inline="regex")
+
+    def test_threads_share_one_renderer(self) -> None:
+        # A small cache keeps evicting while the threads render
+        renderer = Renderer(TEMPLATE, cache_entries=8)
+        pages = [page(i % 40) for i in range(400)]
+        expected = [Renderer(TEMPLATE, cache_entries=0).render(p) for p in pages]
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            self.assertEqual(list(executor.map(renderer.render, pages)), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+import json
+import unittest
+
+from cache import BlockCache
+from htmlnode import LeafNode, ParentNode
+from manifest import Manifest
+from search import (
+    DOCS_FILE,
+    SearchIndex,
+    collect_text,
+    count_terms,
+    decode_shard,
+    encode_shard,
+)
+from sitetest import SiteTestCase
+
+
+class TestSearch(SiteTestCase):
+    template_text = "{{ Title }}{{ Content }}"
+    basepath = "/site/"
+
+    def setUp(self) -> None:
+        super().setUp()
+        (self.content / "blog").mkdir()
+        (self.content / "index.md").write_text(
+            "# Home\n\nThe **shire** and ![a ring](/r.png)"
+        )
+        (self.content / "blog" / "post.md").write_text(
+            "# Post\n\n- shire\n- river\n\n```code```"
+        )
+
+    def build(self, manifest: Manifest, search: SearchIndex, cache=None) -> int:
+        self.generate(manifest, cache=cache, search=search)
+        return search.write(self.docs / "search")
+
+    def shard(self, key: str) -> dict[str, dict[int, int]]:
+        with open(self.docs / "search" / f"{key}.json") as f:
+            return decode_shard(json.load(f))
+
+    def test_collect_text_and_terms(self) -> None:
+        node = ParentNode(
+            "blockquote",
+            [
+                LeafNode(None, "Fly, you"),
+                LeafNode(None, "<br />"),
+                LeafNode("img", "", {"src": "/a.png", "alt": "Fools"}),
+                LeafNode("b", "fools!"),
+            ],
+        )
+        parts: list[str] = []
+        collect_text(node, parts)
+        self.assertEqual(parts, ["Fly, you", "Fools", "fools!"])
+        self.assertEqual(count_terms(parts), {"fly": 1, "you": 1, "fools": 2})
+
+    def test_shard_round_trip(self) -> None:
+        postings = {"river": {3: 1}, "ring": {0: 2, 7: 1}, "rings": {7: 3}}
+        entries = encode_shard(postings)
+        self.assertEqual(
+            entries,
+            [[0, "ring", [0, 2, 7, 1]], [4, "s", [7, 3]], [2, "ver", [3, 1]]],
+        )
+        self.assertEqual(decode_shard(entries), postings)
+
+    def test_index_built_from_render(self) -> None:
+        for cache in (None, BlockCache()):
+            search = SearchIndex(self.root / f"search-{cache is None}.json")
+            self.build(
+                Manifest(self.root / f"manifest-{cache is None}.json"), search, cache
+            )
+            with open(self.docs / "search" / DOCS_FILE) as f:
+                docs = json.load(f)
+            self.assertEqual(
+                docs, [["/site/blog/post.html", "Post"], ["/site/", "Home"]]
+            )
+            self.assertEqual(self.shard("s"), {"shire": {0: 1, 1: 1}})
+            self.assertEqual(self.shard("r"), {"ring": {1: 1}, "river": {0: 1}})
+            self.assertIn("code", self.shard("c"))
+
+    def test_incremental_update(self) -> None:
+        manifest = Manifest(self.root / "manifest.json")
+        search = SearchIndex(self.root / "search.json")
+        self.build(manifest, search)
+        search.save()
+        before = (self.docs / "search" / "s.json").stat().st_mtime_ns
+
+        search = SearchIndex.load(self.root / "search.json")
+        self.assertTrue(search.exists())
+        (self.content / "blog" / "post.md").write_text("# Post\n\n- shire\n- road")
+        self.assertEqual(self.build(manifest, search), 1)
+        self.assertEqual(self.shard("r"), {"ring": {1: 1}, "road": {0: 1}})
+        self.assertEqual((self.docs / "search" / "s.json").stat().st_mtime_ns, before)
+
+        (self.content / "blog" / "post.md").unlink()
+        self.build(manifest, search)
+        self.assertEqual(self.shard("s"), {"shire": {1: 1}})
+        self.assertFalse((self.docs / "search" / "c.json").exists())
+
+        (self.content / "new.md").write_text("# New\n\nShire")
+        self.build(manifest, search)
+        self.assertEqual(self.shard("s"), {"shire": {0: 1, 1: 1}})
+        self.assertEqual(search.docs[str(self.content / "new.md")]["id"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
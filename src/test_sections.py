@@ -0,0 +1,120 @@
+import os
+import unittest
+import xml.dom.minidom
+from pathlib import Path
+
+from cache import BlockCache
+from manifest import Manifest
+from sections import SectionStats, page_sections, section_outputs, write_sections
+from sitetest import SiteTestCase
+from template import Template
+
+
+class TestSections(SiteTestCase):
+    basepath = "https://example.com/site/"
+
+    def setUp(self) -> None:
+        super().setUp()
+        (self.content / "blog").mkdir()
+        (self.content / "index.md").write_text("# Home")
+
+    def post(self, name: str, mtime: int, summary: str = "Summary") -> Path:
+        path = self.content / "blog" / name / "index.md"
+        path.parent.mkdir(exist_ok=True)
+        path.write_text(f"# {name}\n\n{summary} of {name}.\n\nMore text.")
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def build(self, page_size: int = 2, basepath: str | None = None) -> SectionStats:
+        basepath = basepath if basepath is not None else self.basepath
+        stats = self.generate(basepath=basepath)
+        return write_sections(
+            self.content,
+            self.docs,
+            basepath,
+            Template.load(self.template, basepath),
+            self.manifest,
+            stats.changed,
+            page_size,
+        )
+
+    def test_page_sections(self) -> None:
+        self.assertEqual(page_sections("content/index.md", "content"), [])
+        self.assertEqual(page_sections("content/about.md", "content"), [""])
+        self.assertEqual(page_sections("content/a/b/index.md", "content"), ["a", ""])
+        self.assertEqual(
+            section_outputs("blog", 2, False),
+            ["blog/index.html", "blog/page/2/index.html"],
+        )
+        self.assertEqual(section_outputs("", 1, True), ["page/1/index.html"])
+
+    def test_summary_keeps_inline_spacing(self) -> None:
+        path = self.content / "blog" / "post.md"
+        path.write_text("# Post\n\nHello **world**, it is [here](/x).")
+        for cache in (None, BlockCache()):
+            manifest = Manifest(self.root / f"{cache is None}.json")
+            self.generate(manifest, basepath="/", cache=cache)
+            self.assertEqual(
+                manifest.pages[str(path)]["summary"], "Hello world, it is here."
+            )
+
+    def test_listings_and_feeds(self) -> None:
+        for i, name in enumerate(["a", "b", "c"]):
+            self.post(name, 1_700_000_000 + i)
+        stats = self.build()
+        self.assertEqual(stats.written, 2)
+
+        first = (self.docs / "blog" / "index.html").read_text()
+        self.assertIn("<title>blog</title>", first)
+        self.assertLess(first.index("/site/blog/c/"), first.index("/site/blog/b/"))
+        self.assertIn("<p>Summary of c.</p>", first)
+        self.assertIn('href="https://example.com/site/blog/page/2/" rel="next"', first)
+        second = (self.docs / "blog" / "page" / "2" / "index.html").read_text()
+        self.assertIn("/site/blog/a/", second)
+        # The home page renders to the root index, so its listing moves aside
+        self.assertTrue((self.docs / "page" / "2" / "index.html").exists())
+        feed = xml.dom.minidom.parse(str(self.docs / "blog" / "atom.xml"))
+        self.assertEqual(len(feed.getElementsByTagName("entry")), 3)
+        ids = [node.firstChild.nodeValue for node in feed.getElementsByTagName("id")]
+        self.assertEqual(ids[0], "https://example.com/site/blog/")
+        self.assertIn("https://example.com/site/blog/a/", ids)
+
+        stats = self.build()
+        self.assertEqual((stats.written, stats.skipped), (0, 2))
+
+        # An edit below the first paragraph leaves the listings as they are
+        path = self.content / "blog" / "a" / "index.md"
+        path.write_text(path.read_text() + "\n\nEven more.")
+        os.utime(path, (1_700_000_000, 1_700_000_000))
+        stats = self.build()
+        self.assertEqual((stats.written, stats.skipped), (0, 2))
+
+        self.post("b", 1_700_000_001, "Changed")
+        (self.content / "blog" / "c" / "index.md").unlink()
+        stats = self.build()
+        self.assertEqual(stats.written, 2)
+        self.assertIn("Changed of b", (self.docs / "blog" / "index.html").read_text())
+        self.assertFalse((self.docs / "blog" / "page" / "2").exists())
+
+        stats = self.build(page_size=10)
+        self.assertEqual(stats.written, 2)
+        self.assertTrue((self.docs / "page" / "1" / "index.html").exists())
+        self.assertFalse((self.docs / "page" / "2").exists())
+
+    def test_no_feeds_without_absolute_base(self) -> None:
+        self.post("a", 1_700_000_000)
+        self.build()
+        self.assertTrue((self.docs / "blog" / "atom.xml").exists())
+
+        # Atom ids must be absolute, so a relative base drops the feeds
+        stats = self.build(basepath="/site/")
+        self.assertEqual(stats.written, 2)
+        self.assertFalse((self.docs / "blog" / "atom.xml").exists())
+        self.assertFalse((self.docs / "atom.xml").exists())
+        listing = (self.docs / "blog" / "index.html").read_text()
+        self.assertIn('href="/site/blog/a/"', listing)
+        self.assertNotIn("Atom feed", listing)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import unittest
+import xml.dom.minidom
+
+from sitemap import SitemapStats, is_absolute, remove_sitemap, write_sitemap
+from sitetest import SiteTestCase
+
+BASEPATH = "https://example.com/site/"
+
+
+class TestSitemap(SiteTestCase):
+    basepath = BASEPATH
+
+    def page(self, rel: str, mtime: int) -> None:
+        path = self.content / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {rel}")
+        os.utime(path, (mtime, mtime))
+
+    def build(self, limit: int = 50_000, basepath: str = BASEPATH) -> SitemapStats:
+        stats = self.generate(basepath=basepath)
+        return write_sitemap(self.docs, basepath, self.manifest, stats.changed, limit)
+
+    def locs(self, name: str) -> list[str]:
+        doc = xml.dom.minidom.parse(str(self.docs / name))
+        return [node.firstChild.nodeValue for node in doc.getElementsByTagName("loc")]
+
+    def test_is_absolute(self) -> None:
+        self.assertTrue(is_absolute(BASEPATH))
+        self.assertFalse(is_absolute("/site/"))
+
+    def test_sitemap_and_robots(self) -> None:
+        self.page("index.md", 1_700_000_000)
+        self.page("a b/index.md", 1_700_000_001)
+        self.page("x&y.md", 1_700_000_002)
+        (self.content / "draft.md").write_text("---\ndraft: true\n---\n# Draft")
+        stats = self.build()
+        self.assertEqual((stats.urls, stats.written), (3, 1))
+
+        self.assertEqual(
+            self.locs("sitemap.xml"),
+            [
+                "https://example.com/site/a%20b/",
+                "https://example.com/site/",
+                "https://example.com/site/x%26y.html",
+            ],
+        )
+        sitemap = (self.docs / "sitemap.xml").read_text()
+        self.assertIn("<lastmod>2023-11-14T22:13:20+00:00</lastmod>", sitemap)
+        # Crawlers never look for robots.txt below a path prefix
+        self.assertFalse((self.docs / "robots.txt").exists())
+
+        stats = self.build()
+        self.assertEqual((stats.written, stats.skipped), (0, 1))
+
+        stats = self.build(basepath="https://example.com/")
+        self.assertEqual(stats.written, 2)
+        self.assertIn(
+            "Sitemap: https://example.com/sitemap.xml",
+            (self.docs / "robots.txt").read_text(),
+        )
+
+    def test_index_past_limit(self) -> None:
+        for name in "abc":
+            self.page(f"{name}.md", 1_700_000_000)
+        stats = self.build(limit=2)
+        self.assertEqual((stats.urls, stats.written), (3, 3))
+        self.assertEqual(
+            self.locs("sitemap.xml"),
+            [
+                "https://example.com/site/sitemap-1.xml",
+                "https://example.com/site/sitemap-2.xml",
+            ],
+        )
+        self.assertEqual(
+            self.locs("sitemap-2.xml"), ["https://example.com/site/c.html"]
+        )
+
+        # Only the file holding the changed page and the index are rewritten
+        (self.content / "c.md").write_text("# Changed")
+        os.utime(self.content / "c.md", (1_700_000_100, 1_700_000_100))
+        stats = self.build(limit=2)
+        self.assertEqual((stats.written, stats.skipped), (2, 1))
+
+        (self.content / "c.md").unlink()
+        stats = self.build(limit=2)
+        # Back under the limit, the sitemap is written without an index
+        self.assertEqual((stats.urls, stats.removed), (2, 2))
+        self.assertFalse((self.docs / "sitemap-1.xml").exists())
+        self.assertEqual(len(self.locs("sitemap.xml")), 2)
+
+        self.assertEqual(remove_sitemap(self.docs, self.manifest), 1)
+        self.assertFalse((self.docs / "sitemap.xml").exists())
+
+    def test_static_robots(self) -> None:
+        self.page("index.md", 1_700_000_000)
+        self.docs.mkdir()
+        (self.docs / "robots.txt").write_text("User-agent: *\nDisallow: /\n")
+        self.manifest.static["robots.txt"] = {}
+        stats = self.build(basepath="https://example.com/")
+        self.assertEqual(stats.written, 1)
+        self.assertIn("Disallow", (self.docs / "robots.txt").read_text())
+        remove_sitemap(self.docs, self.manifest)
+        self.assertTrue((self.docs / "robots.txt").exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+import os
+import unittest
+
+from sitetest import SiteTestCase
+from static import sync_static, transfer
+
+
+class TestStatic(SiteTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        (self.static / "images").mkdir()
+        (self.static / "index.css").write_text("body {}")
+        (self.static / "images" / "a.png").write_bytes(b"png")
+
+    def test_transfer_modes(self) -> None:
+        src = self.static / "index.css"
+        self.assertEqual(transfer(src, self.docs / "copy.css", "copy"), "copied")
+        self.assertNotEqual(os.stat(src).st_ino, os.stat(self.docs / "copy.css").st_ino)
+
+        self.assertEqual(transfer(src, self.docs / "link.css", "hardlink"), "linked")
+        self.assertEqual(os.stat(src).st_ino, os.stat(self.docs / "link.css").st_ino)
+
+        self.assertIn(
+            transfer(src, self.docs / "auto.css", "auto"), ("linked", "copied")
+        )
+        self.assertEqual((self.docs / "auto.css").read_text(), "body {}")
+
+    def test_transfer_never_writes_through_a_hardlink(self) -> None:
+        src = self.static / "index.css"
+        dest = self.docs / "index.css"
+        transfer(src, dest, "hardlink")
+        other = self.static / "other.css"
+        other.write_text("p {}")
+        transfer(other, dest, "copy")
+        self.assertEqual(src.read_text(), "body {}")
+        self.assertEqual(dest.read_text(), "p {}")
+
+    def test_unchanged_stat_skips_hashing(self) -> None:
+        sync_static(self.static, self.docs, self.manifest)
+
+        css = self.static / "index.css"
+        before = css.stat()
+        css.write_text("body {}")
+        os.utime(css, ns=(before.st_atime_ns, before.st_mtime_ns + 10**9))
+        stats = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual((stats.copied, stats.skipped), (0, 2))
+
+        css.write_text("body { color: red }")
+        stats = sync_static(self.static, self.docs, self.manifest, link="hardlink")
+        self.assertEqual((stats.copied, stats.linked, stats.skipped), (0, 1, 1))
+        self.assertEqual((self.docs / "index.css").read_text(), "body { color: red }")
+
+    def test_missing_output_is_restored(self) -> None:
+        sync_static(self.static, self.docs, self.manifest)
+        (self.docs / "images" / "a.png").unlink()
+        stats = sync_static(self.static, self.docs, self.manifest)
+        self.assertEqual((stats.copied, stats.skipped), (1, 1))
+        self.assertTrue((self.docs / "images" / "a.png").exists())
+
+    def test_page_directories_are_kept(self) -> None:
+        # A page output directory may be created, but not yet written to,
+        # while a static file beside it is removed
+        pages = {self.docs / "images" / "gallery.html"}
+        sync_static(self.static, self.docs, self.manifest, pages)
+        (self.static / "images" / "a.png").unlink()
+        stats = sync_static(self.static, self.docs, self.manifest, pages)
+        self.assertEqual(stats.removed, 1)
+        self.assertTrue((self.docs / "images").is_dir())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,58 @@
+import unittest
+
+from template import Template, rebase_url
+from textnode import TextNode, TextType
+from utils import markdown_to_html_node, text_node_to_html_node
+
+SOURCE = '<title>{{ Title }}</title><link href="/index.css"><main>{{Content}}</main>'
+
+
+class TestTemplate(unittest.TestCase):
+    def test_compile(self) -> None:
+        template = Template(SOURCE)
+        self.assertEqual(
+            template.literals,
+            ["<title>", '</title><link href="/index.css"><main>', "</main>"],
+        )
+        self.assertEqual(template.placeholders, {"Title", "Content"})
+
+    def test_render(self) -> None:
+        template = Template(SOURCE)
+        self.assertEqual(
+            template.render({"Title": "Hi", "Content": "<p>x</p>"}),
+            '<title>Hi</title><link href="/index.css"><main><p>x</p></main>',
+        )
+
+    def test_render_keeps_unknown_placeholders(self) -> None:
+        template = Template("<time>{{ Date }}</time>")
+        self.assertEqual(template.render({}), "<time>{{ Date }}</time>")
+        self.assertEqual(
+            template.render({"Date": "2024-01-01"}), "<time>2024-01-01</time>"
+        )
+
+    def test_basepath_only_rewrites_literals(self) -> None:
+        template = Template(SOURCE, "/blog/")
+        self.assertEqual(
+            template.render({"Title": 'href="/', "Content": 'src="/'}),
+            '<title>href="/</title><link href="/blog/index.css"><main>src="/</main>',
+        )
+
+    def test_rebase_url(self) -> None:
+        self.assertEqual(rebase_url("/images/a.png", "/"), "/images/a.png")
+        self.assertEqual(rebase_url("/images/a.png", "/site/"), "/site/images/a.png")
+        self.assertEqual(rebase_url("https://boot.dev", "/site/"), "https://boot.dev")
+
+    def test_basepath_rewrites_generated_props(self) -> None:
+        node = text_node_to_html_node(TextNode("x", TextType.LINK, "/a"), "/site/")
+        self.assertEqual(node.to_html(), '<a href="/site/a">x</a>')
+        node = text_node_to_html_node(TextNode("x", TextType.IMAGE, "/a"), "/site/")
+        self.assertEqual(node.to_html(), '<img src="/site/a" alt="x"></img>')
+
+        html = markdown_to_html_node("Go [home](/) or `href=\"/`", "/site/").to_html()
+        self.assertEqual(
+            html, '<div><p>Go <a href="/site/">home</a> or <code>href="/</code></p></div>'
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
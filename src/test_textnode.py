@@ -5,6 +5,8 @@ from utils import (
     TextType,
     extract_markdown_images,
     extract_markdown_links,
+    find_markdown_images,
+    find_markdown_links,
     split_nodes_delimiter,
     split_nodes_image,
     split_nodes_link,
@@ -28,6 +30,10 @@ class TestTextNode(unittest.TestCase):
         other = TextNode("This is a text node", TextType.ITALIC, "This is a url")
         self.assertNotEqual(node, other)
 
+    def test_slots(self) -> None:
+        node = TextNode("This is a text node", TextType.BOLD)
+        self.assertFalse(hasattr(node, "__dict__"))
+
     def test_repr(self) -> None:
         node = TextNode("This is a text node", TextType.BOLD)
         self.assertEqual(
@@ -175,6 +181,29 @@ class TestTextNode(unittest.TestCase):
             ],
         )
 
+    def test_find_markdown_matches(self) -> None:
+        text = "See [a](/a) and ![b](/b.png)"
+        links = find_markdown_links(text)
+        self.assertEqual(
+            [(m.start, m.end, m.text, m.url) for m in links],
+            [(4, 11, "a", "/a"), (17, 28, "b", "/b.png")],
+        )
+        images = find_markdown_images(text)
+        self.assertEqual([(m.start, m.end) for m in images], [(16, 28)])
+        self.assertEqual(text[images[0].start : images[0].end], "![b](/b.png)")
+
+    def test_split_nodes_repeated_link(self) -> None:
+        node = TextNode("[a](/a) and [a](/a) again", TextType.TEXT)
+        self.assertEqual(
+            [repr(n) for n in split_nodes_link([node])],
+            [
+                'TextNode("a", TextType.LINK, "/a")',
+                'TextNode(" and ", TextType.TEXT, None)',
+                'TextNode("a", TextType.LINK, "/a")',
+                'TextNode(" again", TextType.TEXT, None)',
+            ],
+        )
+
     def test_split_nodes_image(self) -> None:
         node = TextNode(
             "This is text with a ![rick roll](https://i.imgur.com/aKaOqIh.gif) and ![obi wan](https://i.imgur.com/fJRm4Vk.jpeg)",
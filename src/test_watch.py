@@ -0,0 +1,183 @@
+import tempfile
+import threading
+import unittest
+import urllib.request
+from pathlib import Path
+from urllib.parse import urlparse
+
+from deps import DependencyGraph
+from images import process_images
+from server import LIVERELOAD_SCRIPT, Reloader, inject_livereload, serve
+from sitetest import SiteTestCase
+from static import sync_static
+from test_images import png_bytes
+from utils import text_to_textnodes
+from watch import Watcher, diff, scan
+
+
+class TestWatch(SiteTestCase):
+    template_text = "<title>{{ Title }}</title><body>{{ Content }}</body>"
+
+    def setUp(self) -> None:
+        super().setUp()
+        (self.content / "blog").mkdir()
+        (self.content / "index.md").write_text("# Home\n\nHello")
+        (self.content / "blog" / "post.md").write_text("# Post\n\nWorld")
+        (self.static / "index.css").write_text("body {}")
+
+        self.generate()
+        sync_static(self.static, self.docs, self.manifest)
+        self.changes = 0
+        self.watcher = Watcher(
+            self.content,
+            self.static,
+            self.template,
+            self.docs,
+            urlparse("/"),
+            self.manifest,
+            text_to_textnodes,
+            on_change=self.count_change,
+        )
+
+    def count_change(self) -> None:
+        self.changes += 1
+
+    def test_scan_and_diff(self) -> None:
+        before = scan(self.content)
+        (self.content / "index.md").write_text("# Home\n\nChanged text")
+        (self.content / "blog" / "post.md").unlink()
+        changed, removed = diff(before, scan(self.content))
+        self.assertEqual(changed, [self.content / "index.md"])
+        self.assertEqual(removed, [self.content / "blog" / "post.md"])
+
+    def test_no_change(self) -> None:
+        self.assertFalse(self.watcher.poll())
+        self.assertEqual(self.changes, 0)
+
+    def test_changed_page_is_rebuilt_alone(self) -> None:
+        post = self.docs / "blog" / "post.html"
+        post_mtime = post.stat().st_mtime_ns
+        (self.content / "index.md").write_text("# Home\n\nChanged text")
+
+        self.assertTrue(self.watcher.poll())
+        self.assertIn("Changed text", (self.docs / "index.html").read_text())
+        self.assertEqual(post.stat().st_mtime_ns, post_mtime)
+        self.assertEqual(self.changes, 1)
+
+    def test_new_and_removed_pages(self) -> None:
+        (self.content / "blog" / "post.md").unlink()
+        (self.content / "new.md").write_text("# New\n\nPage")
+        self.watcher.poll()
+        self.assertFalse((self.docs / "blog").exists())
+        self.assertTrue((self.docs / "new.html").exists())
+        self.assertIn(str(self.content / "new.md"), self.manifest.pages)
+
+    def test_template_change_rebuilds_everything(self) -> None:
+        self.template.write_text("<h1>{{ Title }}</h1>{{ Content }}")
+        self.watcher.poll()
+        self.assertTrue((self.docs / "index.html").read_text().startswith("<h1>Home"))
+        self.assertTrue(
+            (self.docs / "blog" / "post.html").read_text().startswith("<h1>Post")
+        )
+
+    def test_static_change(self) -> None:
+        (self.static / "index.css").write_text("body { margin: 0 }")
+        (self.static / "new.css").write_text("p {}")
+        self.watcher.poll()
+        self.assertEqual((self.docs / "index.css").read_text(), "body { margin: 0 }")
+        self.assertTrue((self.docs / "new.css").exists())
+
+        (self.static / "new.css").unlink()
+        self.watcher.poll()
+        self.assertFalse((self.docs / "new.css").exists())
+
+    def test_layout_change_rebuilds_its_pages(self) -> None:
+        layout = self.root / "post.html"
+        layout.write_text("<article>{{ Content }}</article>")
+        (self.content / "blog" / "post.md").write_text(
+            "---\ntemplate: post.html\n---\n# Post\n\nWorld"
+        )
+        self.watcher.poll()
+        post = self.docs / "blog" / "post.html"
+        self.assertTrue(post.read_text().startswith("<article>"))
+        self.assertFalse(self.watcher.poll())
+
+        index_mtime = (self.docs / "index.html").stat().st_mtime_ns
+        layout.write_text("<section>{{ Content }}</section>")
+        self.assertTrue(self.watcher.poll())
+        self.assertTrue(post.read_text().startswith("<section>"))
+        self.assertEqual((self.docs / "index.html").stat().st_mtime_ns, index_mtime)
+
+    def test_failed_page_loses_its_output(self) -> None:
+        (self.content / "index.md").write_text("No title")
+        self.watcher.poll()
+        self.assertFalse((self.docs / "index.html").exists())
+        self.assertNotIn(str(self.content / "index.md"), self.manifest.pages)
+
+    def test_images_minify_and_deps(self) -> None:
+        (self.static / "images").mkdir()
+        (self.static / "images" / "a.png").write_bytes(png_bytes(3, 2))
+        (self.content / "index.md").write_text("# Home\n\n![a](/images/a.png)")
+        cache_dir = self.root / "images"
+        images = process_images(self.static, self.docs, self.manifest, cache_dir)[0]
+        self.generate(images=images)
+        sync_static(self.static, self.docs, self.manifest)
+        deps_path = self.root / "deps.json"
+        watcher = Watcher(
+            self.content,
+            self.static,
+            self.template,
+            self.docs,
+            urlparse("/"),
+            self.manifest,
+            text_to_textnodes,
+            images=images,
+            image_cache_dir=cache_dir,
+            minify=True,
+            deps_path=deps_path,
+        )
+
+        # The page showing the image is rendered again with its new size
+        (self.static / "images" / "a.png").write_bytes(png_bytes(5, 4))
+        watcher.poll()
+        self.assertIn('width="5" height="4"', (self.docs / "index.html").read_text())
+        self.assertTrue((self.docs / "index.html.gz").exists())
+
+        (self.content / "blog" / "post.md").write_text("# Post\n\n[home](/)")
+        watcher.poll()
+        graph = DependencyGraph.load(deps_path)
+        self.assertIn(str(self.content / "blog" / "post.md"), graph.dependents["."])
+
+
+class TestServer(unittest.TestCase):
+    def test_inject_livereload(self) -> None:
+        self.assertEqual(
+            inject_livereload(b"<body>x</body>"),
+            b"<body>x" + LIVERELOAD_SCRIPT + b"</body>",
+        )
+        self.assertEqual(inject_livereload(b"x"), b"x" + LIVERELOAD_SCRIPT)
+
+    def test_reloader(self) -> None:
+        reloader = Reloader()
+        self.assertEqual(reloader.wait(0, 0.01), 0)
+        threading.Timer(0.01, reloader.notify).start()
+        self.assertEqual(reloader.wait(0, 5), 1)
+
+    def test_serve(self) -> None:
+        with tempfile.TemporaryDirectory() as tmp:
+            (Path(tmp) / "index.html").write_text("<body>Hi</body>")
+            (Path(tmp) / "index.css").write_text("body {}")
+            server = serve(Path(tmp), 0, Reloader())
+            try:
+                url = f"http://localhost:{server.server_address[1]}"
+                with urllib.request.urlopen(f"{url}/") as response:
+                    self.assertIn(LIVERELOAD_SCRIPT, response.read())
+                with urllib.request.urlopen(f"{url}/index.css") as response:
+                    self.assertEqual(response.read(), b"body {}")
+            finally:
+                server.shutdown()
+                server.server_close()
+
+
+if __name__ == "__main__":
+    unittest.main()
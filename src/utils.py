@@ -1,14 +1,58 @@
+import logging
+import os
 import re
-from collections.abc import Sequence
+import sys
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator, Mapping, Sequence
+from contextlib import AbstractContextManager, nullcontext
+from dataclasses import dataclass, field
+from functools import partial
 from pathlib import Path
-from urllib.parse import ParseResult
-
-from block import BlockType, block_to_block_type, markdown_to_blocks
-from htmlnode import LeafNode, ParentNode
+from typing import TYPE_CHECKING, TextIO
+from urllib.parse import ParseResult, urlparse
+
+from block import (
+    BLOCK_SEPARATOR,
+    Block,
+    BlockType,
+    iter_typed_blocks,
+    markdown_to_typed_blocks,
+    read_chunks,
+)
+from cache import BlockCache, CachedBlock, CacheStats, block_key
+from frontmatter import (
+    FrontMatter,
+    load_front_matter,
+    read_front_matter,
+    scan_front_matter,
+    split_front_matter,
+)
+from htmlnode import HTMLNode, LeafNode, ParentNode, Write
+from images import ImageTable
+from inline import scan_inline
+from links import collect_refs, site_path
+from log import configure_logging
+from profiling import StageProfile
+from search import collect_text, count_terms
+from template import BASEPATH_PLACEHOLDER, Template, rebase_placeholder, rebase_url
 from textnode import TextNode, TextType
 
+# Rendering a page needs none of the build machinery, which is imported where
+# it is used so that the renderer loads quickly
+if TYPE_CHECKING:
+    from concurrent.futures import Future
+
+    from fileio import Source
+    from manifest import Manifest
+    from profiling import BuildProfile
+    from search import SearchIndex
+
+logger = logging.getLogger(__name__)
+
 
-def text_node_to_html_node(text_node: TextNode) -> LeafNode:
+def text_node_to_html_node(
+    text_node: TextNode, basepath: str = "/", images: ImageTable | None = None
+) -> LeafNode:
     match text_node.text_type:
         case TextType.TEXT:
             return LeafNode(tag=None, value=text_node.text)
@@ -19,13 +63,17 @@ def text_node_to_html_node(text_node: TextNode) -> LeafNode:
         case TextType.CODE:
             return LeafNode(tag="code", value=text_node.text)
         case TextType.LINK:
-            props = {"href": text_node.url} if text_node.url is not None else None
+            props = None
+            if text_node.url is not None:
+                props = {"href": rebase_url(text_node.url, basepath)}
             return LeafNode(tag="a", value=text_node.text, props=props)
         case TextType.IMAGE:
             props = {}
             if text_node.url is not None:
-                props["src"] = text_node.url
+                props["src"] = rebase_url(text_node.url, basepath)
             props["alt"] = text_node.text
+            if images is not None and text_node.url is not None:
+                props.update(images.props(text_node.url, basepath))
             return LeafNode(tag="img", value="", props=props)
         case _:
             raise Exception("Invalid text type")
@@ -52,62 +100,74 @@ def split_nodes_delimiter(
     return new_nodes
 
 
+IMAGE_PATTERN = re.compile(r"!\[([^\]]*)\]\(([^\)]*)\)")
+LINK_PATTERN = re.compile(r"\[([^\]]*)\]\(([^\)]*)\)")
+
+
+@dataclass(frozen=True, slots=True)
+class MarkdownMatch:
+    start: int
+    end: int
+    text: str
+    url: str
+
+
+def find_markdown_images(text: str) -> list[MarkdownMatch]:
+    return [
+        MarkdownMatch(m.start(), m.end(), m[1], m[2])
+        for m in IMAGE_PATTERN.finditer(text)
+    ]
+
+
+def find_markdown_links(text: str) -> list[MarkdownMatch]:
+    return [
+        MarkdownMatch(m.start(), m.end(), m[1], m[2])
+        for m in LINK_PATTERN.finditer(text)
+    ]
+
+
 def extract_markdown_images(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"!\[([^\]]*)\]\(([^\)]*)\)", text)
+    return IMAGE_PATTERN.findall(text)
 
 
 def extract_markdown_links(text: str) -> list[tuple[str, str]]:
-    return re.findall(r"\[([^\]]*)\]\(([^\)]*)\)", text)
+    return LINK_PATTERN.findall(text)
 
 
-def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+def split_nodes_matches(
+    old_nodes: list[TextNode],
+    find: Callable[[str], list[MarkdownMatch]],
+    text_type: TextType,
+) -> list[TextNode]:
     new_nodes = []
     for old_node in old_nodes:
-        images = extract_markdown_images(old_node.text)
-        if len(images) < 1:
+        matches = find(old_node.text)
+        if len(matches) < 1:
             new_nodes.append(old_node)
-        else:
-            text_so_far = old_node.text
-            for image in images:
-                alt, url = image
-                strings = text_so_far.split(f"![{alt}]({url})")
+            continue
 
-                prev_str = strings[0]
-                next_str = strings[1]
-                if len(prev_str) > 0:
-                    new_nodes.append(TextNode(prev_str, old_node.text_type))
-                new_nodes.append(TextNode(alt, TextType.IMAGE, url))
-                text_so_far = next_str
+        text = old_node.text
+        position = 0
+        for match in matches:
+            if match.start > position:
+                new_nodes.append(
+                    TextNode(text[position : match.start], old_node.text_type)
+                )
+            new_nodes.append(TextNode(match.text, text_type, match.url))
+            position = match.end
 
-            if len(text_so_far) > 0:
-                new_nodes.append(TextNode(text_so_far, old_node.text_type))
+        if position < len(text):
+            new_nodes.append(TextNode(text[position:], old_node.text_type))
 
     return new_nodes
 
 
-def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
-    new_nodes = []
-    for old_node in old_nodes:
-        links = extract_markdown_links(old_node.text)
-        if len(links) < 1:
-            new_nodes.append(old_node)
-        else:
-            text_so_far = old_node.text
-            for link in links:
-                text, url = link
-                strings = text_so_far.split(f"[{text}]({url})")
-
-                prev_str = strings[0]
-                next_str = strings[1]
-                if len(prev_str) > 0:
-                    new_nodes.append(TextNode(prev_str, old_node.text_type))
-                new_nodes.append(TextNode(text, TextType.LINK, url))
-                text_so_far = next_str
+def split_nodes_image(old_nodes: list[TextNode]) -> list[TextNode]:
+    return split_nodes_matches(old_nodes, find_markdown_images, TextType.IMAGE)
 
-            if len(text_so_far) > 0:
-                new_nodes.append(TextNode(text_so_far, old_node.text_type))
 
-    return new_nodes
+def split_nodes_link(old_nodes: list[TextNode]) -> list[TextNode]:
+    return split_nodes_matches(old_nodes, find_markdown_links, TextType.LINK)
 
 
 def text_to_textnodes(text: str) -> list[TextNode]:
@@ -121,131 +181,834 @@ def text_to_textnodes(text: str) -> list[TextNode]:
     return nodes
 
 
-def text_to_children(text: str) -> Sequence[ParentNode | LeafNode]:
-    blocks = markdown_to_blocks(text)
-
-    nodes: Sequence[ParentNode | LeafNode] = []
-
-    for block in blocks:
-        block_type = block_to_block_type(block)
-
-        match block_type:
-            case BlockType.HEADING:
-                nodes.append(LeafNode(tag="h1", value=block.lstrip("# ")))
-
-            case BlockType.PARAGRAPH:
-                text_nodes = text_to_textnodes(block)
-                children = [text_node_to_html_node(t) for t in text_nodes]
-                nodes.append(ParentNode(tag="p", children=children))
-
-            case BlockType.CODE:
-                nodes.append(LeafNode(tag="code", value=block.strip("```")))
+InlineParser = Callable[[str], list[TextNode]]
+INLINE_PARSERS: dict[str, InlineParser] = {
+    "split": text_to_textnodes,
+    "scan": scan_inline,
+}
+
+
+def block_to_html_node(
+    block: Block,
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+    images: ImageTable | None = None,
+) -> ParentNode | LeafNode:
+    block_type = block.block_type
+
+    match block_type:
+        case BlockType.HEADING:
+            return LeafNode(tag="h1", value=block.text.lstrip("# "))
+
+        case BlockType.PARAGRAPH:
+            text_nodes = parse_inline(block.text)
+            children = [text_node_to_html_node(t, basepath, images) for t in text_nodes]
+            return ParentNode(tag="p", children=children)
+
+        case BlockType.CODE:
+            return LeafNode(tag="code", value=block.text.strip("```"))
+
+        case BlockType.QUOTE:
+            lines = block.lines
+
+            if len(lines) < 2:
+                value = lines[0].lstrip(">").lstrip()
+                children = [LeafNode(tag=None, value=value)]
+            else:
+                children = []
+                for i, line in enumerate(lines):
+                    child = LeafNode(tag=None, value=line.lstrip(">").lstrip())
+                    children.append(child)
+                    if i < len(lines) - 1:
+                        children.append(LeafNode(tag=None, value="<br />"))
+
+            return ParentNode(tag="blockquote", children=children)
+
+        case BlockType.UNORDERED_LIST:
+            list_items: list[ParentNode | LeafNode] = []
+            for line in block.lines:
+                text = line[2:]
+                text_nodes = parse_inline(text)
+                children = [
+                    text_node_to_html_node(t, basepath, images) for t in text_nodes
+                ]
+                if len(children) < 2:
+                    value = children[0].value
+                    assert isinstance(value, str)
+                    list_items.append(LeafNode(tag="li", value=value))
+                else:
+                    list_items.append(ParentNode(tag="li", children=children))
+            return ParentNode(tag="ul", children=list_items)
+
+        case BlockType.ORDERED_LIST:
+            list_items: list[ParentNode | LeafNode] = []
+            for line in block.lines:
+                text = line[3:]
+                text_nodes = parse_inline(text)
+                children = [
+                    text_node_to_html_node(t, basepath, images) for t in text_nodes
+                ]
+                if len(children) < 2:
+                    value = children[0].value
+                    assert isinstance(value, str)
+                    list_items.append(LeafNode(tag="li", value=value))
+                else:
+                    list_items.append(ParentNode(tag="li", children=children))
+            return ParentNode(tag="ol", children=list_items)
 
-            case BlockType.QUOTE:
-                lines = block.split("\n")
+    raise ValueError(f"Unsupported block type: {block_type}")
 
-                if len(lines) < 2:
-                    value = lines[0].lstrip(">").lstrip()
-                    children = [LeafNode(tag=None, value=value)]
-                else:
-                    children = []
-                    for i, line in enumerate(lines):
-                        child = LeafNode(tag=None, value=line.lstrip(">").lstrip())
-                        children.append(child)
-                        if i < len(lines) - 1:
-                            children.append(LeafNode(tag=None, value="<br />"))
-
-                nodes.append(ParentNode(tag="blockquote", children=children))
-
-            case BlockType.UNORDERED_LIST:
-                lines = block.split("\n")
-                list_items: list[ParentNode | LeafNode] = []
-                for line in lines:
-                    text = line[2:]
-                    text_nodes = text_to_textnodes(text)
-                    children = [text_node_to_html_node(t) for t in text_nodes]
-                    if len(children) < 2:
-                        value = children[0].value
-                        assert isinstance(value, str)
-                        list_items.append(LeafNode(tag="li", value=value))
-                    else:
-                        list_items.append(ParentNode(tag="li", children=children))
-                nodes.append(ParentNode(tag="ul", children=list_items))
-
-            case BlockType.ORDERED_LIST:
-                lines = block.split("\n")
-
-                list_items: list[ParentNode | LeafNode] = []
-                for line in lines:
-                    text = line[3:]
-                    text_nodes = text_to_textnodes(text)
-                    children = [text_node_to_html_node(t) for t in text_nodes]
-                    if len(children) < 2:
-                        value = children[0].value
-                        assert isinstance(value, str)
-                        list_items.append(LeafNode(tag="li", value=value))
-                    else:
-                        list_items.append(ParentNode(tag="li", children=children))
-                nodes.append(ParentNode(tag="ol", children=list_items))
 
-    return nodes
+def text_to_children(
+    text: str, basepath: str = "/", parse_inline: InlineParser = text_to_textnodes
+) -> Sequence[ParentNode | LeafNode]:
+    blocks = markdown_to_typed_blocks(text)
+    return [block_to_html_node(block, basepath, parse_inline) for block in blocks]
 
 
-def markdown_to_html_node(markdown: str) -> ParentNode:
-    children_nodes = text_to_children(markdown)
+def markdown_to_html_node(
+    markdown: str, basepath: str = "/", parse_inline: InlineParser = text_to_textnodes
+) -> ParentNode:
+    children_nodes = text_to_children(markdown, basepath, parse_inline)
 
     return ParentNode(tag="div", children=children_nodes)
 
 
-def extract_title(markdown: str) -> str:
-    blocks = markdown_to_blocks(markdown)
+def iter_html_nodes(
+    blocks: Iterable[Block],
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+    images: ImageTable | None = None,
+) -> Iterator[ParentNode | LeafNode]:
+    for block in blocks:
+        yield block_to_html_node(block, basepath, parse_inline, images)
+
+
+def write_html_nodes(nodes: Iterable[ParentNode | LeafNode], write: Write) -> None:
+    write("<div>")
+    for node in nodes:
+        node.write(write)
+    write("</div>")
+
+
+SUMMARY_LENGTH = 280
+
+
+def summarize(text: str) -> str:
+    text = " ".join(text.split())
+    if len(text) <= SUMMARY_LENGTH:
+        return text
+    return text[:SUMMARY_LENGTH].rsplit(" ", 1)[0] + "…"
+
+
+@dataclass
+class PageInfo:
+    title: str | None = None
+    refs: list[str] = field(default_factory=list)
+    # Plain text for the search index, only gathered when it is being built
+    text: list[str] | None = None
+    # Text of the first paragraph, shown in section listings and feeds
+    summary: str | None = None
+
+    def collect(self, node: HTMLNode) -> None:
+        collect_refs(node, self.refs)
+        if self.text is not None:
+            collect_text(node, self.text)
+        if self.summary is None and node.tag == "p":
+            parts: list[str] = []
+            collect_text(node, parts)
+            # Inline fragments carry their own spacing, so joining them
+            # with spaces would put one before punctuation
+            self.summary = summarize("".join(parts))
+
+
+def iter_cached_html(
+    blocks: Iterable[Block],
+    cache: BlockCache,
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+    stage: Callable[[str], AbstractContextManager[None]] | None = None,
+    info: PageInfo | None = None,
+    images: ImageTable | None = None,
+) -> Iterator[str]:
+    stage = stage or skip_stage
+    for block in blocks:
+        # Only blocks that may hold an image depend on the image table
+        images_key = images.key if images is not None and "![" in block.text else ""
+        key = block_key(block.text, basepath, parse_inline, images_key)
+        cached = cache.get(key)
+        if cached is None:
+            with stage("parse"):
+                node = block_to_html_node(block, basepath, parse_inline, images)
+            block_info = PageInfo(text=[])
+            block_info.collect(node)
+            # A paragraph's text doubles as the summary, so it keeps the
+            # spacing of its inline fragments
+            paragraph = block.block_type == BlockType.PARAGRAPH
+            text = ("" if paragraph else " ").join(block_info.text)
+            with stage("render"):
+                cached = (node.to_html(), block_info.refs, text)
+            cache.put(key, cached)
+        if info is not None:
+            info.refs.extend(cached[1])
+            if info.text is not None:
+                info.text.append(cached[2])
+            if info.summary is None and block.block_type == BlockType.PARAGRAPH:
+                info.summary = summarize(cached[2])
+        yield cached[0]
+
+
+def iter_collecting_info(
+    nodes: Iterable[ParentNode | LeafNode], info: PageInfo
+) -> Iterator[ParentNode | LeafNode]:
+    for node in nodes:
+        info.collect(node)
+        yield node
+
+
+def write_markdown_html(
+    blocks: Iterable[Block],
+    write: Write,
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+) -> None:
+    write_html_nodes(iter_html_nodes(blocks, basepath, parse_inline), write)
+
+
+def find_title(blocks: Iterable[Block]) -> str:
     HEADING_PREFIX = "# "
 
     for block in blocks:
-        if block.startswith(HEADING_PREFIX):
-            return block.lstrip(HEADING_PREFIX)
+        if block.block_type == BlockType.HEADING:
+            return block.text.lstrip(HEADING_PREFIX)
 
     raise Exception("No title found in markdown")
 
 
-def generate_page(
-    from_path: Path, template_path: Path, dest_path: Path, basepath: ParseResult
-):
-    print(f"Generating page from {from_path} to {dest_path} using {template_path}")
+def extract_title(markdown: str) -> str:
+    front, markdown = split_front_matter(markdown)
+    if front.title is not None:
+        return front.title
+
+    # Walks the blocks only up to the first heading instead of splitting
+    # the whole document
+    position = 0
+    while position <= len(markdown):
+        end = markdown.find(BLOCK_SEPARATOR, position)
+        if end == -1:
+            end = len(markdown)
+        block = markdown[position:end].strip()
+        if block.startswith("# "):
+            return block.lstrip("# ")
+        position = end + len(BLOCK_SEPARATOR)
 
-    with open(from_path, "r") as f:
-        markdown = f.read()
+    raise Exception("No title found in markdown")
 
-    with open(template_path, "r") as f:
-        template = f.read()
 
-    title = extract_title(markdown)
-    html = markdown_to_html_node(markdown).to_html()
-    basepath_url = basepath.geturl()
-    result = (
-        template.replace("{{ Title }}", title)
-        .replace("{{ Content }}", html)
-        .replace('href="/', f'href="{basepath_url}')
-        .replace('src="/', f'src="{basepath_url}')
+def content_writer(
+    blocks: Iterable[Block],
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+    profile: StageProfile | None = None,
+    cache: BlockCache | None = None,
+    info: PageInfo | None = None,
+    images: ImageTable | None = None,
+) -> Callable[[Write], None]:
+    stage = profile.stage if profile is not None else skip_stage
+
+    if cache is None:
+        nodes = iter_html_nodes(blocks, basepath, parse_inline, images)
+        if profile is not None:
+            nodes = profile.wrap_iter("parse", nodes)
+        if info is not None:
+            nodes = iter_collecting_info(nodes, info)
+
+        def write_content(write: Write) -> None:
+            with stage("render"):
+                write_html_nodes(nodes, write)
+
+        return write_content
+
+    fragments = iter_cached_html(
+        blocks, cache, basepath, parse_inline, stage, info, images
     )
 
-    if not dest_path.exists():
-        dest_path.touch()
-
-    with open(dest_path, "w") as f:
-        f.write(result)
+    def write_cached_content(write: Write) -> None:
+        with stage("render"):
+            write("<div>")
+            for html in fragments:
+                write(html)
+            write("</div>")
+
+    return write_cached_content
+
+
+def render_markdown_page(
+    markdown: str,
+    template: Template,
+    basepath: str = "/",
+    parse_inline: InlineParser = text_to_textnodes,
+    profile: StageProfile | None = None,
+    cache: BlockCache | None = None,
+    info: PageInfo | None = None,
+    images: ImageTable | None = None,
+) -> str:
+    stage = profile.stage if profile is not None else skip_stage
+    with stage("parse"):
+        front, markdown = split_front_matter(markdown)
+        blocks = markdown_to_typed_blocks(markdown)
+    title = front.title if front.title is not None else find_title(blocks)
+
+    parts: list[str] = []
+    if info is not None:
+        info.title = title
+    write_content = content_writer(
+        blocks, basepath, parse_inline, profile, cache, info, images
+    )
+    with stage("template"):
+        template.write(parts.append, {"Title": title, "Content": write_content})
+    return "".join(parts)
 
 
-def generate_pages(
-    src_path: Path, template_path: Path, dest_path: Path, basepath: ParseResult
+def generate_page(
+    from_path: Path,
+    template_path: Path,
+    dest_path: Path,
+    basepath: ParseResult,
+    template: Template | None = None,
+    parse_inline: InlineParser = text_to_textnodes,
+    profile: StageProfile | None = None,
+    cache: BlockCache | None = None,
+    info: PageInfo | None = None,
+    images: ImageTable | None = None,
 ):
-    for path in src_path.iterdir():
-        if path.is_file():
-            name = path.stem
+    basepath_url = basepath.geturl()
+    if template is None:
+        template = Template.load(template_path, basepath_url)
+    stage = profile.stage if profile is not None else skip_stage
+
+    with open(from_path, "r") as f:
+        front = read_front_matter(f)
+        title = front.title
+        if title is None:
+            title = find_title(read_blocks(f, profile))
+    if info is not None:
+        info.title = title
+
+    with open(from_path, "r") as source, open(dest_path, "w") as dest:
+        read_front_matter(source)
+        blocks = read_blocks(source, profile)
+        write: Write = dest.write
+        if profile is not None:
+            write = profile.wrap_write(write)
+
+        write_content = content_writer(
+            blocks, basepath_url, parse_inline, profile, cache, info, images
+        )
+        with stage("template"):
+            template.write(write, {"Title": title, "Content": write_content})
+
+
+def skip_stage(name: str) -> AbstractContextManager[None]:
+    return nullcontext()
+
+
+def read_blocks(f: TextIO, profile: StageProfile | None = None) -> Iterator[Block]:
+    if profile is None:
+        return iter_typed_blocks(read_chunks(f))
+    chunks = profile.wrap_iter("read", read_chunks(f))
+    return profile.wrap_iter("parse", iter_typed_blocks(chunks))
+
+
+@dataclass
+class BuildStats:
+    rebuilt: int = 0
+    skipped: int = 0
+    removed: int = 0
+    drafts: int = 0
+    errors: list[tuple[Path, str]] = field(default_factory=list)
+    # Sources rendered, removed or failed, whose sections are out of date
+    changed: set[str] = field(default_factory=set)
+
+
+def discover_pages(src_path: Path, dest_path: Path) -> list[tuple[Path, Path]]:
+    pages = []
+    # DirEntry caches the file type from the directory listing, so telling
+    # files from directories costs no extra stat calls
+    with os.scandir(src_path) as it:
+        entries = sorted(it, key=lambda entry: entry.name)
+
+    for entry in entries:
+        if entry.is_file():
+            name = Path(entry.name).stem
             filename = f"{name}.html"
-            generate_page(path, template_path, dest_path / filename, basepath)
+            pages.append((Path(entry.path), dest_path / filename))
+
+        if entry.is_dir():
+            pages.extend(discover_pages(Path(entry.path), dest_path / entry.name))
+
+    return pages
+
+
+def page_url(dest_path: Path, dest_root: Path, basepath: str = "/") -> str:
+    rel = dest_path.relative_to(dest_root).as_posix()
+    if rel == "index.html" or rel.endswith("/index.html"):
+        rel = rel[: -len("index.html")]
+    return basepath + rel
+
+
+@dataclass(frozen=True)
+class PageTask:
+    from_path: Path
+    template_path: Path
+    dest_path: Path
+    basepath: ParseResult
+    template: Template
+    parse_inline: InlineParser
+    source_hash: str
+    # None for sources too large to prefetch, which are streamed from disk
+    markdown: str | None = None
+    profile: bool = False
+    search: bool = False
+    images: ImageTable | None = None
+
+
+@dataclass
+class PageResult:
+    html: str | None = None
+    info: PageInfo = field(default_factory=PageInfo)
+    terms: dict[str, int] | None = None
+    error: str | None = None
+    profile: StageProfile | None = None
+    cache_stats: CacheStats | None = None
+    cache_added: dict[str, CachedBlock] | None = None
+
+
+def render_page(task: PageTask, cache: BlockCache | None = None) -> PageResult:
+    result = PageResult(info=PageInfo(text=[] if task.search else None))
+    if task.profile:
+        result.profile = StageProfile(str(task.from_path))
+    try:
+        if task.markdown is None:
+            task.dest_path.parent.mkdir(parents=True, exist_ok=True)
+            generate_page(
+                task.from_path,
+                task.template_path,
+                task.dest_path,
+                task.basepath,
+                task.template,
+                task.parse_inline,
+                result.profile,
+                # Caching every block of a streamed page would hold it all
+                # in memory, which streaming is there to avoid
+                None,
+                result.info,
+                task.images,
+            )
+        else:
+            result.html = render_markdown_page(
+                task.markdown,
+                task.template,
+                task.basepath.geturl(),
+                task.parse_inline,
+                result.profile,
+                cache,
+                result.info,
+                task.images,
+            )
+        if result.info.text is not None:
+            result.terms = count_terms(result.info.text)
+            result.info.text = None
+    except Exception as e:
+        result.error = f"{type(e).__name__}: {e}"
+    return result
+
+
+worker_cache: BlockCache | None = None
+
+
+def init_worker(level: int, cache: BlockCache | None) -> None:
+    global worker_cache
+    configure_logging(level)
+    worker_cache = cache
+    if worker_cache is not None:
+        worker_cache.stats = CacheStats()
+        worker_cache.take_added()
+
+
+def render_page_in_worker(task: PageTask) -> PageResult:
+    if worker_cache is None:
+        return render_page(task)
+
+    before = CacheStats(**vars(worker_cache.stats))
+    result = render_page(task, worker_cache)
+    result.cache_stats = CacheStats(
+        worker_cache.stats.hits - before.hits,
+        worker_cache.stats.misses - before.misses,
+        worker_cache.stats.evictions - before.evictions,
+    )
+    result.cache_added = worker_cache.take_added()
+    return result
+
+
+def render_pages(
+    tasks: Iterable[PageTask], jobs: int = 1, cache: BlockCache | None = None
+) -> Iterator[tuple[PageTask, PageResult]]:
+    if jobs <= 1:
+        for task in tasks:
+            yield task, render_page(task, cache)
+        return
+
+    # Imported here since multiprocessing dominates the import time otherwise
+    from concurrent.futures import ProcessPoolExecutor
+
+    from fileio import ordered_map
+
+    submitted: deque[PageTask] = deque()
+
+    def track(tasks: Iterable[PageTask]) -> Iterator[PageTask]:
+        for task in tasks:
+            submitted.append(task)
+            yield task
+
+    with ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=init_worker,
+        initargs=(logging.getLogger().getEffectiveLevel(), cache),
+    ) as executor:
+        results = ordered_map(executor, render_page_in_worker, track(tasks), jobs * 4)
+        for result in results:
+            task = submitted.popleft()
+            # Workers fill private copies of the cache, so fold their work back in
+            if cache is not None:
+                if result.cache_stats is not None:
+                    cache.stats.merge(result.cache_stats)
+                if result.cache_added:
+                    cache.update(result.cache_added)
+            yield task, result
+
+
+@dataclass
+class OutputTarget:
+    dest_root: Path
+    basepath: str
+    manifest: "Manifest | None" = None
+    search: "SearchIndex | None" = None
+
+    def dest(self, dest_path: Path, dest_root: Path) -> Path:
+        return self.dest_root / dest_path.relative_to(dest_root)
+
+
+def build_pages(
+    pages: list[tuple[Path, Path]],
+    template_path: Path,
+    dest_root: Path,
+    basepath: ParseResult,
+    manifest: "Manifest | None" = None,
+    jobs: int = 1,
+    parse_inline: InlineParser = text_to_textnodes,
+    profile: "BuildProfile | None" = None,
+    cache: BlockCache | None = None,
+    io_workers: int | None = None,
+    search: "SearchIndex | None" = None,
+    images: ImageTable | None = None,
+    targets: Sequence[OutputTarget] = (),
+    drafts: bool = False,
+    times: Mapping[Path, float] | None = None,
+    prune: bool = True,
+) -> BuildStats:
+    from concurrent.futures import ThreadPoolExecutor
+
+    from fileio import (
+        IO_WORKERS,
+        OutputWriter,
+        ordered_map,
+        read_page_source,
+        read_source,
+    )
+    from static import remove_output
+
+    if io_workers is None:
+        io_workers = IO_WORKERS
+    # With prune, pages lists every source and the outputs of any others are
+    # removed; without it only the given pages are built or removed as drafts,
+    # and they must include every page that shows a changed image
+    stats = BuildStats()
+    outputs = [OutputTarget(dest_root, basepath.geturl(), manifest, search), *targets]
+    # Pages for several targets are parsed and rendered once against a
+    # placeholder basepath, which each target then swaps for its own
+    shared = len(outputs) > 1
+    if shared:
+        basepath = urlparse(BASEPATH_PLACEHOLDER)
+    basepath_url = basepath.geturl()
+
+    def localize(text: str, target: OutputTarget) -> str:
+        return rebase_placeholder(text, target.basepath) if shared else text
+
+    template_source = read_source(template_path)
+    if template_source.text is None:
+        template = Template.load(template_path, basepath_url)
+    else:
+        template = Template(template_source.text, basepath_url, str(template_path))
+    image_table = images.digests if images is not None else {}
+    full_rebuild = any(
+        target.manifest is None
+        or target.manifest.template != template_source.hash
+        or target.manifest.basepath != target.basepath
+        for target in outputs
+    )
+    # Images whose dimensions or variants changed since each target's last build
+    changed_images = [
+        {
+            path
+            for path in image_table.keys() | target.manifest.image_table.keys()
+            if image_table.get(path) != target.manifest.image_table.get(path)
+        }
+        for target in outputs
+        if target.manifest is not None
+    ]
+    indexed = any(target.search is not None for target in outputs)
+    layouts: dict[str, tuple[Template, str]] = {}
+
+    def load_layout(path: str) -> tuple[Template, str]:
+        if path not in layouts:
+            source = read_source(Path(path), sys.maxsize)
+            assert source.text is not None
+            layouts[path] = (Template(source.text, basepath_url, path), source.hash)
+        return layouts[path]
+
+    def layout_changed(manifest: "Manifest", path: str) -> bool:
+        try:
+            return manifest.layouts.get(path) != load_layout(path)[1]
+        except OSError:
+            return True
+
+    def is_fresh(from_path: Path, dest_path: Path, source_hash: str) -> bool:
+        if full_rebuild:
+            return False
+        for target, changed in zip(outputs, changed_images):
+            manifest = target.manifest
+            target_dest = target.dest(dest_path, dest_root)
+            if manifest is None or not manifest.page_is_fresh(
+                from_path, target_dest, source_hash
+            ):
+                return False
+            entry = manifest.pages[str(from_path)]
+            if entry.get("draft") and not drafts:
+                return False
+            if changed:
+                page_dir = target_dest.parent.relative_to(target.dest_root).as_posix()
+                if any(
+                    site_path(ref, page_dir, target.basepath) in changed
+                    for ref in entry["refs"]
+                ):
+                    return False
+            layout = entry.get("layout")
+            if layout is not None and layout_changed(manifest, layout):
+                return False
+        return True
+
+    seen: set[str] = set()
+    read_seconds: dict[Path, float] = {}
+    mtimes: dict[Path, float] = {}
+    fronts: dict[Path, tuple[FrontMatter, str | None]] = {}
+    failed: list[tuple[Path, Path, str]] = []
+
+    def stale_tasks(sources: Iterable["Source"]) -> Iterator[PageTask]:
+        for (from_path, dest_path), source in zip(pages, sources):
+            if source.error is not None:
+                seen.add(str(from_path))
+                failed.append((from_path, dest_path, source.error))
+                continue
+            # Commit times, where given, keep dates the same in every clone
+            mtime = times.get(from_path, source.mtime) if times else source.mtime
+            if is_fresh(from_path, dest_path, source.hash):
+                seen.add(str(from_path))
+                stats.skipped += 1
+                # A page committed since it was rendered keeps its output,
+                # but listings and the sitemap pick up its new date
+                for target in outputs:
+                    assert target.manifest is not None
+                    entry = target.manifest.pages[str(from_path)]
+                    if entry["mtime"] != mtime:
+                        entry["mtime"] = mtime
+                        stats.changed.add(str(from_path))
+                continue
+
+            # Only the head of the source is parsed here, and streamed
+            # sources are not read past their front matter
+            page_template, layout = template, None
+            try:
+                if source.text is not None:
+                    front = scan_front_matter(source.text)[0]
+                else:
+                    front = load_front_matter(from_path)
+                if front.template is not None:
+                    layout = str(template_path.parent / front.template)
+                    page_template = load_layout(layout)[0]
+            except (OSError, ValueError) as e:
+                seen.add(str(from_path))
+                failed.append((from_path, dest_path, f"{type(e).__name__}: {e}"))
+                continue
+
+            # Drafts are left out of seen, so their earlier outputs go away
+            if front.draft and not drafts:
+                logger.debug("Skipped draft %s", from_path)
+                stats.drafts += 1
+                continue
+
+            seen.add(str(from_path))
+            read_seconds[from_path] = source.seconds
+            mtimes[from_path] = mtime
+            fronts[from_path] = (front, layout)
+            yield PageTask(
+                from_path,
+                template_path,
+                dest_path,
+                basepath,
+                page_template,
+                parse_inline,
+                source.hash,
+                source.text,
+                profile is not None,
+                indexed,
+                images,
+            )
+
+    # Shared renders must stay in memory to be localized, so never stream them
+    read = partial(read_page_source, limit=sys.maxsize) if shared else read_page_source
+
+    # Sources are read ahead and outputs written behind on I/O threads, while
+    # pages are rendered in order; results are settled in that same order
+    written: list[tuple[PageTask, PageResult, list["Future[float]"]]] = []
+    with ThreadPoolExecutor(max_workers=io_workers) as io_executor:
+        writer = OutputWriter(io_executor, io_workers * 2)
+        sources = ordered_map(
+            io_executor, read, [path for path, _ in pages], io_workers * 2
+        )
+        tasks = stale_tasks(sources)
+        for task, result in render_pages(tasks, min(jobs, len(pages)), cache):
+            futures = []
+            if result.html is not None:
+                for target in outputs:
+                    dest_path = target.dest(task.dest_path, dest_root)
+                    futures.append(
+                        writer.submit(dest_path, localize(result.html, target))
+                    )
+                result.html = None
+            written.append((task, result, futures))
+
+        for task, result, futures in written:
+            for future in futures:
+                try:
+                    write_seconds = future.result()
+                except OSError as e:
+                    result.error = f"{type(e).__name__}: {e}"
+                else:
+                    if result.profile is not None:
+                        result.profile.seconds["write"] += write_seconds
+
+            if profile is not None and result.profile is not None:
+                result.profile.seconds["read"] += read_seconds[task.from_path]
+                profile.add(result.profile)
+
+            if result.error is not None:
+                failed.append((task.from_path, task.dest_path, result.error))
+                continue
+
+            logger.debug("Generated %s from %s", task.dest_path, task.from_path)
+            stats.rebuilt += 1
+            stats.changed.add(str(task.from_path))
+            front, layout = fronts[task.from_path]
+            for target in outputs:
+                dest_path = target.dest(task.dest_path, dest_root)
+                if target.manifest is not None:
+                    target.manifest.record_page(
+                        task.from_path,
+                        dest_path,
+                        task.source_hash,
+                        [localize(ref, target) for ref in result.info.refs],
+                        result.info.title or "",
+                        result.info.summary or "",
+                        mtimes[task.from_path],
+                        front,
+                        layout,
+                    )
+                if target.search is not None and result.terms is not None:
+                    target.search.update_page(
+                        str(task.from_path),
+                        page_url(dest_path, target.dest_root, target.basepath),
+                        result.info.title or "",
+                        result.terms,
+                    )
+
+    for from_path, dest_path, error in failed:
+        stats.errors.append((from_path, error))
+        stats.changed.add(str(from_path))
+        for target in outputs:
+            remove_output(target.dest(dest_path, dest_root), target.dest_root)
+            if target.manifest is not None:
+                target.manifest.pages.pop(str(from_path), None)
+            if target.search is not None:
+                target.search.remove_page(str(from_path))
+
+    given = None if prune else {str(from_path) for from_path, _ in pages}
+    for target in outputs:
+        if target.manifest is not None:
+            for source in list(target.manifest.pages):
+                if source in seen or (given is not None and source not in given):
+                    continue
+                entry = target.manifest.pages.pop(source)
+                remove_output(Path(entry["dest"]), target.dest_root)
+                if target is outputs[0]:
+                    stats.removed += 1
+                    stats.changed.add(source)
+
+            target.manifest.template = template_source.hash
+            target.manifest.basepath = target.basepath
+            target.manifest.image_table = image_table
+            if prune:
+                target.manifest.layouts = {}
+            for path, (_, layout_hash) in layouts.items():
+                target.manifest.layouts[path] = layout_hash
+
+        if target.search is not None:
+            for source in list(target.search.docs):
+                if source in seen or (given is not None and source not in given):
+                    continue
+                target.search.remove_page(source)
+
+    return stats
+
 
-        if path.is_dir():
-            new_dest_path = dest_path / path.name
-            new_dest_path.mkdir()
-            generate_pages(path, template_path, new_dest_path, basepath)
+def generate_pages(
+    src_path: Path,
+    template_path: Path,
+    dest_path: Path,
+    basepath: ParseResult,
+    manifest: "Manifest | None" = None,
+    jobs: int = 1,
+    parse_inline: InlineParser = text_to_textnodes,
+    profile: "BuildProfile | None" = None,
+    cache: BlockCache | None = None,
+    search: "SearchIndex | None" = None,
+    images: ImageTable | None = None,
+    drafts: bool = False,
+    times: Mapping[Path, float] | None = None,
+) -> BuildStats:
+    pages = discover_pages(src_path, dest_path)
+    return build_pages(
+        pages,
+        template_path,
+        dest_path,
+        basepath,
+        manifest,
+        jobs,
+        parse_inline,
+        profile,
+        cache,
+        search=search,
+        images=images,
+        drafts=drafts,
+        times=times,
+    )
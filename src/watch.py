@@ -0,0 +1,286 @@
+import logging
+import os
+import time
+from collections.abc import Callable, Iterable
+from pathlib import Path
+from urllib.parse import ParseResult
+
+from cache import BlockCache
+from compress import compress_outputs
+from deps import DependencyGraph, normalize_path
+from images import IMAGE_SUFFIXES, ImageTable, process_images
+from manifest import Manifest, hash_file
+from search import SEARCH_DIR, SearchIndex
+from sections import write_sections
+from sitemap import write_sitemap
+from static import remove_output, transfer
+from template import Template
+from utils import BuildStats, InlineParser, build_pages, discover_pages
+
+logger = logging.getLogger(__name__)
+
+Snapshot = dict[Path, tuple[int, int]]
+
+
+def scan(root: Path) -> Snapshot:
+    snapshot: Snapshot = {}
+    if root.is_file():
+        stat = root.stat()
+        snapshot[root] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    stack = [root]
+    while stack:
+        try:
+            entries = list(os.scandir(stack.pop()))
+        except FileNotFoundError:
+            continue
+        for entry in entries:
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(Path(entry.path))
+            elif entry.is_file():
+                stat = entry.stat()
+                snapshot[Path(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+    return snapshot
+
+
+def diff(before: Snapshot, after: Snapshot) -> tuple[list[Path], list[Path]]:
+    changed = sorted(path for path, stat in after.items() if before.get(path) != stat)
+    removed = sorted(path for path in before if path not in after)
+    return changed, removed
+
+
+class Watcher:
+    def __init__(
+        self,
+        content_dir: Path,
+        static_dir: Path,
+        template_path: Path,
+        docs_dir: Path,
+        basepath: ParseResult,
+        manifest: Manifest,
+        parse_inline: InlineParser,
+        link: str = "copy",
+        on_change: Callable[[], None] | None = None,
+        cache: BlockCache | None = None,
+        search: SearchIndex | None = None,
+        images: ImageTable | None = None,
+        page_size: int | None = None,
+        drafts: bool = False,
+        image_cache_dir: Path | None = None,
+        sitemap: bool = False,
+        minify: bool = False,
+        deps_path: Path | None = None,
+    ) -> None:
+        self.content_dir = content_dir
+        self.static_dir = static_dir
+        self.template_path = template_path
+        self.docs_dir = docs_dir
+        self.basepath = basepath
+        self.manifest = manifest
+        self.parse_inline = parse_inline
+        self.link = link
+        self.on_change = on_change
+        self.cache = cache
+        self.search = search
+        self.images = images
+        # None leaves section listings and feeds alone
+        self.page_size = page_size
+        self.drafts = drafts
+        # Where image variants are cached, or None when images are not processed
+        self.image_cache_dir = image_cache_dir
+        self.sitemap = sitemap
+        self.minify = minify
+        # The graph tells which pages a change affects, and is saved for
+        # --affected when a path is given
+        self.deps_path = deps_path
+        self.graph = (
+            DependencyGraph.load(deps_path)
+            if deps_path is not None
+            else DependencyGraph(Path())
+        )
+        self.graph.sync(manifest, docs_dir, template_path)
+        self.template = Template.load(template_path, basepath.geturl())
+        self.snapshot = self.scan()
+
+    def scan(self) -> Snapshot:
+        snapshot = scan(self.content_dir)
+        snapshot.update(scan(self.static_dir))
+        snapshot.update(scan(self.template_path))
+        snapshot.update(self.scan_layouts())
+        return snapshot
+
+    def scan_layouts(self) -> Snapshot:
+        # Front matter templates are watched once a built page uses them
+        snapshot: Snapshot = {}
+        for layout in self.manifest.layouts:
+            snapshot.update(scan(Path(layout)))
+        return snapshot
+
+    def page_output(self, from_path: Path) -> Path:
+        rel = from_path.relative_to(self.content_dir)
+        return self.docs_dir / rel.parent / f"{from_path.stem}.html"
+
+    def poll(self) -> bool:
+        snapshot = self.scan()
+        changed, removed = diff(self.snapshot, snapshot)
+        self.snapshot = snapshot
+        if not changed and not removed:
+            return False
+
+        start = time.perf_counter()
+        self.update_images(changed, removed)
+        if self.template_path in changed:
+            stats = self.rebuild_all()
+            self.update_sections(None)
+        else:
+            stats = self.update_pages(changed, removed)
+            self.update_sections(stats.changed)
+        for path, stat in self.scan_layouts().items():
+            self.snapshot.setdefault(path, stat)
+        if self.sitemap:
+            write_sitemap(
+                self.docs_dir, self.basepath.geturl(), self.manifest, stats.changed
+            )
+        self.update_static(changed, removed)
+        if self.minify:
+            compress_outputs(self.docs_dir, self.manifest, minify=True)
+        self.manifest.save()
+        self.graph.sync(self.manifest, self.docs_dir, self.template_path)
+        if self.deps_path is not None:
+            self.graph.save()
+        if self.search is not None:
+            self.search.write(self.docs_dir / SEARCH_DIR)
+            self.search.save()
+
+        logger.info(
+            "Rebuilt %d changed and %d removed files in %.1f ms",
+            len(changed),
+            len(removed),
+            (time.perf_counter() - start) * 1000,
+        )
+        if self.on_change is not None:
+            self.on_change()
+        return True
+
+    def build(self, pages: list[tuple[Path, Path]], prune: bool) -> BuildStats:
+        stats = build_pages(
+            pages,
+            self.template_path,
+            self.docs_dir,
+            self.basepath,
+            self.manifest,
+            parse_inline=self.parse_inline,
+            cache=self.cache,
+            search=self.search,
+            images=self.images,
+            drafts=self.drafts,
+            prune=prune,
+        )
+        for from_path, error in stats.errors:
+            logger.error("Failed to generate %s: %s", from_path, error)
+        return stats
+
+    def rebuild_all(self) -> BuildStats:
+        self.template = Template.load(self.template_path, self.basepath.geturl())
+        return self.build(discover_pages(self.content_dir, self.docs_dir), True)
+
+    def update_images(self, changed: list[Path], removed: list[Path]) -> None:
+        if self.image_cache_dir is None:
+            return
+        if any(
+            path.is_relative_to(self.static_dir)
+            and path.suffix.lower() in IMAGE_SUFFIXES
+            for path in changed + removed
+        ):
+            self.images = process_images(
+                self.static_dir,
+                self.docs_dir,
+                self.manifest,
+                self.image_cache_dir,
+                link=self.link,
+            )[0]
+
+    def source_path(self, source: str) -> Path:
+        # The graph may name a source relative to the working directory, while
+        # the manifest keeps the form the content directory was given in
+        rel = os.path.relpath(
+            normalize_path(source), normalize_path(str(self.content_dir))
+        )
+        return self.content_dir / rel
+
+    def update_pages(self, changed: list[Path], removed: list[Path]) -> BuildStats:
+        # Changed pages, and the pages showing a changed layout or image, go
+        # through the same freshness checks as a build
+        affected = self.graph.affected(
+            [normalize_path(str(path)) for path in changed + removed],
+            normalize_path(str(self.content_dir)),
+            normalize_path(str(self.static_dir)),
+        )
+        pages = []
+        for source in sorted(affected.rebuild):
+            from_path = self.source_path(source)
+            if from_path.is_file():
+                pages.append((from_path, self.page_output(from_path)))
+        stats = self.build(pages, False)
+
+        for from_path in removed:
+            if str(from_path) in self.manifest.pages:
+                self.remove_page(from_path)
+                stats.changed.add(str(from_path))
+        return stats
+
+    def remove_page(self, from_path: Path) -> None:
+        if self.search is not None:
+            self.search.remove_page(str(from_path))
+        entry = self.manifest.pages.pop(str(from_path), None)
+        if entry is not None:
+            remove_output(Path(entry["dest"]), self.docs_dir)
+
+    def update_sections(self, changed: Iterable[str] | None) -> None:
+        if self.page_size is None:
+            return
+        write_sections(
+            self.content_dir,
+            self.docs_dir,
+            self.basepath.geturl(),
+            self.template,
+            self.manifest,
+            changed,
+            self.page_size,
+        )
+
+    def update_static(self, changed: list[Path], removed: list[Path]) -> None:
+        page_outputs = {Path(entry["dest"]) for entry in self.manifest.pages.values()}
+        for path in changed:
+            if not path.is_relative_to(self.static_dir):
+                continue
+            rel = str(path.relative_to(self.static_dir))
+            dest_path = self.docs_dir / rel
+            if dest_path in page_outputs:
+                continue
+            stat = path.stat()
+            transfer(path, dest_path, self.link)
+            self.manifest.static[rel] = {
+                "hash": hash_file(path),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+
+        for path in removed:
+            if not path.is_relative_to(self.static_dir):
+                continue
+            rel = str(path.relative_to(self.static_dir))
+            if self.manifest.static.pop(rel, None) is not None:
+                dest_path = self.docs_dir / rel
+                if dest_path not in page_outputs:
+                    remove_output(dest_path, self.docs_dir)
+
+    def run(self, interval: float = 0.05) -> None:
+        logger.info("Watching for changes, press Ctrl+C to stop")
+        while True:
+            time.sleep(interval)
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error("Rebuild failed: %s", e)